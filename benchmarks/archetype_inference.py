@@ -0,0 +1,42 @@
+import argparse
+import contextlib
+import io
+import time
+
+from core.game import Game
+from core.player import PlayerType
+from core.simulate import game_seed
+
+
+def reveals_per_second(n_reveals: int = 200_000, game_format: str = "sparky", seed: int = 0) -> float:
+    """Times Game.reveal_card over the opponent's library, starting a fresh game whenever it runs out"""
+    done = 0
+    elapsed = 0.0
+    while done < n_reveals:
+        with contextlib.redirect_stdout(io.StringIO()):
+            game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, game_format=game_format,
+                        seed=game_seed(seed, done))
+            game.start_game()
+        observer, revealer = game.players
+        cards = list(revealer.library)[:n_reveals - done]
+
+        start = time.perf_counter()
+        for card in cards:
+            game.reveal_card(card, revealer, observer)
+        elapsed += time.perf_counter() - start
+        done += len(cards)
+
+    return done / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark archetype inference on card reveals")
+    parser.add_argument("--reveals", type=int, default=200_000)
+    parser.add_argument("--format", default="sparky")
+    args = parser.parse_args(argv)
+
+    print(f"{reveals_per_second(args.reveals, args.format):,.0f} reveals/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from data.bulk_data import ingest_bulk
+
+FIXTURE = Path(__file__).parent.parent / 'data' / 'fixtures' / 'scryfall_bulk_sample.json'
+
+
+def write_synthetic_bulk(path: Path, n_records: int, printings_per_card: int = 8):
+    """Writes n_records Scryfall-shaped records, streaming, with printings_per_card reprints of each oracle id"""
+    with open(FIXTURE, encoding='utf-8') as f:
+        templates = json.load(f)
+
+    with open(path, 'w', encoding='utf-8') as out:
+        out.write('[\n')
+        for i in range(n_records):
+            record = dict(templates[i % len(templates)])
+            card_number = i // printings_per_card
+            record['id'] = f'synthetic-{i}'
+            record['oracle_id'] = f'oracle-{card_number}'
+            record['name'] = f"{record['name']} {card_number}"
+            record['lang'] = 'en' if i % 10 else 'de'
+            if i:
+                out.write(',\n')
+            out.write(json.dumps(record, ensure_ascii=False))
+        out.write('\n]\n')
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark streaming bulk-data ingest on a synthetic file")
+    parser.add_argument("--records", type=int, default=500_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bulk_path = Path(tmp) / 'bulk.json'
+        write_synthetic_bulk(bulk_path, args.records)
+        size_mb = os.path.getsize(bulk_path) / 2 ** 20
+        rss_before = _max_rss_mb()
+
+        start = time.perf_counter()
+        n_read, n_written = ingest_bulk(bulk_path, Path(tmp) / 'cards.col')
+        elapsed = time.perf_counter() - start
+
+        print(f"Ingested {n_read} records ({size_mb:.0f} MB) into {n_written} cards in {elapsed:.2f}s "
+              f"({n_read / elapsed:,.0f} records/sec)")
+        print(f"Peak RSS {_max_rss_mb():.0f} MB (was {rss_before:.0f} MB before ingest)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import contextlib
+import io
+import time
+
+from core.decisions import DecisionBroker, RuleModel
+from core.game import Game
+from core.player import PlayerType
+from core.simulate import game_seed
+
+
+def decisions_per_second(batch_size: int, n_games: int = 2000, game_format: str = "sparky", seed: int = 0) -> dict:
+    """
+    Runs the opening (play/draw and mulligans) of n_games through a DecisionBroker
+
+    Returns the broker's stats plus end-to-end decisions/sec, which include the game code between decisions.
+    """
+    broker = DecisionBroker(RuleModel(), batch_size)
+    games = (Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, game_format=game_format,
+                  seed=game_seed(seed, i)).start_game_steps()
+             for i in range(n_games))
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        broker.run(games)
+    elapsed = time.perf_counter() - start
+
+    stats = broker.stats()
+    stats["decisions_per_sec"] = stats["decisions"] / elapsed
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark batched AI decisions at several batch sizes")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16, 64, 256])
+    parser.add_argument("--format", default="sparky")
+    args = parser.parse_args(argv)
+
+    for batch_size in args.batch_sizes:
+        stats = decisions_per_second(batch_size, args.games, args.format)
+        print(f"batch {batch_size:>4}: {stats['mean_batch_size']:6.1f} mean batch, "
+              f"{stats['model_decisions_per_sec']:>12,.0f} model decisions/sec, "
+              f"{stats['decisions_per_sec']:>9,.0f} decisions/sec end to end")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+PROJ_DIR = Path(__file__).parent.parent
+# What a simulator worker imports before it can play
+DEFAULT_MODULE = 'core.game'
+# The goal is tens of ms, but numpy alone takes about 85 ms and every game needs it, so it stays eager. The
+# default budget sits just above today's ~135 ms to catch regressions rather than claiming the goal is met.
+DEFAULT_BUDGET_MS = 150.0
+
+
+def _importtime(module: str) -> List[Tuple[str, int, int, int]]:
+    """
+    (module, nesting depth, self us, cumulative us) for every import `python -X importtime` reports while
+    running `import module`, in the order reported: each module right after everything it imported
+    """
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=PROJ_DIR,
+                               capture_output=True, text=True, check=True)
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_seconds(module: str = DEFAULT_MODULE, runs: int = 5) -> float:
+    """
+    Best cumulative import time of module over `runs` fresh interpreters
+
+    Only the module's own import tree counts, not interpreter startup or site-packages .pth hooks.
+    """
+    best = None
+    for _ in range(runs):
+        cumulative_us = next(us for name, depth, _, us in _importtime(module) if name == module and depth == 0)
+        best = cumulative_us if best is None else min(best, cumulative_us)
+    return best / 1e6
+
+
+def slowest_imports(module: str = DEFAULT_MODULE, n: int = 10) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) of the n slowest imports module makes itself, slowest first"""
+    rows = _importtime(module)
+    end = next(i for i, (name, depth, _, _) in enumerate(rows) if name == module and depth == 0)
+    start = end
+    while start > 0 and rows[start - 1][1] > 0:
+        start -= 1
+    direct = [(name, self_us, cumulative_us) for name, depth, self_us, cumulative_us in rows[start:end] if depth == 1]
+    return sorted(direct, key=lambda row: row[2], reverse=True)[:n]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure how long importing a module takes in a fresh interpreter")
+    parser.add_argument("module", nargs='?', default=DEFAULT_MODULE)
+    parser.add_argument("--runs", type=int, default=5, help="interpreters to start; the fastest is reported")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="exit with status 1 if the import takes longer")
+    parser.add_argument("--top", type=int, default=10, help="also list this many of the slowest imports")
+    args = parser.parse_args(argv)
+
+    seconds = import_seconds(args.module, args.runs)
+    print(f"import {args.module}: {seconds * 1000:.1f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    for name, self_us, cumulative_us in slowest_imports(args.module, args.top):
+        print(f"  {cumulative_us / 1000:7.1f} ms  {name} (self {self_us / 1000:.1f} ms)")
+    if seconds * 1000 > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
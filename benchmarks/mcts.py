@@ -0,0 +1,41 @@
+import argparse
+import contextlib
+import io
+import time
+
+from core.game import Game
+from core.mcts import MonteCarloTreeSearch
+from core.player import PlayerType
+from core.simulate import game_seed
+
+
+def rollouts_per_decision(workers: int, budget_ms: float = 100, n_games: int = 5, seed: int = 0) -> dict:
+    """Plays n_games of an MCTS player against the AI rules and reports the search's throughput"""
+    with MonteCarloTreeSearch(budget_ms=budget_ms, workers=workers, seed=seed) as search:
+        start = time.perf_counter()
+        for i in range(n_games):
+            game = Game(player1_type=PlayerType.MCTS, player2_type=PlayerType.AI, seed=game_seed(seed, i))
+            game.search = search
+            with contextlib.redirect_stdout(io.StringIO()):
+                game.start_game()
+        elapsed = time.perf_counter() - start
+        stats = search.stats()
+    stats["ms_per_decision"] = 1000 * elapsed / max(1, stats["decisions"])
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark MCTS rollouts per decision by worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--budget-ms", type=float, default=100)
+    parser.add_argument("--games", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for workers in args.workers:
+        stats = rollouts_per_decision(workers, args.budget_ms, args.games)
+        print(f"{workers} workers: {stats['rollouts_per_decision']:,.0f} rollouts/decision, "
+              f"{stats['ms_per_decision']:.0f} ms/decision over {stats['decisions']} decisions")
+
+
+if __name__ == '__main__':
+    main()
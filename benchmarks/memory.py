@@ -0,0 +1,46 @@
+import argparse
+import contextlib
+import gc
+import io
+import tracemalloc
+
+from core.game import Game
+from core.player import PlayerType
+from core.simulate import game_seed
+
+
+def _new_game(game_format: str, seed: int) -> Game:
+    game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, game_format=game_format, seed=seed)
+    game.start_game()
+    return game
+
+
+def bytes_per_game(n_games: int = 500, game_format: str = "sparky", seed: int = 0) -> float:
+    """Average traced allocation held by one live game after setup (decks loaded, hands kept)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Warm up process-wide caches so they aren't charged to the measured games
+        _new_game(game_format, game_seed(seed, -1))
+        gc.collect()
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        games = [_new_game(game_format, game_seed(seed, i)) for i in range(n_games)]
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+    del games
+    return (after - before) / n_games
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report memory held per live game")
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--format", default="sparky")
+    args = parser.parse_args(argv)
+
+    print(f"{bytes_per_game(args.games, args.format):.0f} bytes per live game ({args.games} games)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import contextlib
+import copy
+import io
+import time
+
+from core.game import Game
+from core.player import PlayerType
+
+
+def midgame(turns: int = 6, game_format: str = "sparky", seed: int = 0) -> Game:
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, game_format=game_format, seed=seed)
+        game.start_game()
+    for _ in range(turns):
+        game.take_turn()
+    return game
+
+
+def clones_per_second(n_clones: int = 20_000, turns: int = 6, seed: int = 0) -> dict:
+    """
+    Times Game.snapshot and Game.restore on a game `turns` turns in
+
+    A clone is one snapshot plus one restore; restores alternate between two snapshots a turn apart so every
+    restore has zones to move back.
+    """
+    game = midgame(turns, seed=seed)
+    earlier = game.snapshot()
+    game.take_turn()
+    later = game.snapshot()
+
+    start = time.perf_counter()
+    for _ in range(n_clones):
+        game.snapshot()
+    snapshot_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(n_clones):
+        game.restore(earlier if i % 2 else later)
+    restore_seconds = time.perf_counter() - start
+
+    results = {
+        "snapshots_per_sec": n_clones / snapshot_seconds,
+        "restores_per_sec": n_clones / restore_seconds,
+        "clones_per_sec": n_clones / (snapshot_seconds + restore_seconds),
+    }
+
+    n_deepcopies = max(1, n_clones // 100)
+    start = time.perf_counter()
+    for _ in range(n_deepcopies):
+        copy.deepcopy(game)
+    results["deepcopies_per_sec"] = n_deepcopies / (time.perf_counter() - start)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Game snapshot/restore against copy.deepcopy")
+    parser.add_argument("--clones", type=int, default=20_000)
+    parser.add_argument("--turns", type=int, default=6, help="turns to play before cloning")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the game being cloned")
+    args = parser.parse_args(argv)
+
+    for name, rate in clones_per_second(args.clones, args.turns, args.seed).items():
+        print(f"{name}: {rate:,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.archetype_inference import reveals_per_second
+from benchmarks.importtime import import_seconds
+from core.Deck import load_deck
+from core.game import Game
+from core.player import PlayerType
+from core.simulate import play_batch
+from data.historical_repository import HistoricalRepository
+
+PROJ_DIR = Path(__file__).parent.parent
+OUTPUT_PATH = PROJ_DIR / 'bench_output.txt'
+BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+SPARKY_DECKS = ('sparky_white', 'sparky_blue', 'sparky_black', 'sparky_red', 'sparky_green')
+# A case regresses when its rate drops by more than this fraction of the baseline
+DEFAULT_TOLERANCE = 0.10
+SEED = 0
+
+
+def _opened_game(seed: int = SEED) -> Game:
+    """An AI-vs-AI game with decks loaded and hands kept"""
+    game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=seed)
+    game.start_game()
+    return game
+
+
+def _rate(n: int, call: Callable[[], object]) -> float:
+    """Calls/sec of n calls in a row, dropping each result"""
+    start = time.perf_counter()
+    for _ in range(n):
+        call()
+    return n / (time.perf_counter() - start)
+
+
+def load_deck_rate(deck_name: str, scale: float = 1.0) -> float:
+    """load_deck calls/sec once the deck is cached, i.e. the per-game cost of building its Card objects"""
+    load_deck(deck_name, 'sparky')
+    n = max(1, int(2000 * scale))
+    return _rate(n, lambda: load_deck(deck_name, 'sparky'))
+
+
+def draw_rate(scale: float = 1.0) -> float:
+    """Player.draw_card calls/sec: a seven-card hand, then one card at a time until the library runs out"""
+    game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=SEED)
+    game.begin_opening()
+    full = game.snapshot()
+    player = game.players[0]
+
+    draws = 0
+    elapsed = 0.0
+    for _ in range(max(1, int(200 * scale))):
+        game.restore(full)
+        start = time.perf_counter()
+        player.draw_card(game, amount=7)
+        while player.draw_card(game) is not None:
+            draws += 1
+        elapsed += time.perf_counter() - start
+        draws += 1
+    return draws / elapsed
+
+
+def mulligan_state_rate(scale: float = 1.0) -> float:
+    game = _opened_game()
+    player = game.players[0]
+    n = max(1, int(20_000 * scale))
+    return _rate(n, lambda: game._get_mulligan_state(player, {'times': 0}))
+
+
+def castable_rate(scale: float = 1.0) -> float:
+    """Game.castable_cards calls/sec for an opening hand, i.e. checking every card in hand against the lands"""
+    game = _opened_game()
+    player = game.players[0]
+    n = max(1, int(20_000 * scale))
+    return _rate(n, lambda: game.castable_cards(player))
+
+
+def archetype_update_rate(scale: float = 1.0) -> float:
+    return reveals_per_second(max(1, int(100_000 * scale)), seed=SEED)
+
+
+def _results(n: int) -> list:
+    """n random (deck, played_first, won, opponent) results"""
+    rng = random.Random(SEED)
+    return [(rng.choice(SPARKY_DECKS), rng.random() < 0.5, rng.random() < 0.5, rng.choice(SPARKY_DECKS))
+            for _ in range(n)]
+
+
+def update_win_rates_rate(scale: float = 1.0) -> float:
+    """HistoricalRepository.update_win_rates calls/sec including its flushes, in a temporary directory"""
+    results = _results(max(1, int(20_000 * scale)))
+    with tempfile.TemporaryDirectory() as tmp, HistoricalRepository(data_dir=tmp) as repository:
+        start = time.perf_counter()
+        for deck, played_first, won, opponent in results:
+            repository.update_win_rates(deck, played_first, won, opponent)
+        repository.flush()
+        return len(results) / (time.perf_counter() - start)
+
+
+def get_win_rates_rate(scale: float = 1.0) -> float:
+    results = _results(max(1, int(20_000 * scale)))
+    with tempfile.TemporaryDirectory() as tmp, HistoricalRepository(data_dir=tmp) as repository:
+        for deck, played_first, won, opponent in results:
+            repository.update_win_rates(deck, played_first, won, opponent)
+        repository.flush()
+        start = time.perf_counter()
+        for deck, _, _, opponent in results:
+            repository.get_win_rates(deck, opponent)
+        return len(results) / (time.perf_counter() - start)
+
+
+def games_rate(scale: float = 1.0) -> float:
+    """End-to-end AI-vs-AI games/sec in this process, the inner loop of core.simulate"""
+    n = max(1, int(300 * scale))
+    start = time.perf_counter()
+    play_batch(n, SEED)
+    return n / (time.perf_counter() - start)
+
+
+def cases(scale: float = 1.0) -> List[Tuple[str, Callable[[], float]]]:
+    """(name, benchmark) pairs; every benchmark returns a rate, higher is better"""
+    return [
+        *((f'load_deck_{deck_name}', lambda deck_name=deck_name: load_deck_rate(deck_name, scale))
+          for deck_name in SPARKY_DECKS),
+        ('draw_card', lambda: draw_rate(scale)),
+        ('get_mulligan_state', lambda: mulligan_state_rate(scale)),
+        ('castable_cards', lambda: castable_rate(scale)),
+        ('update_suspected_archetype', lambda: archetype_update_rate(scale)),
+        ('update_win_rates', lambda: update_win_rates_rate(scale)),
+        ('get_win_rates', lambda: get_win_rates_rate(scale)),
+        ('games', lambda: games_rate(scale)),
+        ('import_core_game', lambda: 1 / import_seconds('core.game', runs=1)),
+    ]
+
+
+def run_suite(repeats: int = 5, scale: float = 1.0) -> Dict[str, float]:
+    """Best rate of `repeats` runs of every case, after one warm-up run (best-of-N is the least noisy estimate)"""
+    _opened_game()
+    results = {}
+    for name, benchmark in cases(scale):
+        benchmark()
+        results[name] = max(benchmark() for _ in range(repeats))
+    return results
+
+
+def report(results: Dict[str, float], repeats: int, scale: float) -> dict:
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(),
+            'commit': _git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'repeats': repeats,
+            'scale': scale,
+            'seed': SEED,
+        },
+        'results': results,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJ_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[Tuple[str, float, float, float, bool]]:
+    """
+    Returns (case, baseline rate, rate, relative change, regressed) for every case in both runs
+
+    A case regressed if its rate fell by more than tolerance; cases only in one of the runs are skipped.
+    """
+    rows = []
+    for name, rate in results.items():
+        if name in baseline:
+            change = rate / baseline[name] - 1
+            rows.append((name, baseline[name], rate, change, change < -tolerance))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the simulation hot paths (rates, higher is better)")
+    parser.add_argument("--repeats", type=int, default=5, help="runs per case; the best one is reported")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies every case's iteration count")
+    parser.add_argument("--out", default=str(OUTPUT_PATH), help="JSON report path")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="baseline report path")
+    parser.add_argument("--save-baseline", action="store_true", help="also store this run as the baseline")
+    parser.add_argument("--compare", action="store_true",
+                        help="compare against the baseline and exit with status 1 on any regression")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown before a case counts as regressed")
+    args = parser.parse_args(argv)
+    if args.compare and not args.save_baseline and not Path(args.baseline).exists():
+        parser.error(f"no baseline at {args.baseline}; run with --save-baseline first to record one")
+
+    results = run_suite(args.repeats, args.scale)
+    output = json.dumps(report(results, args.repeats, args.scale), indent=2)
+    Path(args.out).write_text(output, encoding='utf-8')
+    for name, rate in results.items():
+        print(f"{name}: {rate:,.0f}/sec")
+    print(f"Wrote {args.out}")
+
+    if args.save_baseline:
+        Path(args.baseline).write_text(output, encoding='utf-8')
+        print(f"Saved baseline to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = 0
+        for name, before, after, change, regressed in compare(results, baseline, args.tolerance):
+            regressions += regressed
+            flag = '  REGRESSION' if regressed else ''
+            print(f"{name}: {before:,.0f} -> {after:,.0f}/sec ({change:+.1%}){flag}")
+        if regressions:
+            print(f"{regressions} case(s) slower than the baseline by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
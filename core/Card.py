@@ -1,4 +1,7 @@
 class Face:
+    __slots__ = ('name', 'mana_cost', 'type_line', 'oracle', 'colors',
+                 'power', 'toughness', 'loyalty', 'defense')
+
     def __init__(self, data:dict):
         self.name = data['name']
         self.mana_cost = data['mana_cost']
@@ -9,7 +12,13 @@ class Face:
         self.power = data['power'] if 'power' in data else None
         self.toughness = data['toughness'] if 'toughness' in data else None
         self.loyalty = data['loyalty'] if 'loyalty' in data else None
-        self.defence = data['defence'] if 'defence' in data else None
+        # Scryfall's spelling; decks saved before it was adopted have 'defence'
+        self.defense = data['defense'] if 'defense' in data else data.get('defence')
+
+    @property
+    def defence(self):
+        """Read-only alias of defense, for callers written before the Scryfall spelling was adopted"""
+        return self.defense
 
     def to_dict(self):
         """Convert Face to a serializable dictionary"""
@@ -22,12 +31,15 @@ class Face:
             'power': self.power,
             'toughness': self.toughness,
             'loyalty': self.loyalty,
-            'defence': self.defence
+            'defense': self.defense
         }
 
 
-class Card:
-    def __init__(self,data:dict):
+class PrintedCard:
+    """Printed characteristics of a card, built once and shared by every copy of it"""
+    __slots__ = ('name', 'layout', 'cmc', 'colors', 'color_id', 'faces', '_type_lines')
+
+    def __init__(self, data: dict):
         self.name = data['name']
         self.layout = data['layout']
         self.cmc = data['cmc']
@@ -35,24 +47,29 @@ class Card:
         self.color_id = data['color_identity']
 
         self.faces = self.init_faces(data)
+        self._type_lines = tuple(face.type_line.lower() for face in self.faces.values())
 
-        self.abilities = []
-        self.zone = None
-        self.tapped = False
-        self.counters = {}
-
-    def init_faces(self, data:dict):
+    def init_faces(self, data: dict):
         """Initialize faces with proper dictionary structure"""
         faces = {}
         if 'card_faces' in data:
             for i, face_data in enumerate(data['card_faces'], 1):
                 faces[f'Face{i}'] = Face(face_data)
+        elif 'faces' in data:
+            # Saved by to_dict()
+            for face_name, face_data in data['faces'].items():
+                faces[face_name] = Face(face_data)
         else:
             faces['Face1'] = Face(data)
         return faces
 
+    def has_type(self, card_type: str) -> bool:
+        """Check if any face's type line contains card_type (case-insensitive)"""
+        card_type = card_type.lower()
+        return any(card_type in type_line for type_line in self._type_lines)
+
     def to_dict(self):
-        """Convert Card to a serializable dictionary"""
+        """Convert PrintedCard to a serializable dictionary"""
         return {
             'name': self.name,
             'layout': self.layout,
@@ -63,5 +80,116 @@ class Card:
         }
 
 
+class Card:
+    """A single copy of a card in a game: shared printed data plus its own mutable state"""
+    __slots__ = ('printed', 'id', 'abilities', 'hasher', 'zone', 'controller', 'tapped', 'counters')
+
+    def __init__(self, data):
+        self.printed = data if isinstance(data, PrintedCard) else CARD_REGISTRY.intern(data)
+        # Index into Game.cards, assigned when the card's deck is loaded into a game
+        self.id = None
+        # The game's ZobristHash once the card is hashed (see HashedCard)
+        self.hasher = None
+
+        self.abilities = []
+        self.zone = None
+        self.controller = None
+        self.tapped = False
+        self.counters = {}  # counter type -> count; change through add_counters or by assigning a new dict
+
+    def add_counters(self, counter_type: str, amount: int = 1):
+        self.counters[counter_type] = max(0, self.counters.get(counter_type, 0) + amount)
+
+    @property
+    def name(self):
+        return self.printed.name
+
+    @property
+    def layout(self):
+        return self.printed.layout
+
+    @property
+    def cmc(self):
+        return self.printed.cmc
+
+    @property
+    def colors(self):
+        return self.printed.colors
+
+    @property
+    def color_id(self):
+        return self.printed.color_id
+
+    @property
+    def faces(self):
+        return self.printed.faces
+
+    def has_type(self, card_type: str) -> bool:
+        """Check if any face's type line contains card_type (case-insensitive)"""
+        return self.printed.has_type(card_type)
+
+    def to_dict(self):
+        """Convert Card to a serializable dictionary"""
+        return self.printed.to_dict()
+
+
+# Card state folded into the game's Zobrist hash (counters are handled separately)
+_HASHED_FIELDS = frozenset(('zone', 'controller', 'tapped'))
+
+
+class HashedCard(Card):
+    """
+    A Card that reports every change to its zone, controller, tapped state and counters to its hasher
+
+    ZobristHash switches cards to this class when a game starts hashing, so games that never hash don't pay
+    for the extra work on every attribute write.
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        if name in _HASHED_FIELDS:
+            old = getattr(self, name)
+            if value != old:
+                self.hasher.update(self.id, name, old, value)
+        elif name == 'counters':
+            for counter, count in (*self.counters.items(), *value.items()):
+                self.hasher.value ^= self.hasher.counter_key(self.id, counter, count)
+        object.__setattr__(self, name, value)
+
+    def add_counters(self, counter_type: str, amount: int = 1):
+        old = self.counters.get(counter_type, 0)
+        new = max(0, old + amount)
+        self.hasher.value ^= (self.hasher.counter_key(self.id, counter_type, old)
+                              ^ self.hasher.counter_key(self.id, counter_type, new))
+        self.counters[counter_type] = new
+
+
+class CardRegistry:
+    """Process-wide store of PrintedCards keyed by card name"""
+    def __init__(self):
+        self._cards: dict[str, PrintedCard] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._cards
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def get(self, name: str):
+        return self._cards.get(name)
+
+    def intern(self, data: dict) -> PrintedCard:
+        """Returns the shared PrintedCard for data['name'], building it on first sight"""
+        printed = self._cards.get(data['name'])
+        if printed is None:
+            printed = self._cards[data['name']] = PrintedCard(data)
+        return printed
+
+    def new_card(self, data: dict) -> Card:
+        return Card(self.intern(data))
+
+    def clear(self):
+        self._cards.clear()
 
 
+CARD_REGISTRY = CardRegistry()
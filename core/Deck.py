@@ -1,26 +1,57 @@
 import json
+import struct
 from json import JSONEncoder
 from datetime import datetime
 from pathlib import Path
 
-from core.Card import Card
-from data.scyfall import fetch_card
+from core.Card import Card, CARD_REGISTRY
+from core.metrics import METRICS
+from data.deck_library import DeckLibrary
 
 DECK_DIR = Path(__file__).parent.parent / 'data' / 'decks'
 
-def parse_decklist(decklist_str):
-    deck_str = []
+# (format, deck_name) -> list of shared PrintedCards, parsed once per process
+_deck_cache = {}
+
+def parse_decklist(decklist_str, store: "CardStore" = None, resolver: "CardResolver" = None):
+    """
+    Builds a deck from lines of '<quantity> <card name>'
+
+    Each distinct name is looked up once in the local card store; names missing from it are resolved from
+    Scryfall concurrently in one batch and written back to the store. A store or resolver created here (because
+    none was passed) is closed before returning.
+    """
+    counts = {}
     for line in decklist_str.strip().split('\n'):
         if not line.strip():
             continue
-        quantity, card_name = line.split(' ', 1)
-        quantity = int(quantity)
-        deck_str.extend([card_name] * quantity)
-
-        deck = []
-        for card in deck_str:
-            card_data = fetch_card(card)
-            deck.append(Card(card_data))
+        quantity, card_name = line.strip().split(' ', 1)
+        counts[card_name] = counts.get(card_name, 0) + int(quantity)
+
+    # Imported here so games, which only load saved decks, don't pay for sqlite3, asyncio and requests
+    from data.card_store import CardStore
+    from data.scyfall import CardResolver
+
+    created = []
+    if resolver is None:
+        if store is None:
+            store = CardStore()
+            created.append(store)
+        resolver = CardResolver(store=store)
+        created.append(resolver)
+    try:
+        resolved = resolver.resolve_many(counts)
+    finally:
+        for owned in reversed(created):
+            owned.close()
+    unknown = [name for name, card_data in resolved.items() if card_data is None]
+    if unknown:
+        raise ValueError(f"Unknown card names in decklist: {', '.join(unknown)}")
+
+    deck = []
+    for card_name, quantity in counts.items():
+        printed = CARD_REGISTRY.intern(resolved[card_name])
+        deck.extend(Card(printed) for _ in range(quantity))
 
     return deck
 
@@ -49,7 +80,7 @@ def save_deck(deck, deck_name, format:str):
         with open(path, 'w', encoding='utf-8') as f:
             json.dump(deck_data, f, indent=2, ensure_ascii=False)
 
-        print(f"Successfully saved deck '{deck_name}' with {len(deck)} cards")
+        METRICS.count('decks_saved')
         return True
 
     except Exception as e:
@@ -58,7 +89,26 @@ def save_deck(deck, deck_name, format:str):
 
 
 def load_deck(deck_name, format:str):
-    """Loads deck from project/decks/ and reconstructs Card objects"""
+    """Loads deck from project/decks/ and returns fresh Card objects backed by the shared card registry"""
+    key = (format, deck_name)
+    if key not in _deck_cache:
+        _deck_cache[key] = _library_deck(deck_name, format) or _parse_deck_file(deck_name, format)
+    return [Card(printed) for printed in _deck_cache[key]]
+
+
+def _library_deck(deck_name, format:str):
+    """The deck from the format's binary deck library (see data.deck_library), or None if it isn't there"""
+    if not (DECK_DIR / format).is_dir():
+        return None
+    try:
+        library = DeckLibrary.for_format(format, DECK_DIR)
+        return library.load(deck_name) if deck_name in library else None
+    except (OSError, struct.error, ValueError):
+        # Not built (or out of date, or torn): the JSON deck is still there
+        return None
+
+
+def _parse_deck_file(deck_name, format:str):
     try:
         path = DECK_DIR / format / f'{deck_name}.json'
 
@@ -72,25 +122,8 @@ def load_deck(deck_name, format:str):
             if 'cards' not in data:
                 raise ValueError("Invalid deck format: missing 'cards' key")
 
-            # Reconstruct the deck
-            deck = []
-            for card_data in data['cards']:
-                if 'faces' in card_data:
-                    for face_name, face_data in card_data['faces'].items():
-                        combined_data = {
-                            **card_data,
-                            **face_data,
-                            'face_name': face_name,
-                        }
-                        deck.append(Card(combined_data))
-                else:
-                    deck.append(Card(card_data))
-
-            print(f"Successfully loaded deck '{deck_name}' with {len(deck)} cards")
-            if 'metadata' in data:
-                print(f"Originally created: {data['metadata'].get('created', 'unknown')}")
-
-            return deck
+            # One entry per card; a multi-faced card keeps all its faces on a single PrintedCard
+            return [CARD_REGISTRY.intern(card_data) for card_data in data['cards']]
     except json.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON in deck file: {str(e)}")
     except Exception as e:
@@ -99,11 +132,7 @@ def load_deck(deck_name, format:str):
 
 class CardEncoder(JSONEncoder):
     def default(self, obj):
-        if hasattr(obj, '__dict__'):
-            # Handle Card and Face objects
-            d = obj.__dict__.copy()
-            # Convert any nested Face objects to dicts
-            if 'faces' in d:
-                d['faces'] = [face.__dict__ for face in d['faces']]
-            return d
+        # Card, PrintedCard and Face are slotted, so they serialize through to_dict() (the format save_deck writes)
+        if hasattr(obj, 'to_dict'):
+            return obj.to_dict()
         return super().default(obj)
\ No newline at end of file
@@ -1,21 +1,609 @@
+import contextlib
+import io
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
 import unittest
+from math import comb
+from pathlib import Path
 from unittest.mock import patch
 
-from core.game import Game
+import numpy as np
+
+from core.archetypes import ArchetypeClassifier, load_format_meta
+from core.Card import Card, PrintedCard
+from core.decisions import DecisionBroker, DecisionModel, PlayDrawDecision, RuleModel, run_inline
+from core.decisions.broker import DECISION_CONTEXT, MULLIGAN, PLAY_DRAW, context_index, decision_row
+from core.deck_analysis import _sample_tops, analyze_deck, deck_hash, keep_odds, land_count_distribution
+from core.Deck import CardEncoder, load_deck
+from core.features import card_features, feature_index, feature_names, sum_features
+from core.game import MAX_MULLIGANS, Game
+from core.mana import COLOR_BIT, PHYREXIAN_LIFE, AvailableMana, can_pay, card_cost, castable, max_x, parse_cost, pay
+from core.mcts import run_search
+from core.metrics import METRICS
+from core.replay import ActionLog, ReplayMismatch, replay
 from core.player import Player, PlayerType
+from core.simulate import play_batch
+from core.triggers import EffectType, TriggeredAbility, TriggerScope, TriggerType
+from core.zones import Library
+from data.historical_repository import HistoricalRepository
+from rules.Keywords import Keyword, compile_condition
 
 
 class TestGameInitialization(unittest.TestCase):
     def setUp(self):
         self.game = Game(player1_type=PlayerType.HUMAN, player2_type=PlayerType.AI)
 
-    @patch('builtins.input', return_value='w')
+    @patch('builtins.input')
     def test_start_game_initializes_correctly(self, mock_input):
         """Test that starting the game sets up the correct initial state"""
+        # The human picks a deck, keeps their hand and, if they win the toss, chooses to play
+        mock_input.side_effect = lambda prompt: (
+            'w' if prompt.startswith('Choose your deck') else 'p' if '(p)lay or (d)raw' in prompt else 'k')
+
         # Act - Start the game
         self.game.start_game()
 
-        mock_input.assert_called_once_with('Choose your deck color (wubrg): ')
+        prompts = [call.args[0] for call in mock_input.call_args_list]
+        self.assertEqual(prompts[0], 'Choose your deck color (wubrg): ')
+        self.assertTrue(any(prompt.startswith('Player 1, choose to (k)eep or (m)ulligan this hand:')
+                            for prompt in prompts))
+        self.assertEqual(self.game.players[0].deck_name, 'sparky_white')
+        self.assertEqual(len(self.game.players[0].hand), 7)
+
+
+class TestCardEncoder(unittest.TestCase):
+    def test_encodes_slotted_cards_like_save_deck(self):
+        deck = load_deck('sparky_white', 'sparky')
+        encoded = json.loads(json.dumps({'cards': deck[:2], 'face': deck[0].printed.faces['Face1']}, cls=CardEncoder))
+        self.assertEqual(encoded['cards'], [card.to_dict() for card in deck[:2]])
+        self.assertEqual(encoded['face']['name'], deck[0].name)
+
+
+class TestImports(unittest.TestCase):
+    def test_game_import_skips_network_and_tooling_modules(self):
+        heavy = ('pandas', 'requests', 'asyncio', 'sqlite3', 'concurrent.futures.process')
+        code = f"import sys, core.game; print(*[m for m in {heavy!r} if m in sys.modules])"
+        loaded = subprocess.run([sys.executable, '-c', code], cwd=Path(__file__).parent.parent, capture_output=True,
+                                text=True, check=True).stdout
+        self.assertEqual(loaded.split(), [])
+
+
+class TestEventDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI)
+        self.active, self.other = self.game.players
+        self.game.active_player = self.active
+
+    def _register(self, scope, controller):
+        ability = TriggeredAbility(TriggerType.CREATURE_DIES, scope, EffectType.DRAW_CARD, {})
+        self.game.events.register(ability, controller)
+        return ability
+
+    def test_scope_matching_and_apnap_order(self):
+        other_any = self._register(TriggerScope.ANY_PLAYER, self.other)
+        active_you = self._register(TriggerScope.YOU_CONTROLLED, self.active)
+        active_opp = self._register(TriggerScope.OPPONENT_CONTROLLED, self.active)
+        self._register(TriggerScope.YOU_CONTROLLED, self.other)
+
+        self.game.queue_event("creature_dies", self.active, {})
+        self.game.queue_event("card_drawn", self.active, {})
+        triggered = [ability for ability, _ in self.game.events.drain(self.game)]
+
+        self.assertEqual(triggered, [active_you, other_any])
+        self.assertNotIn(active_opp, triggered)
+        self.assertEqual(self.game.event_queue, [])
+        self.assertEqual(self.game.events.stats()['events_dispatched'], 2)
+
+    def test_unregister_drops_empty_buckets(self):
+        events = self.game.events
+        ability = TriggeredAbility(TriggerType.CREATURE_DIES, TriggerScope.YOU_CONTROLLED, EffectType.DRAW_CARD, {})
+        events.unregister(ability)
+        self.assertFalse(events.listening(TriggerType.CREATURE_DIES))
+
+        events.register(ability, self.active)
+        self.assertTrue(events.listening(TriggerType.CREATURE_DIES))
+        events.unregister(ability)
+        self.assertFalse(events.listening(TriggerType.CREATURE_DIES))
+        self.assertEqual(events.listeners(TriggerType.CREATURE_DIES, self.active), [])
+
+
+class TestArchetypes(unittest.TestCase):
+    DECKS = {
+        'aggro': {'key_cards': ['Goblin', 'Shared Key'], 'secondary_cards': ['Shock'], 'meta_percent': 0.3},
+        'control': {'key_cards': ['Counterspell', 'Shared Key'], 'secondary_cards': ['Shock', 'Island'],
+                    'meta_percent': 0.5},
+    }
+
+    def test_scores_come_from_the_index(self):
+        classifier = ArchetypeClassifier(self.DECKS)
+        self.assertEqual(sorted(classifier.postings['Shock']), [(0, 0.4, False), (1, 0.4, False)])
+        self.assertEqual(classifier.most_played, 'control')
+
+        tracker = classifier.new_tracker()
+        tracker.reveal('Island')
+        tracker.reveal('Shock')
+        self.assertIsNone(tracker.best_guess())  # 0.8, but no key card yet
+        tracker.reveal('Goblin')
+        tracker.reveal('Goblin')
+        self.assertEqual(tracker.scores, [1.0, 0.8])
+        self.assertEqual(tracker.best_guess(), 'aggro')
+        tracker.reveal('Counterspell')
+        self.assertEqual(tracker.best_guess(), 'control')
+
+    def test_ambiguous_and_unknown_cards(self):
+        classifier = ArchetypeClassifier(self.DECKS)
+        tracker = classifier.new_tracker()
+        tracker.reveal('Black Lotus')
+        self.assertIsNone(tracker.best_guess())
+        tracker.reveal('Shared Key')
+        self.assertEqual(tracker.best_guess(), 'aggro')
+
+        # A tie goes to the deck listed first, whatever order its cards were seen in
+        tracker = classifier.new_tracker()
+        tracker.reveal('Counterspell')
+        tracker.reveal('Goblin')
+        self.assertEqual(tracker.best_guess(), 'aggro')
+
+        empty = ArchetypeClassifier({})
+        self.assertIsNone(empty.most_played)
+        tracker = empty.new_tracker()
+        tracker.reveal('Goblin')
+        self.assertIsNone(tracker.best_guess())
+
+    def test_format_caches_follow_the_file(self):
+        with tempfile.TemporaryDirectory() as tmp, patch('core.archetypes.DECK_DIR', Path(tmp)), \
+                patch.dict('core.archetypes._format_meta', clear=True), \
+                patch.dict('core.archetypes._classifiers', clear=True):
+            self.assertEqual(load_format_meta('test'), {})
+            (Path(tmp) / 'test').mkdir()
+            path = Path(tmp) / 'test' / 'deck_archetypes.json'
+            path.write_text(json.dumps({'aggro': self.DECKS['aggro']}), encoding='utf-8')
+            classifier = ArchetypeClassifier.for_format('test')
+            self.assertEqual(classifier.deck_names, ['aggro'])
+            self.assertIs(ArchetypeClassifier.for_format('test'), classifier)
+
+            path.write_text(json.dumps(self.DECKS), encoding='utf-8')
+            os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+            self.assertEqual(ArchetypeClassifier.for_format('test').deck_names, ['aggro', 'control'])
+
+
+class TestKeywords(unittest.TestCase):
+    class _Permanent:
+        def __init__(self, *types, tapped=False):
+            self.types = types
+            self.tapped = tapped
+
+        def has_type(self, card_type):
+            return card_type in self.types
+
+    def test_compile_condition_clauses(self):
+        creature, tapped_land = self._Permanent('creature'), self._Permanent('land', tapped=True)
+        self.assertTrue(compile_condition(None)({}))
+        self.assertTrue(compile_condition('target.is_creature')({'target': creature}))
+        self.assertFalse(compile_condition('target.is_creature')({'target': tapped_land}))
+        self.assertTrue(compile_condition('not target.is_creature')({'target': tapped_land}))
+
+        both = compile_condition('source.is_tapped and not target.is_land')
+        self.assertTrue(both({'source': tapped_land, 'target': creature}))
+        self.assertFalse(both({'source': creature, 'target': creature}))
+        self.assertFalse(both({'source': tapped_land, 'target': tapped_land}))
+
+    def test_unknown_predicate_is_rejected(self):
+        with self.assertRaises(ValueError):
+            compile_condition('target.is_flying')
+
+    def test_abilities_only_reach_events_from_their_card(self):
+        game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI)
+        active, other = game.players
+        game.active_player = active
+        deathtouch = Keyword('Deathtouch', {'zone': ['battlefield'], 'triggers': [
+            {'event': 'damage_dealt', 'condition': 'target.is_creature', 'effect': 'destroy_target'}]})
+        mine, theirs, blocker = self._Permanent('creature'), self._Permanent('creature'), self._Permanent('creature')
+        ability, = deathtouch.abilities(mine)
+        self.assertIs(ability.scope, TriggerScope.SOURCE)
+        game.events.register(ability, active)
+        game.events.register(deathtouch.abilities(theirs)[0], other)
+
+        self.assertEqual(game.events.listeners(TriggerType.DAMAGE_DEALT, active, mine), [ability])
+        self.assertEqual(game.events.listeners(TriggerType.DAMAGE_DEALT, active), [])
+
+        game.queue_event("damage_dealt", active, {'source': mine, 'target': blocker, 'amount': 2})
+        game.queue_event("damage_dealt", active, {'source': mine, 'target': other, 'amount': 2})
+        self.assertEqual([a for a, _ in game.events.drain(game)], [ability])
+
+        game.events.unregister(ability)
+        self.assertEqual(game.events.listeners(TriggerType.DAMAGE_DEALT, active, mine), [])
+
+
+class TestFeatures(unittest.TestCase):
+    def test_known_card_vectors(self):
+        angel = PrintedCard({'name': 'Test Angel', 'layout': 'normal', 'cmc': 5.0, 'colors': ['W'],
+                             'color_identity': ['W'], 'mana_cost': '{3}{W}{W}', 'type_line': 'Creature — Angel',
+                             'oracle_text': 'Flying, deathtouch (Any amount of damage this deals to a creature is '
+                                            'enough to destroy it.)'})
+        expected = dict.fromkeys(feature_names(), 0)
+        expected.update(cards=1, is_creature=1, cmc=5, white=1, kw_deathtouch=1)
+        self.assertEqual(dict(zip(feature_names(), card_features(angel).tolist())), expected)
+
+        forest = PrintedCard({'name': 'Test Forest', 'layout': 'normal', 'cmc': 0.0, 'color_identity': ['G'],
+                              'mana_cost': '', 'type_line': 'Basic Land — Forest', 'oracle_text': '({T}: Add {G}.)'})
+        counts = sum_features([Card(angel), Card(forest), Card(forest)])
+        self.assertEqual([counts[feature_index(name)] for name in ('cards', 'is_land', 'produces_mana', 'cmc')],
+                         [3, 2, 2, 5])
+
+    def test_ai_decisions_get_the_documented_columns(self):
+        game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.begin_opening()
+        decider = game.players[game.decision_point[1]]
+        with patch('core.game.PlayDrawDecision.ai_decision', return_value='p') as play_draw:
+            request = game.pending_request()
+            request.decide()
+        self.assertEqual(play_draw.call_args.kwargs['deck_features'].tolist(), sum_features(decider.library).tolist())
+        self.assertEqual(decider.deck_features[feature_index('cards')], 60)
+        self.assertEqual(len(request.features), len(feature_names()) + len(DECISION_CONTEXT[PLAY_DRAW]))
+        game.apply_decision('p')
+
+        decider = game.players[game.decision_point[1]]
+        with patch('core.game.MulliganDecision.ai_decision', return_value='k') as mulligan:
+            request = game.pending_request()
+            request.decide()
+        hand_features, n_mull = mulligan.call_args.args
+        self.assertEqual(hand_features.tolist(), sum_features(decider.hand).tolist())
+        self.assertEqual(hand_features[feature_index('is_land')], sum(card.has_type('land') for card in decider.hand))
+        self.assertEqual(n_mull, 0)
+        self.assertEqual(request.features[:len(feature_names())].tolist(), hand_features.tolist())
+        self.assertEqual(request.features[context_index(MULLIGAN, 'n_mull')], 0)
+
+
+class TestDeckAnalysis(unittest.TestCase):
+    def test_keep_odds_matches_counting(self):
+        # 60 cards, 24 lands: after a 7-card hand, 2 draws from the other 53 cards by turn 3 on the play
+        odds = keep_odds(60, 24)
+        self.assertEqual(odds[0], 0.0)
+        self.assertAlmostEqual(odds[1], comb(23, 2) / comb(53, 2))
+        self.assertAlmostEqual(odds[2], 1 - comb(31, 2) / comb(53, 2))
+        self.assertEqual(odds[3], 1.0)
+        self.assertEqual(odds[6:], (0.0, 0.0))  # fewer than two spells
+        self.assertAlmostEqual(sum(land_count_distribution(60, 24)), 1.0)
+
+    def test_keep_odds_agrees_with_sampled_hands(self):
+        tops = _sample_tops(np.random.default_rng(0), 200_000, 60, 9)
+        is_land = tops < 24
+        hand_lands = is_land[:, :7].sum(axis=1)
+        hit = is_land.sum(axis=1) >= 3
+        for k, exact in enumerate(keep_odds(60, 24)[:6]):
+            self.assertAlmostEqual(hit[hand_lands == k].mean(), exact, delta=0.01)
+
+    def test_results_are_cached_per_deck_and_parameters(self):
+        deck = load_deck('sparky_white', 'sparky')
+        self.assertNotEqual(deck_hash(deck), deck_hash(deck[:-1]))
+        self.assertEqual(deck_hash(deck), deck_hash(deck[::-1]))
+
+        small = analyze_deck(deck, n_samples=1000, use_disk_cache=False)
+        self.assertIs(analyze_deck(deck, n_samples=1000, use_disk_cache=False), small)
+        self.assertIsNot(analyze_deck(deck, n_samples=2000, use_disk_cache=False), small)
+        self.assertIsNot(analyze_deck(deck, n_samples=1000, seed=1, use_disk_cache=False), small)
+
+
+class TestDecisionBroker(unittest.TestCase):
+    def test_batched_games_match_rule_decisions(self):
+        games = [Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=i) for i in range(10)]
+        inline = [Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=i) for i in range(10)]
+        broker = DecisionBroker(RuleModel(), batch_size=4)
+        with contextlib.redirect_stdout(io.StringIO()):
+            broker.run(game.start_game_steps() for game in games)
+            for game in inline:
+                run_inline(game.start_game_steps())
+
+        self.assertEqual([game.action_log for game in games], [game.action_log for game in inline])
+        self.assertIn('p', [game.action_log[0] for game in games])
+
+        stats = broker.stats()
+        # One play/draw decision and at least one mulligan decision per player
+        self.assertGreaterEqual(stats['decisions'], 30)
+        self.assertLess(stats['batches'], stats['decisions'])
+        for game in games:
+            self.assertEqual(len(game.first_player.hand) + len(game.first_player.library), 60)
+
+        row = decision_row(sum_features(games[0].players[0].hand), 0, 0.2)
+        self.assertEqual(RuleModel().predict(MULLIGAN, row[None, :])[0], 'm')
+
+    def test_inline_rules_match_the_rule_model(self):
+        model = RuleModel()
+        for _ in range(10):
+            steps = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI).start_game_steps()
+            with contextlib.redirect_stdout(io.StringIO()):
+                request = next(steps)
+                while True:
+                    action = request.decide()
+                    self.assertEqual(model.predict(request.kind, request.features[None, :])[0], action)
+                    try:
+                        request = steps.send(action)
+                    except StopIteration:
+                        break
+
+    def test_illegal_actions_are_rejected(self):
+        game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.begin_opening()
+        with self.assertRaises(ValueError):
+            game.apply_decision('k')
+        game.apply_decision('p')
+        game.decision_point = (MULLIGAN, game.decision_point[1], MAX_MULLIGANS)
+        with self.assertRaises(ValueError):
+            game.apply_decision('m')
+        self.assertEqual(game.action_log, ['p'])
+
+    def test_decision_model_is_abstract(self):
+        with self.assertRaises(TypeError):
+            DecisionModel()
+
+
+class TestRecordedWinRates(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_simulated_results_reach_the_play_draw_decision(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            tally, _, _ = play_batch(4, 0)
+        HistoricalRepository(self.tmp.name).merge_results(tally)
+
+        game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=0)
+        game.historical = HistoricalRepository(self.tmp.name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.begin_opening()
+        for player in game.players:
+            recorded = [games for (deck, opponent, _), (_, games) in tally.items()
+                        if deck == player.deck_name and opponent is None]
+            state = game._get_play_draw_state(player)
+            self.assertEqual(state["historical_win_rates"]["samples"], sum(recorded))
+
+    def test_recorded_game_result_round_trips(self):
+        game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=0)
+        game.historical = HistoricalRepository(self.tmp.name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.begin_opening()
+        player = game.current_player = game.first_player = game.players[0]
+        game.record_game_result(winner=player)
+        game.historical.flush()
+
+        game.historical = HistoricalRepository(self.tmp.name)
+        state = game._get_play_draw_state(player)
+        self.assertEqual(state["historical_win_rates"]["play_win_rate"], 1.0)
+        self.assertEqual(PlayDrawDecision.ai_decision(state, deck_features=player.deck_features), 'p')
+
+        game.match_game_number = 2
+        game.suspected_archetypes[player] = game.players[1].deck_name
+        self.assertEqual(game._get_play_draw_state(player)["historical_win_rates"]["samples"], 1)
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_restore_replays_the_same_game(self):
+        game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=3)
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.start_game()
+        for _ in range(4):
+            game.take_turn()
+        snapshot = game.snapshot()
+
+        winner = game.play_game()
+        final = game.snapshot()
+        game.restore(snapshot)
+        self.assertEqual(game.snapshot(), snapshot)
+        self.assertIs(game.play_game(), winner)
+        self.assertEqual(game.snapshot(), final)
+
+        clone = Game.from_snapshot(pickle.loads(pickle.dumps(snapshot)))
+        self.assertEqual(clone.snapshot(), snapshot)
+
+    def test_restore_only_rewrites_what_changed(self):
+        game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=5)
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.start_game()
+        game.state_hash
+        earlier = game.snapshot()
+        self.assertEqual(game.zones.changed_cards, set())
+        for _ in range(3):
+            game.take_turn()
+        self.assertLess(len(game.zones.changed_cards), len(game.cards) // 2)
+        later = game.snapshot()
+
+        # Back to the base snapshot, then across to another one
+        game.restore(earlier)
+        self.assertEqual(game.snapshot(), earlier)
+        game.restore(later)
+        self.assertEqual(game.snapshot(), later)
+        self.assertEqual(game.zobrist.value, game.zobrist.recompute(game.cards))
+
+
+class TestZones(unittest.TestCase):
+    def assertIndexesMatchBattlefield(self, game):
+        for player in game.players:
+            controlled = [card for card in game.battlefield if card.controller is player]
+            self.assertEqual(set(game.zones.permanents(player)), set(controlled))
+            for card_type in ('creature', 'land'):
+                for tapped in (False, True):
+                    expected = {card for card in controlled if card.has_type(card_type) and card.tapped == tapped}
+                    self.assertEqual(set(game.zones.permanents(player, card_type, tapped)), expected)
+
+    def test_indexes_follow_moves_taps_and_restores(self):
+        game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=3)
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.start_game()
+        snapshot = game.snapshot()
+        for _ in range(6):
+            game.take_turn()
+            self.assertIndexesMatchBattlefield(game)
+        game.restore(snapshot)
+        self.assertIndexesMatchBattlefield(game)
+        for _ in range(6):
+            game.take_turn()
+
+        ability = TriggeredAbility(TriggerType.ZONE_CHANGE, TriggerScope.ANY_PLAYER, EffectType.DRAW_CARD, {})
+        game.events.register(ability, game.players[0])
+        creature = next(card for card in game.battlefield if card.has_type('creature'))
+        owner = game.zones.owner(creature)
+        game.destroy(creature)
+        self.assertEqual(game.event_queue[0][2], {'card': creature, 'from': 'battlefield', 'to': 'graveyard'})
+        self.assertIn(creature, owner.graveyard)
+        self.assertEqual((creature.zone, creature.controller), ('graveyard', None))
+        self.assertIndexesMatchBattlefield(game)
+
+    def test_library_remove_missing_card(self):
+        library = Library(['a', 'b', 'c'])
+        library.remove('b')
+        self.assertEqual(list(library), ['a', 'c'])
+        with self.assertRaises(ValueError):
+            library.remove('b')
+        library.remove('a')
+        library.remove('c')
+        with self.assertRaises(ValueError):
+            library.remove('a')
+
+
+class TestZobristHash(unittest.TestCase):
+    def test_incremental_hash_matches_recomputed(self):
+        game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.start_game()
+        start_hash = game.state_hash
+        snapshot = game.snapshot()
+
+        for _ in range(4):
+            game.take_turn()
+            self.assertEqual(game.zobrist.value, game.zobrist.recompute(game.cards))
+        self.assertNotEqual(game.state_hash, start_hash)
+
+        card = game.cards[0]
+        before = game.state_hash
+        game.add_counters(card, '+1/+1', 2)
+        self.assertNotEqual(game.state_hash, before)
+        game.add_counters(card, '+1/+1', -2)
+        self.assertEqual(game.state_hash, before)
+
+        game.restore(snapshot)
+        self.assertEqual(game.state_hash, start_hash)
+
+
+class TestReplay(unittest.TestCase):
+    def test_logged_game_replays_exactly(self):
+        game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=11)
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.start_game()
+        winner = game.play_game()
+        log = ActionLog.from_bytes(ActionLog.from_game(game, winner).to_bytes())
+
+        replayed = replay(log)
+        self.assertEqual(replayed.action_log, game.action_log)
+        self.assertEqual(replayed.state_hash, game.state_hash)
+
+        log.state_hash ^= 1
+        with self.assertRaises(ReplayMismatch):
+            replay(log)
+
+    def _log(self, seed, game_format='sparky'):
+        return ActionLog(seed, game_format, (PlayerType.AI, PlayerType.AI), ('sparky_red', 'é' * 200),
+                         ('p', 'k', 'k'), None, 9, 1 << 63)
+
+    def test_long_names_round_trip(self):
+        log = ActionLog.from_bytes(self._log(2 ** 64 - 1, 'f' * 300).to_bytes())
+        self.assertEqual((log.seed, log.game_format), (2 ** 64 - 1, 'f' * 300))
+        self.assertEqual(log.deck_names, ('sparky_red', 'é' * 200))
+        with self.assertRaises(ValueError):
+            self._log(0, 'f' * 0x10000).to_bytes()
+
+    def test_seeds_outside_64_bits_are_rejected(self):
+        for seed in (-1, 2 ** 64):
+            with self.assertRaises(ValueError):
+                self._log(seed).to_bytes()
+
+
+class TestMetrics(unittest.TestCase):
+    def tearDown(self):
+        METRICS.disable()
+        METRICS.reset()
+
+    def test_counts_draws_by_step_only_when_enabled(self):
+        Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=4).start_game()
+        self.assertEqual(METRICS.counters, {})
+
+        METRICS.enable()
+        game = Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, seed=4)
+        game.start_game()
+        game.play_game()
+
+        drawn = sum(len(player.hand) + len(player.graveyard) for player in game.players) + len(game.battlefield)
+        counted = {dict(labels)['step']: value for (name, labels), value in METRICS.counters.items()
+                   if name == 'cards_drawn'}
+        self.assertNotIn('m', game.action_log)  # no mulligans, so every drawn card is still out of the library
+        self.assertEqual(counted['Untap'], 14)
+        self.assertEqual(sum(counted.values()), drawn)
+        self.assertIn('mtg_shuffle_seconds_count{phase="Beginning",step="Untap"} ', METRICS.to_prometheus())
+
+
+class TestMana(unittest.TestCase):
+    def test_hybrid_phyrexian_and_dual_sources(self):
+        cost = parse_cost('{1}{W/U}{G/P}{X}')
+        self.assertEqual((cost.mana_value, cost.x, len(cost.variants)), (3, 1, 2))
+
+        W, U, G = COLOR_BIT['W'], COLOR_BIT['U'], COLOR_BIT['G']
+        mana = AvailableMana(sources=[('plains', W), ('tundra', W | U), ('island', U)])
+        self.assertFalse(can_pay(cost, mana))
+        self.assertTrue(can_pay(cost, mana, life=PHYREXIAN_LIFE))
+        self.assertEqual(max_x(cost, mana, life=PHYREXIAN_LIFE), 1)
+
+        payment = pay(cost, mana, life=PHYREXIAN_LIFE)
+        self.assertEqual((set(payment.sources), payment.life), ({'plains', 'island'}, PHYREXIAN_LIFE))
+        self.assertIsNone(pay(parse_cost('{W}{W}{U}{U}'), mana))
+
+        mana = AvailableMana(pool=[0, 0, 0, 0, 1, 0], sources=[('tundra', W | U), ('plains', W)])
+        payment = pay(parse_cost('{W}{U}{G}'), mana)
+        self.assertEqual(set(payment.sources), {'plains', 'tundra'})
+        self.assertEqual(payment.pool, (0, 0, 0, 0, 1, 0))
+        mana.spend(payment)
+        self.assertEqual(len(mana), 0)
+
+    def test_unknown_symbols_make_cards_uncastable_in_game_paths(self):
+        with self.assertRaises(ValueError):
+            parse_cost('{W/Q}')
+
+        printed = PrintedCard({'name': 'Odd Costed Bear', 'layout': 'normal', 'cmc': 2.0, 'color_identity': ['W'],
+                               'mana_cost': '{1}{W/Q}', 'type_line': 'Creature — Bear', 'oracle_text': ''})
+        cost = card_cost(printed)
+        mana = AvailableMana(sources=[('plains', COLOR_BIT['W'])] * 5)
+        self.assertFalse(can_pay(cost, mana))
+        self.assertIsNone(max_x(cost, mana))
+        self.assertIsNone(pay(cost, mana))
+        self.assertEqual(castable([Card(printed)], mana).tolist(), [False])
+
+
+class TestMonteCarloTreeSearch(unittest.TestCase):
+    def test_search_leaves_game_untouched(self):
+        game = Game(player1_type=PlayerType.MCTS, player2_type=PlayerType.AI, seed=5)
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.setup()
+            game.load_decks()
+        game.decision_point = (MULLIGAN, 0, 0)
+        game.draw_starting_hands()
+        before = game.snapshot()
+
+        stats, rollouts = run_search(game, budget_s=0.02, seed=0)
+        self.assertEqual(set(stats), set(game.legal_actions()))
+        self.assertEqual(sum(visits for visits, _ in stats.values()), rollouts)
+        self.assertEqual(game.snapshot(), before)
+
+    def test_search_needs_a_pending_decision(self):
+        game = Game(player1_type=PlayerType.MCTS, player2_type=PlayerType.AI, seed=5)
+        with self.assertRaises(ValueError):
+            run_search(game, budget_s=0.02, seed=0)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,106 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DECK_DIR = Path(__file__).parent.parent / 'data' / 'decks'
+
+KEY_CARD_WEIGHT = 0.6
+SECONDARY_CARD_WEIGHT = 0.4
+# A deck is only a candidate once a key card has been seen, and is only guessed above this confidence
+CONFIDENCE_THRESHOLD = 0.5
+
+# format -> (mtime of deck_archetypes.json or None if missing, its contents)
+_format_meta: Dict[str, Tuple[Optional[int], dict]] = {}
+_classifiers: Dict[str, "ArchetypeClassifier"] = {}
+
+
+def load_format_meta(game_format: str) -> dict:
+    """deck_archetypes.json for game_format ({} if the format has none), re-read only when the file changes"""
+    path = DECK_DIR / game_format / 'deck_archetypes.json'
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    cached = _format_meta.get(game_format)
+    if cached is None or cached[0] != mtime:
+        meta = {}
+        if mtime is not None:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON in archetypes file: {str(e)}")
+        cached = _format_meta[game_format] = (mtime, meta)
+    return cached[1]
+
+
+class ArchetypeClassifier:
+    """Inverted index from card name to the meta decks it points at, built once per format"""
+    def __init__(self, format_decks: dict):
+        self.deck_names: List[str] = list(format_decks)
+        self.decks = format_decks
+        # card name -> [(deck index, weight, is key card)]
+        self.postings: Dict[str, List[Tuple[int, float, bool]]] = {}
+        for i, deck_data in enumerate(format_decks.values()):
+            for card_name in set(deck_data.get("key_cards", ())):
+                self.postings.setdefault(card_name, []).append((i, KEY_CARD_WEIGHT, True))
+            for card_name in set(deck_data.get("secondary_cards", ())):
+                self.postings.setdefault(card_name, []).append((i, SECONDARY_CARD_WEIGHT, False))
+
+        by_popularity = sorted(format_decks.items(), key=lambda x: _meta_share(x[1]), reverse=True)
+        self.most_played: Optional[str] = by_popularity[0][0] if by_popularity else None
+
+    @classmethod
+    def for_format(cls, game_format: str) -> "ArchetypeClassifier":
+        """The format's classifier, rebuilt when its deck_archetypes.json changes"""
+        format_decks = load_format_meta(game_format)
+        classifier = _classifiers.get(game_format)
+        if classifier is None or classifier.decks is not format_decks:
+            classifier = _classifiers[game_format] = cls(format_decks)
+        return classifier
+
+    def new_tracker(self) -> "ArchetypeTracker":
+        return ArchetypeTracker(self)
+
+
+class ArchetypeTracker:
+    """
+    One observer's running confidence in each meta deck, updated in O(postings) per revealed card
+
+    A deck scores KEY_CARD_WEIGHT per key card and SECONDARY_CARD_WEIGHT per secondary card seen, and is a
+    candidate once one of its key cards has been seen.
+    """
+    __slots__ = ('classifier', 'seen', 'scores', 'key_matches', 'best')
+
+    def __init__(self, classifier: ArchetypeClassifier):
+        self.classifier = classifier
+        self.seen = set()
+        self.scores = [0.0] * len(classifier.deck_names)
+        self.key_matches = [0] * len(classifier.deck_names)
+        self.best: Optional[int] = None
+
+    def reveal(self, card_name: str) -> None:
+        if card_name in self.seen:
+            return
+        self.seen.add(card_name)
+
+        for deck, weight, is_key in self.classifier.postings.get(card_name, ()):
+            self.scores[deck] += weight
+            if is_key:
+                self.key_matches[deck] += 1
+            if self.key_matches[deck] and (self.best is None or self._beats(deck, self.best)):
+                self.best = deck
+
+    def _beats(self, deck: int, best: int) -> bool:
+        # Ties go to the deck listed first, whichever order the cards were seen in
+        return self.scores[deck] > self.scores[best] or (self.scores[deck] == self.scores[best] and deck < best)
+
+    def best_guess(self) -> Optional[str]:
+        """Deck name of the most likely meta deck, or None if nothing is confident enough"""
+        if self.best is None or self.scores[self.best] <= CONFIDENCE_THRESHOLD:
+            return None
+        return self.classifier.deck_names[self.best]
+
+
+def _meta_share(deck_data: dict) -> float:
+    return deck_data.get("meta_percent", deck_data.get("meta_percentage", 0.0))
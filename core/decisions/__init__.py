@@ -1,2 +1,3 @@
 from .play_draw import PlayDrawDecision
-__all__ = ['PlayDrawDecision']  # Optional but good practice
\ No newline at end of file
+from .broker import DecisionBroker, DecisionModel, DecisionRequest, RuleModel, run_inline
+__all__ = ['PlayDrawDecision', 'DecisionBroker', 'DecisionModel', 'DecisionRequest', 'RuleModel', 'run_inline']  # Optional but good practice
\ No newline at end of file
@@ -0,0 +1,159 @@
+import abc
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Generator, Iterable, List, Sequence
+
+import numpy as np
+
+from core.decisions.mulligan import KEEP_THRESHOLD
+from core.features import feature_index, feature_names
+
+MULLIGAN = 'mulligan'
+PLAY_DRAW = 'play_draw'
+
+# Context columns appended after the card features in each kind's feature row
+DECISION_CONTEXT = {
+    MULLIGAN: ('n_mull', 'keep_odds'),
+    PLAY_DRAW: ('play_win_rate', 'draw_win_rate'),
+}
+
+# A game written as a generator: yields DecisionRequests, is sent back the chosen action, returns its result
+GameSteps = Generator["DecisionRequest", str, object]
+
+
+class DecisionRequest:
+    """
+    One pending AI decision
+
+    features is a float32 row: the card features (core.features) followed by DECISION_CONTEXT[kind].
+    decide answers the request on its own through the per-call ai_decision functions. Requests that are not
+    batchable (e.g. a search player's) are always answered through decide.
+    """
+    __slots__ = ('kind', 'features', 'decide', 'batchable')
+
+    def __init__(self, kind: str, features: np.ndarray, decide: Callable[[], str], batchable: bool = True):
+        self.kind = kind
+        self.features = features
+        self.decide = decide
+        self.batchable = batchable
+
+
+def decision_row(card_features, *context) -> np.ndarray:
+    return np.concatenate((np.asarray(card_features, dtype=np.float32), np.asarray(context, dtype=np.float32)))
+
+
+def context_index(kind: str, name: str) -> int:
+    return len(feature_names()) + DECISION_CONTEXT[kind].index(name)
+
+
+def run_inline(steps: GameSteps):
+    """Drives a generator game to completion, answering each request on its own"""
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(request.decide())
+    except StopIteration as stop:
+        return stop.value
+
+
+class DecisionModel(abc.ABC):
+    """Interface for models behind the broker: one matrix of feature rows in, one action per row out"""
+    @abc.abstractmethod
+    def predict(self, kind: str, features: np.ndarray) -> Sequence[str]:
+        ...
+
+
+class RuleModel(DecisionModel):
+    """
+    The if-rules of MulliganDecision/PlayDrawDecision.ai_decision, evaluated for a whole batch at once
+
+    Games run inline answer with those functions, so both paths make the same decisions.
+    """
+    def __init__(self, keep_threshold: float = KEEP_THRESHOLD):
+        self.keep_threshold = keep_threshold
+
+    def predict(self, kind: str, features: np.ndarray) -> Sequence[str]:
+        if kind == MULLIGAN:
+            keep = ((features[:, context_index(MULLIGAN, 'n_mull')] > 2)
+                    | (features[:, context_index(MULLIGAN, 'keep_odds')] >= self.keep_threshold))
+            return np.where(keep, 'k', 'm')
+
+        if kind == PLAY_DRAW:
+            play_rate = features[:, context_index(PLAY_DRAW, 'play_win_rate')]
+            draw_rate = features[:, context_index(PLAY_DRAW, 'draw_win_rate')]
+            n_spells = features[:, feature_index('cards')] - features[:, feature_index('is_land')]
+            average_cmc = features[:, feature_index('cmc')] / np.maximum(1, n_spells)
+            # Without win rates (NaN) low curves want the tempo of playing first
+            play = np.where(np.isnan(play_rate), average_cmc < 3.5, play_rate > draw_rate)
+            return np.where(play, 'p', 'd')
+
+        raise ValueError(f"Unknown decision kind '{kind}'")
+
+
+class DecisionBroker:
+    """
+    Runs many generator games at once and answers their decisions in batches
+
+    Up to batch_size games are in flight. Each runs until it yields a DecisionRequest; once every in-flight
+    game is waiting, the requests are stacked per kind into one matrix for model.predict and each game is
+    resumed with its action. Finished games are replaced from the queue of games still to start.
+    """
+    def __init__(self, model: DecisionModel, batch_size: int = 64):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.model = model
+        self.batch_size = batch_size
+        self.decisions = 0
+        self.batches = 0
+        self.model_seconds = 0.0
+
+    def run(self, games: Iterable[GameSteps]) -> List[object]:
+        """Plays every game and returns their results in input order"""
+        queued = iter(enumerate(games))
+        results: Dict[int, object] = {}
+        pending: Dict[str, list] = defaultdict(list)
+        in_flight = 0
+
+        def resume(index, steps, action):
+            try:
+                request = next(steps) if action is None else steps.send(action)
+                while not request.batchable:
+                    request = steps.send(request.decide())
+            except StopIteration as stop:
+                results[index] = stop.value
+                return False
+            pending[request.kind].append((index, steps, request))
+            return True
+
+        while True:
+            while in_flight < self.batch_size:
+                started = next(queued, None)
+                if started is None:
+                    break
+                in_flight += resume(*started, None)
+            if not in_flight:
+                break
+
+            batches, pending = pending, defaultdict(list)
+            for kind, batch in batches.items():
+                actions = self._predict(kind, np.stack([request.features for _, _, request in batch]))
+                for (index, steps, _), action in zip(batch, actions):
+                    in_flight -= not resume(index, steps, str(action))
+
+        return [results[i] for i in range(len(results))]
+
+    def _predict(self, kind: str, features: np.ndarray) -> Sequence[str]:
+        start = time.perf_counter()
+        actions = self.model.predict(kind, features)
+        self.model_seconds += time.perf_counter() - start
+        self.decisions += len(features)
+        self.batches += 1
+        return actions
+
+    def stats(self) -> dict:
+        return {
+            "decisions": self.decisions,
+            "batches": self.batches,
+            "mean_batch_size": self.decisions / self.batches if self.batches else 0.0,
+            "model_decisions_per_sec": self.decisions / self.model_seconds if self.model_seconds else 0.0,
+        }
@@ -1,4 +1,7 @@
-from random import random
+from core.features import feature_index
+
+# Minimum chance of hitting land drops for the AI to keep a hand
+KEEP_THRESHOLD = 0.6
 
 
 class MulliganDecision:
@@ -11,12 +14,22 @@ class MulliganDecision:
         return decision
 
     @staticmethod
-    def ai_decision(hand_state, ai_model=None):
-        if ai_model:
-            if hand_state['n_mull'] > 2:
-                return "k"
-            elif hand_state['n_lands'] > 2 & hand_state['n_lands'] < 6:
-                return "k"
-            else:
-                return "m"
-        return "k"
+    def ai_decision(hand_features, n_mull, keep_odds=None):
+        """
+        The AI's keep (k) or mulligan (m); RuleModel applies the same rules to a batch
+
+        Args:
+            hand_features: summed feature vector of the hand (core.features.sum_features)
+            n_mull: mulligans already taken
+            keep_odds: the deck's odds of hitting its land drops by opening land count
+                (core.deck_analysis.keep_odds); the fixed land-count rule is used without it
+        """
+        n_lands = hand_features[feature_index('is_land')]
+        if n_mull > 2:
+            return "k"
+        elif keep_odds is not None:
+            return "k" if keep_odds[n_lands] >= KEEP_THRESHOLD else "m"
+        elif 2 < n_lands < 6:
+            return "k"
+        else:
+            return "m"
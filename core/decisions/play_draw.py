@@ -1,4 +1,4 @@
-import random
+from core.features import feature_index
 
 
 class PlayDrawDecision:
@@ -8,11 +8,22 @@ class PlayDrawDecision:
         return decision
 
     @staticmethod
-    def ai_decision(game_state, ai_model=None):
-        if ai_model:
-            winrates = game_state["historical_win_rates"]
+    def ai_decision(game_state, deck_features=None):
+        """
+        The AI's play (p) or draw (d); RuleModel applies the same rules to a batch
 
-            if winrates["play_win_rate"] > winrates["draw_win_rate"]:
-                return "p"
-            return "d"
-        return "p" if random.random() > 0.6 else "d"
\ No newline at end of file
+        Args:
+            deck_features: summed feature vector of the deck (core.features.sum_features), used when there
+                are no historical win rates to go on
+        """
+        winrates = game_state["historical_win_rates"]
+
+        if winrates is None and deck_features is not None:
+            # Low curves want the tempo of playing first
+            n_spells = deck_features[feature_index('cards')] - deck_features[feature_index('is_land')]
+            average_cmc = deck_features[feature_index('cmc')] / max(1, n_spells)
+            return "p" if average_cmc < 3.5 else "d"
+
+        if winrates["play_win_rate"] > winrates["draw_win_rate"]:
+            return "p"
+        return "d"
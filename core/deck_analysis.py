@@ -0,0 +1,196 @@
+import argparse
+import hashlib
+import json
+from collections import Counter
+from functools import lru_cache
+from math import comb
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from core.Deck import DECK_DIR, load_deck
+
+ANALYSIS_CACHE_DIR = Path(__file__).parent.parent / 'data' / 'analysis_cache'
+# Part of every cache key: bump it whenever analyze_deck's results change, so older cached results are ignored
+ANALYSIS_VERSION = 1
+HAND_SIZE = 7
+CURVE_TURNS = (1, 2, 3, 4)
+# A hand needs this many spells to be worth keeping
+MIN_SPELLS_TO_KEEP = 2
+# Lands wanted on the battlefield by this turn (on the play) for a hand to count as hitting its drops
+LAND_DROP_TURN = 3
+
+_memory_cache: Dict[str, dict] = {}
+
+
+def deck_hash(deck) -> str:
+    """Content hash of a deck: how many copies of each card it has, so card order doesn't matter but counts do"""
+    counts = sorted(Counter(card.name for card in deck).items())
+    return hashlib.sha256('\n'.join(f'{n} {name}' for name, n in counts).encode('utf-8')).hexdigest()[:16]
+
+
+def hypergeom_pmf(k: int, population: int, successes: int, draws: int) -> float:
+    if k < 0 or k > successes or draws - k > population - successes or draws > population:
+        return 0.0
+    return comb(successes, k) * comb(population - successes, draws - k) / comb(population, draws)
+
+
+def hypergeom_at_least(k: int, population: int, successes: int, draws: int) -> float:
+    return sum(hypergeom_pmf(i, population, successes, draws) for i in range(max(k, 0), min(successes, draws) + 1))
+
+
+def land_count_distribution(deck_size: int, n_lands: int, hand_size: int = HAND_SIZE) -> List[float]:
+    """Exact P(k lands in the opening hand) for k = 0..hand_size"""
+    return [hypergeom_pmf(k, deck_size, n_lands, hand_size) for k in range(hand_size + 1)]
+
+
+def color_availability(deck, hand_size: int = HAND_SIZE) -> Dict[str, float]:
+    """Exact P(at least one land of each color in the opening hand)"""
+    sources: Dict[str, int] = {}
+    for card in deck:
+        if card.has_type('land'):
+            for color in card.color_id or ():
+                sources[color] = sources.get(color, 0) + 1
+    return {color: 1 - hypergeom_pmf(0, len(deck), n, hand_size) for color, n in sorted(sources.items())}
+
+
+@lru_cache(maxsize=None)
+def keep_odds(deck_size: int, n_lands: int, hand_size: int = HAND_SIZE) -> Tuple[float, ...]:
+    """
+    For each opening land count k, the exact chance of having LAND_DROP_TURN lands by that turn on the play
+
+    Hands with fewer than MIN_SPELLS_TO_KEEP spells score 0 however many lands they have. Cached, so the AI
+    can look a hand up in O(1) during games.
+    """
+    rest_size, cards_drawn = deck_size - hand_size, LAND_DROP_TURN - 1
+    odds = []
+    for k in range(hand_size + 1):
+        if hand_size - k < MIN_SPELLS_TO_KEEP or k > n_lands:
+            odds.append(0.0)
+            continue
+        odds.append(hypergeom_at_least(LAND_DROP_TURN - k, rest_size, n_lands - k, cards_drawn))
+    return tuple(odds)
+
+
+def on_curve_probabilities(deck, n_samples: int = 1_000_000, seed: int = 0,
+                           batch_size: int = 200_000) -> Dict[str, Dict[int, float]]:
+    """
+    Monte Carlo P(enough lands and a spell of exactly that cost to play on curve) for each turn in CURVE_TURNS
+
+    Colored costs are ignored; every land counts as one mana of any color.
+    """
+    rng = np.random.default_rng(seed)
+    is_land = np.array([card.has_type('land') for card in deck], dtype=bool)
+    cmc = np.array([0 if land else int(card.cmc) for card, land in zip(deck, is_land)], dtype=np.int8)
+    deck_size = len(deck)
+    max_seen = HAND_SIZE + max(CURVE_TURNS)
+    positions = np.arange(max_seen)
+
+    hits = {'play': {t: 0 for t in CURVE_TURNS}, 'draw': {t: 0 for t in CURVE_TURNS}}
+    done = 0
+    while done < n_samples:
+        n = min(batch_size, n_samples - done)
+        top = _sample_tops(rng, n, deck_size, max_seen)
+        lands = np.cumsum(is_land[top], axis=1)
+        costs = cmc[top]
+        for turn in CURVE_TURNS:
+            # Position of the first spell costing exactly `turn` (max_seen if none in the cards looked at)
+            first_spell = np.where(costs == turn, positions, max_seen).min(axis=1)
+            for side, seen in (('play', HAND_SIZE + turn - 1), ('draw', HAND_SIZE + turn)):
+                on_curve = (first_spell < seen) & (lands[:, seen - 1] >= turn)
+                hits[side][turn] += int(np.count_nonzero(on_curve))
+        done += n
+
+    return {side: {turn: count / n_samples for turn, count in by_turn.items()} for side, by_turn in hits.items()}
+
+
+def _sample_tops(rng, n: int, deck_size: int, depth: int) -> np.ndarray:
+    """Top `depth` card indexes of n shuffled decks, via a partial Fisher-Yates shuffle run on every row at once"""
+    cards = np.tile(np.arange(deck_size, dtype=np.int16), (n, 1))
+    rows = np.arange(n)
+    for i in range(depth):
+        j = rng.integers(i, deck_size, size=n)
+        picked = cards[rows, j]
+        cards[rows, j] = cards[:, i]
+        cards[:, i] = picked
+    return cards[:, :depth]
+
+
+def analyze_deck(deck, n_samples: int = 1_000_000, seed: int = 0, use_disk_cache: bool = True) -> dict:
+    """
+    Opening-hand statistics for a deck, cached in memory and on disk
+
+    Results are keyed by deck_hash, n_samples, seed and ANALYSIS_VERSION, so a different sample size or seed
+    is computed afresh and results cached by an older version of this code are never read.
+
+    Returns:
+        {
+            "hash": str,
+            "deck_size": int,
+            "n_lands": int,
+            "land_distribution": [P(k lands in opening hand) for k = 0..7],
+            "color_availability": {color: P(a land of that color in opening hand)},
+            "keep_odds": [see keep_odds(), indexed by opening land count],
+            "on_curve": {"play"|"draw": {turn: probability}}
+        }
+    """
+    deck_key = deck_hash(deck)
+    key = f'{deck_key}-n{n_samples}-s{seed}-v{ANALYSIS_VERSION}'
+    if key in _memory_cache:
+        return _memory_cache[key]
+
+    cache_path = ANALYSIS_CACHE_DIR / f'{key}.json'
+    if use_disk_cache and cache_path.exists():
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            analysis = json.load(f)
+        analysis['on_curve'] = {side: {int(t): p for t, p in by_turn.items()}
+                                for side, by_turn in analysis['on_curve'].items()}
+    else:
+        n_lands = sum(card.has_type('land') for card in deck)
+        analysis = {
+            'hash': deck_key,
+            'deck_size': len(deck),
+            'n_lands': n_lands,
+            'land_distribution': land_count_distribution(len(deck), n_lands),
+            'color_availability': color_availability(deck),
+            'keep_odds': list(keep_odds(len(deck), n_lands)),
+            'on_curve': on_curve_probabilities(deck, n_samples, seed),
+        }
+        if use_disk_cache:
+            ANALYSIS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(analysis, f, indent=2)
+
+    _memory_cache[key] = analysis
+    return analysis
+
+
+def analyze_format(game_format: str, n_samples: int = 1_000_000, seed: int = 0) -> Dict[str, dict]:
+    """analyze_deck for every deck file in data/decks/<game_format>"""
+    results = {}
+    for path in sorted((DECK_DIR / game_format).glob('*.json')):
+        if path.stem == 'deck_archetypes':
+            continue
+        results[path.stem] = analyze_deck(load_deck(path.stem, game_format), n_samples, seed)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Opening-hand statistics for every deck in a format")
+    parser.add_argument("--format", default="sparky")
+    parser.add_argument("--samples", type=int, default=1_000_000, help="Monte Carlo hands per deck")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for deck_name, analysis in analyze_format(args.format, args.samples, args.seed).items():
+        lands = ' '.join(f'{p:.3f}' for p in analysis['land_distribution'])
+        curve = ' '.join(f"T{t}:{p:.3f}" for t, p in analysis['on_curve']['play'].items())
+        print(f"{deck_name} ({analysis['n_lands']}/{analysis['deck_size']} lands)")
+        print(f"  lands in opening hand (0-7): {lands}")
+        print(f"  on curve, on the play: {curve}")
+        print(f"  colors: {analysis['color_availability']}")
+
+
+if __name__ == '__main__':
+    main()
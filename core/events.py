@@ -0,0 +1,121 @@
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from core.triggers import TriggeredAbility, TriggerScope, TriggerType
+
+# Lower-case event names queued through Game.queue_event that map onto a TriggerType
+EVENT_TRIGGER_TYPES = {trigger_type.value.lower(): trigger_type for trigger_type in TriggerType}
+
+
+class EventDispatcher:
+    """
+    Routes queued game events to registered TriggeredAbilities
+
+    Abilities are indexed by (TriggerType, TriggerScope, controller), so dispatching an event only touches
+    the listeners that can match it. SOURCE-scoped abilities are keyed by their source card instead of the
+    controller, so an event only reaches the abilities of the card named as its 'source'. Triggers from one drained batch count as simultaneous and come back in
+    APNAP order.
+    """
+    def __init__(self):
+        # trigger type -> scope -> controller (source card for SOURCE scope) -> abilities
+        self._listeners: Dict[TriggerType, Dict[TriggerScope, Dict[object, List[TriggeredAbility]]]] = \
+            defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+        self.events_dispatched = 0
+        self.triggers_matched = 0
+        self.batches = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def register(self, ability: TriggeredAbility, controller) -> None:
+        ability.controller = controller
+        self._listeners[ability.trigger_type][ability.scope][self._key(ability)].append(ability)
+
+    def unregister(self, ability: TriggeredAbility) -> None:
+        """Removes ability if registered, dropping buckets it leaves empty so listening() stays accurate"""
+        by_scope = self._listeners.get(ability.trigger_type)
+        by_controller = by_scope.get(ability.scope) if by_scope else None
+        key = self._key(ability)
+        abilities = by_controller.get(key) if by_controller else None
+        if not abilities or ability not in abilities:
+            return
+        abilities.remove(ability)
+        if not abilities:
+            del by_controller[key]
+            if not by_controller:
+                del by_scope[ability.scope]
+                if not by_scope:
+                    del self._listeners[ability.trigger_type]
+
+    @staticmethod
+    def _key(ability: TriggeredAbility):
+        return ability.source if ability.scope is TriggerScope.SOURCE else ability.controller
+
+    def listening(self, trigger_type: TriggerType) -> bool:
+        """Whether any ability is registered for trigger_type, so events of that type may trigger something"""
+        return trigger_type in self._listeners
+
+    def listeners(self, trigger_type: TriggerType, event_player, source=None) -> List[TriggeredAbility]:
+        """Abilities whose type and scope match an event involving event_player and, if given, source"""
+        by_scope = self._listeners.get(trigger_type)
+        if not by_scope:
+            return []
+        matched = []
+        for abilities in by_scope.get(TriggerScope.ANY_PLAYER, {}).values():
+            matched.extend(abilities)
+        matched.extend(by_scope.get(TriggerScope.YOU_CONTROLLED, {}).get(event_player, ()))
+        for controller, abilities in by_scope.get(TriggerScope.OPPONENT_CONTROLLED, {}).items():
+            if controller is not event_player:
+                matched.extend(abilities)
+        if source is not None:
+            matched.extend(by_scope.get(TriggerScope.SOURCE, {}).get(source, ()))
+        return matched
+
+    def drain(self, game) -> List[Tuple[TriggeredAbility, dict]]:
+        """
+        Empties game.event_queue and returns the (ability, event data) pairs that triggered
+
+        The list is in the order the triggers go on the stack: the active player's first, then the other
+        players' in turn order, so the last entry resolves first.
+        """
+        start = time.perf_counter()
+        events, game.event_queue = game.event_queue, []
+
+        by_controller = defaultdict(list)
+        for event, player, meta_data in events:
+            trigger_type = event if isinstance(event, TriggerType) else EVENT_TRIGGER_TYPES.get(event)
+            if trigger_type not in self._listeners:
+                continue
+            event_data = {**(meta_data or {}), 'controller': player}
+            for ability in self.listeners(trigger_type, player, event_data.get('source')):
+                if ability.condition(event_data):
+                    by_controller[ability.controller].append((ability, event_data))
+
+        triggered = []
+        for player in self._apnap_order(game):
+            triggered.extend(by_controller.pop(player, ()))
+        for remaining in by_controller.values():
+            triggered.extend(remaining)
+
+        elapsed = time.perf_counter() - start
+        self.events_dispatched += len(events)
+        self.triggers_matched += len(triggered)
+        self.batches += 1
+        self.total_latency += elapsed
+        self.max_latency = max(self.max_latency, elapsed)
+        return triggered
+
+    @staticmethod
+    def _apnap_order(game) -> list:
+        players = game.players
+        start = players.index(game.active_player) if game.active_player in players else 0
+        return players[start:] + players[:start]
+
+    def stats(self) -> dict:
+        return {
+            "events_dispatched": self.events_dispatched,
+            "triggers_matched": self.triggers_matched,
+            "batches": self.batches,
+            "mean_latency_us": 1e6 * self.total_latency / self.batches if self.batches else 0.0,
+            "max_latency_us": 1e6 * self.max_latency,
+        }
@@ -0,0 +1,64 @@
+import re
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from rules.Keywords import card_keywords, load_keywords
+
+COLOR_FEATURES = {'W': 'white', 'U': 'blue', 'B': 'black', 'R': 'red', 'G': 'green'}
+BASE_FEATURES = ('cards', 'is_land', 'is_creature', 'cmc', *COLOR_FEATURES.values(), 'produces_mana')
+
+_MANA_ABILITY = re.compile(r'\badd \{')
+
+_feature_names: Tuple[str, ...] = ()
+_feature_index: Dict[str, int] = {}
+_card_features: Dict[str, np.ndarray] = {}
+
+
+def feature_names() -> Tuple[str, ...]:
+    """Base features followed by one column per keyword in Keywords.json"""
+    global _feature_names, _feature_index
+    if not _feature_names:
+        _feature_names = BASE_FEATURES + tuple(f'kw_{name}' for name in load_keywords())
+        _feature_index = {name: i for i, name in enumerate(_feature_names)}
+    return _feature_names
+
+
+def feature_index(name: str) -> int:
+    feature_names()
+    return _feature_index[name]
+
+
+def card_features(printed) -> np.ndarray:
+    """Integer feature vector for one unique card, computed once and shared (treat as read-only)"""
+    features = _card_features.get(printed.name)
+    if features is None:
+        features = np.zeros(len(feature_names()), dtype=np.int16)
+        features[_feature_index['cards']] = 1
+        is_land = printed.has_type('land')
+        features[_feature_index['is_land']] = is_land
+        features[_feature_index['is_creature']] = printed.has_type('creature')
+        features[_feature_index['cmc']] = int(printed.cmc)
+        for color in printed.colors or ():
+            if color in COLOR_FEATURES:
+                features[_feature_index[COLOR_FEATURES[color]]] = 1
+        features[_feature_index['produces_mana']] = is_land or any(
+            _MANA_ABILITY.search((face.oracle or '').lower()) for face in printed.faces.values())
+        for keyword in card_keywords(printed):
+            features[_feature_index[f'kw_{keyword.name.lower()}']] = 1
+        features.flags.writeable = False
+        _card_features[printed.name] = features
+    return features
+
+
+def features_matrix(cards: Iterable) -> np.ndarray:
+    """One row of features per card"""
+    rows = [card_features(card.printed) for card in cards]
+    if not rows:
+        return np.zeros((0, len(feature_names())), dtype=np.int16)
+    return np.stack(rows)
+
+
+def sum_features(cards: Iterable) -> np.ndarray:
+    """Feature counts for a group of cards (a hand, a deck), e.g. the number of lands"""
+    return features_matrix(cards).sum(axis=0, dtype=np.int32)
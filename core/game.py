@@ -1,45 +1,76 @@
-import json
 import random
+from operator import attrgetter
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Optional
+
+import numpy as np
 
-from core import Card
 from core.decisions.mulligan import MulliganDecision
 from data.historical_repository import HistoricalRepository
 from core.player import Player, PlayerType
 from core.decisions import PlayDrawDecision
+from core.decisions.broker import MULLIGAN, PLAY_DRAW, DecisionRequest, decision_row, run_inline
 from core.Deck import load_deck
+from core.archetypes import ArchetypeClassifier, load_format_meta
+from core.events import EventDispatcher
+from core.mana import AvailableMana, card_cost, castable, mana_sources, pay
+from core.mcts import MonteCarloTreeSearch
+from core.metrics import METRICS
+from core.snapshot import GameSnapshot, restore_snapshot, take_snapshot
+from core.deck_analysis import keep_odds
+from core.features import feature_index, sum_features
+from core.zobrist import ZobristHash, zobrist_key
+from core.zones import Library, ZoneManager, card_types
+from rules.Keywords import attach_keyword_abilities
 
 PROJ_DIR = Path(__file__).parent.parent
+MAX_MULLIGANS = 7
+
+# Zone indexes are unordered as far as the rules go; sorting by id keeps play independent of their history
+_card_id = attrgetter('id')
 
 
 class Game:
     def __init__(self,
                  player1_type=PlayerType.HUMAN,
                  player2_type=PlayerType.AI,
-                 game_format: str = "sparky"):
+                 game_format: str = "sparky",
+                 seed: Optional[int] = None):
+        # Every random choice in the game comes from this stream, so a seed and the logged decisions
+        # reproduce a game exactly (see core.replay)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.action_log = []
+
         # Players
         self.archetypes = None
         self.players = [
             Player("Player 1", player1_type),
             Player("Player 2", player2_type)
         ]
-        self.ai_model = None
+        self.ai_model = None  # DecisionModel answering inline AI decisions; the ai_decision rules if None
+        # MonteCarloTreeSearch used by MCTS players; a single-worker one is created on first use unless set
+        self.search = None
         self.game_format = game_format
         self.historical = HistoricalRepository()
 
         self.match_game_number = 1
         self.current_player = self.players[0]
         self.active_player = self.players[0]
+        self.first_player = self.players[0]
         self.turn_phase = "Beginning"
+        # (decision kind, deciding player's index, mulligans taken) while the opening is being decided
+        self.decision_point = None
 
         self.seen_cards = {player: set() for player in self.players}
         self.suspected_archetypes = {player: None for player in self.players}
+        self.archetype_classifier = None
+        self._archetype_trackers = {}
 
         # Zones
-        self.battlefield = []
-        self.stack = []
-        self.exile = []
+        self.cards = []  # every card in the game, indexed by Card.id
+        self.zobrist = ZobristHash(self.players)
+        self.zones = ZoneManager(self)
 
         # Game state tracking
         self.turn_count = 1
@@ -47,43 +78,237 @@ class Game:
         self.priority = None
         self.losers = []
         self.event_queue = []
+        self.events = EventDispatcher()
 
         # Turn history
         self.life_changes_this_turn = []
         self.creatures_died_this_turn = []
         self.spells_cast_this_turn = []
 
+    @property
+    def battlefield(self):
+        return self.zones.battlefield
+
+    @property
+    def stack(self):
+        return self.zones.stack
+
+    @property
+    def exile(self):
+        return self.zones.exile
+
     def start_game(self):
         """Initialize a new game"""
+        run_inline(self.start_game_steps())
+
+    def start_game_steps(self):
+        """
+        start_game as a generator for DecisionBroker: yields a DecisionRequest for every AI decision and
+        expects the chosen action to be sent back
+        """
+        self.begin_opening()
+        while self.decision_point is not None:
+            decider = self.players[self.decision_point[1]]
+            if decider.type == PlayerType.HUMAN:
+                action = self._human_decision()
+                while action not in self.legal_actions():
+                    action = self._human_decision()
+            else:
+                action = yield self.pending_request()
+            self.apply_decision(action)
+
+    def begin_opening(self):
+        """Loads the decks and sets up the first decision: which player chooses to play or draw"""
         self.setup()
         self.load_decks()
-        self.choose_first_player()
-        self.draw_starting_hands()
-        mull_dec = {'choice': 'm', 'times': 0}
-        while mull_dec['choice'] == 'm':
-            mull_dec = self.mulligan_decisions(mull_dec)
+        self.decision_point = (PLAY_DRAW, self.players.index(self.rng.choice(self.players)), 0)
 
-    def setup(self):
-        self.load_archetypes()
+    def game_steps(self, max_turns: int = 60):
+        """A whole game as a generator (see start_game_steps); returns the winner"""
+        yield from self.start_game_steps()
+        return self.play_game(max_turns)
 
-    def load_archetypes(self):
-        """Loads deck archetype data from JSON file into self.archetypes"""
-        try:
-            archetypes_path = PROJ_DIR / 'data'/ 'decks' / self.game_format / 'deck_archetypes.json'
+    def play_game(self, max_turns: int = 60):
+        """Play turns until a player loses or max_turns is reached
 
-            if not archetypes_path.exists():
-                raise FileNotFoundError(f"Archetypes file not found at {archetypes_path}")
+        Returns:
+            Player: the winner, or None if the game was drawn
+        """
+        while not self.losers and self.turn_count <= max_turns:
+            self.take_turn()
 
-            with open(archetypes_path, 'r', encoding='utf-8') as f:
-                self.archetypes = json.load(f)
+        if len(self.losers) != 1:
+            return None
+        return self._get_opponent(self.losers[0])
 
-            print(f"Loaded archetype data for {len(self.archetypes)} decks")
+    # Simplified turn: lands and creatures only, every creature attacks and nothing blocks
+    def take_turn(self):
+        player = self.current_player
+        opponent = self._get_opponent(player)
+        self.active_player = player
+
+        self.turn_phase = "Beginning"
+        self.step = "Untap"
+        self.zones.untap_all(player)
+
+        self.step = "Draw"
+        if self.turn_count > 1 and player.draw_card(self) is None:
+            self.losers.append(player)
+            return
+        self.process_events()
+
+        self.turn_phase = "Precombat Main"
+        self.step = "Main"
+        self._play_land(player)
+        self.process_events()
+
+        self.turn_phase = "Combat"
+        self.step = "Declare Attackers"
+        damage = 0
+        for attacker in sorted(self.zones.permanents(player, 'creature'), key=_card_id):
+            power = self._creature_power(attacker)
+            if power:
+                damage += power
+                self.queue_event("damage_dealt", player, {'source': attacker, 'target': opponent, 'amount': power})
+        self.process_events()
+        if damage:
+            opponent.life_total -= damage
+            opponent.life_lost_this_turn += damage
+            self.life_changes_this_turn.append((opponent, -damage))
+            if opponent.life_total <= 0:
+                self.losers.append(opponent)
+                return
+
+        self.turn_phase = "Postcombat Main"
+        self.step = "Main"
+        self._cast_creatures(player)
+        self.process_events()
+
+        self.turn_phase = "Ending"
+        self.step = "Cleanup"
+        self._end_turn(opponent)
+
+    def _end_turn(self, next_player):
+        for player in self.players:
+            player.life_lost_this_turn = 0
+            player.life_gained_this_turn = 0
+        self.life_changes_this_turn = []
+        self.creatures_died_this_turn = []
+        self.spells_cast_this_turn = []
+        self.current_player = next_player
+        self.turn_count += 1
+
+    def _play_land(self, player):
+        land = next((card for card in player.hand if 'land' in card_types(card.printed)), None)
+        if land is not None:
+            self._put_onto_battlefield(land, player)
+
+    def available_mana(self, player) -> AvailableMana:
+        """player's mana pool plus their untapped lands"""
+        lands = sorted(self.zones.permanents(player, 'land', tapped=False), key=_card_id)
+        return AvailableMana(player.mana_pool, mana_sources(lands))
+
+    def castable_cards(self, player) -> list:
+        """Cards in player's hand whose mana cost they can pay right now (with X = 0)"""
+        return [card for card, ok in zip(player.hand, castable(player.hand, self.available_mana(player))) if ok]
+
+    def _cast_creatures(self, player):
+        """Greedily cast the most expensive creatures the mana pool and untapped lands can pay for"""
+        creatures = [card for card in player.hand if 'creature' in card_types(card.printed)]
+        if not creatures:
+            return
+        mana = self.available_mana(player)
+        creatures.sort(key=lambda card: card.cmc, reverse=True)
+        for creature in creatures:
+            payment = pay(card_cost(creature.printed), mana)
+            if payment is None:
+                continue
+            for land in payment.sources:
+                self.zones.tap(land)
+            for i, amount in enumerate(payment.pool):
+                player.mana_pool[i] -= amount
+            mana.spend(payment)
+            self._put_onto_battlefield(creature, player)
+            self.spells_cast_this_turn.append(creature)
+
+    def _put_onto_battlefield(self, card, player):
+        self.zones.move(card, 'battlefield', controller=player)
+        for ability in card.abilities:
+            if 'battlefield' in ability.effect_config.get('zones', ('battlefield',)):
+                self.events.register(ability, player)
+        if 'creature' in card_types(card.printed):
+            self.queue_event("creature_etb", player, {'card': card})
+
+    def destroy(self, card):
+        """Move a permanent from the battlefield to its owner's graveyard"""
+        if card.zone != 'battlefield':
+            return
+        controller = card.controller
+        for ability in card.abilities:
+            self.events.unregister(ability)
+        self.zones.move(card, 'graveyard')
+        if card.has_type('creature'):
+            self.creatures_died_this_turn.append(card)
+            self.queue_event("creature_dies", controller, {'card': card})
+
+    @staticmethod
+    def _creature_power(card) -> int:
+        power = card.faces['Face1'].power
+        return int(power) if power and power.isdigit() else 0
+
+    @property
+    def state_hash(self) -> int:
+        """
+        64-bit Zobrist hash of the game state, for transposition tables and caches
+
+        Covers every card's zone, controller, tapped state and counters (kept up to date as they change), plus
+        life and poison totals, the turn, step, player whose turn it is and the pending opening decision.
+        Library order is not part of it. The card part is built on first use and maintained from then on.
+        """
+        if not self.zobrist.tracking:
+            self.zobrist.track(self.cards)
+        value = (self.zobrist.value ^ zobrist_key('turn', self.turn_count) ^ zobrist_key('step', self.step)
+                 ^ zobrist_key('current', self.players.index(self.current_player))
+                 ^ zobrist_key('decision', self.decision_point))
+        for i, player in enumerate(self.players):
+            value ^= zobrist_key('life', i, player.life_total) ^ zobrist_key('poison', i, player.poison_counters)
+        return value
+
+    def add_counters(self, card, counter_type: str, amount: int = 1):
+        card.add_counters(counter_type, amount)
+        self.zones.changed_cards.add(card.id)
+
+    def snapshot(self) -> GameSnapshot:
+        """Compact immutable copy of the game state, for search AIs to return to (see core.snapshot)"""
+        return take_snapshot(self)
+
+    def restore(self, snapshot: GameSnapshot):
+        restore_snapshot(self, snapshot)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: GameSnapshot, game_format: str = "sparky") -> "Game":
+        """A new AI-vs-AI game in the snapshot's state, e.g. in another process"""
+        game = cls(player1_type=PlayerType.AI, player2_type=PlayerType.AI, game_format=game_format)
+        game.setup()
+        for player, deck_name in zip(game.players, snapshot.deck_names):
+            game._load_player_deck(player, deck_name)
+        game.restore(snapshot)
+        return game
+
+    def setup(self):
+        self.load_archetypes()
 
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in archetypes file: {str(e)}")
+    def load_archetypes(self):
+        """Loads deck archetype data for the format into self.archetypes (read from disk once per process)"""
+        try:
+            self.archetypes = load_format_meta(self.game_format)
+            self.archetype_classifier = ArchetypeClassifier.for_format(self.game_format)
         except Exception as e:
             raise RuntimeError(f"Error loading archetypes: {str(e)}")
 
+        if not self.archetypes:
+            raise RuntimeError(f"Error loading archetypes: no deck_archetypes.json for format '{self.game_format}'")
+
     def load_decks(self):
         global deck_color
         deck_dict = {
@@ -97,33 +322,117 @@ class Game:
             if player.type == PlayerType.HUMAN:
                 #Edit this later to keep prompting if the deck name does not exist
                 deck_color = input("Choose your deck color (wubrg): ")
-                player.library = load_deck(deck_dict[deck_color], self.game_format)
-            if player.type == PlayerType.AI:
-                deck_color = random.choice(list(deck_dict.keys()))
-                player.library = load_deck(deck_dict[deck_color], self.game_format)
-            player.deck_archetype = self.archetypes[deck_dict[deck_color]]
+            else:
+                deck_color = self.rng.choice(list(deck_dict.keys()))
+            self._load_player_deck(player, deck_dict[deck_color])
             del deck_color
             self.shuffle_deck(player)
 
-    def shuffle_deck(self, requesting_player):
-        random.shuffle(requesting_player.library)
-
-    def choose_first_player(self):
-        decider = random.choice(self.players)
+    def _load_player_deck(self, player, deck_name):
+        """Fills player's library (unshuffled) and numbers its cards in self.cards"""
+        with METRICS.timer('deck_load', self):
+            player.library = Library(load_deck(deck_name, self.game_format))
+        for card in player.library:
+            card.id = len(self.cards)
+            self.cards.append(card)
+            if self.zobrist.tracking:
+                self.zobrist.attach(card)
+            attach_keyword_abilities(card)
+        self.zones.register(player.library, player)
+        player.deck_features = sum_features(player.library)
+        player.deck_name = deck_name
+        player.deck_archetype = self.archetypes[deck_name]
 
-        if decider.type == PlayerType.HUMAN:
-            decision = PlayDrawDecision.human_decision(decider.name)
-        else:
+    def shuffle_deck(self, requesting_player):
+        with METRICS.timer('shuffle', self):
+            requesting_player.library.shuffle(self.rng)
+        self.zones.changed_zones.add(('library', requesting_player))
+
+    def legal_actions(self) -> tuple:
+        """Actions open to the player deciding at self.decision_point"""
+        kind, _, times = self.decision_point
+        if kind == PLAY_DRAW:
+            return ("p", "d")
+        return ("k", "m") if times < MAX_MULLIGANS else ("k",)
+
+    def pending_request(self) -> DecisionRequest:
+        """The AI decision at self.decision_point; MCTS players answer it by searching (see core.mcts)"""
+        kind, player_index, times = self.decision_point
+        with METRICS.timer(f'{kind}_decision', self):
+            request = self._rule_request()
+        if self.players[player_index].type == PlayerType.MCTS:
+            if self.search is None:
+                self.search = MonteCarloTreeSearch()
+            return DecisionRequest(kind, request.features, lambda: self.search.decide(self), batchable=False)
+        return request
+
+    def rule_decision(self) -> str:
+        """The if-rules answer at self.decision_point, whichever kind of player is deciding"""
+        return self._rule_request().decide()
+
+    def _rule_request(self) -> DecisionRequest:
+        kind, player_index, times = self.decision_point
+        decider = self.players[player_index]
+        if kind == PLAY_DRAW:
             game_state = self._get_play_draw_state(decider)
-            decision = PlayDrawDecision.ai_decision(game_state, self.ai_model)
-
-        self._apply_play_draw(decider, decision)
+            win_rates = game_state["historical_win_rates"] or {}
+            features = decision_row(decider.deck_features,
+                                    win_rates.get("play_win_rate", np.nan), win_rates.get("draw_win_rate", np.nan))
+            decide = lambda: PlayDrawDecision.ai_decision(game_state, deck_features=decider.deck_features)
+        else:
+            hand_features = self._get_mulligan_state(decider, {'times': times})
+            odds = keep_odds(int(decider.deck_features[feature_index('cards')]),
+                             int(decider.deck_features[feature_index('is_land')]))
+            features = decision_row(hand_features, times, odds[hand_features[feature_index('is_land')]])
+            decide = lambda: MulliganDecision.ai_decision(hand_features, times, keep_odds=odds)
+
+        if self.ai_model is not None:
+            decide = lambda: str(self.ai_model.predict(kind, features[None, :])[0])
+        return DecisionRequest(kind, features, decide)
+
+    def _human_decision(self) -> str:
+        kind, player_index, _ = self.decision_point
+        decider = self.players[player_index]
+        if kind == PLAY_DRAW:
+            return PlayDrawDecision.human_decision(decider.name)
+        return MulliganDecision.human_decision(decider.name, decider.hand)
+
+    def apply_decision(self, action: str):
+        """
+        Carries out action at self.decision_point and moves on to the next one (None once both hands are kept)
+
+        Raises ValueError if action isn't one of legal_actions(), e.g. a mulligan past MAX_MULLIGANS.
+        """
+        kind, player_index, times = self.decision_point
+        legal = self.legal_actions()
+        if action not in legal:
+            raise ValueError(f"Illegal {kind} action {action!r} for {self.players[player_index].name}; "
+                             f"expected one of {legal}")
+        decider = self.players[player_index]
+        self.action_log.append(action)
+        if METRICS.enabled:
+            METRICS.count('decisions', game=self, kind=kind, action=action)
+        if kind == PLAY_DRAW:
+            self._apply_play_draw(decider, action)
+            self.draw_starting_hands()
+            self.decision_point = (MULLIGAN, self.players.index(self.current_player), 0)
+        elif action == 'm':
+            self._mulligan(decider)
+            self.decision_point = (MULLIGAN, player_index, times + 1)
+        else:
+            self._keep_hand(decider, times)
+            # The player going first decides first, then their opponent
+            if decider is self.current_player:
+                self.decision_point = (MULLIGAN, self.players.index(self._get_opponent(decider)), 0)
+            else:
+                self.decision_point = None
 
     def _apply_play_draw(self, decider, decision):
         if decision == "p":
             self.current_player = decider
         else:
             self.current_player = self._get_opponent(decider)
+        self.first_player = self.current_player
 
     def draw_starting_hands(self):
         for player in self.players:
@@ -133,57 +442,49 @@ class Game:
         return next(p for p in self.players if p != requesting_player)
 
     def _get_play_draw_state(self, requesting_player):
-        my_archetype = requesting_player.deck_archetype["archetype"]
-        opponent_archetype = None if self.match_game_number == 1 else self._infer_opponent_archetype(requesting_player)
+        # Win rates are recorded by deck name (see record_game_result and core.simulate)
+        my_deck = requesting_player.deck_name
+        opponent_deck = None if self.match_game_number == 1 else self._infer_opponent_deck(requesting_player)
 
         win_rates = self.historical.get_win_rates(
-            deck_archetype=my_archetype,
-            opponent_archetype=opponent_archetype,
+            deck_archetype=my_deck,
+            opponent_archetype=opponent_deck,
             format=self.game_format)
 
         return {
-            "my_archetype": my_archetype,
-            "opponent_archetype": opponent_archetype,
+            "my_deck": my_deck,
+            "opponent_deck": opponent_deck,
             "historical_win_rates": win_rates
         }
 
     # Add more factors to this function as model progresses
-    # Factors to add later: Did your opponent mulligan, cmc of cards in hand, number of tap lands, combo pieces
+    # Factors to add later: Did your opponent mulligan, number of tap lands, combo pieces
     def _get_mulligan_state(self, requesting_player, mull_state):
-        hand = requesting_player.hand
-        meta_data = {'n_cards': len(hand), 'n_mull': mull_state['times']}
-
-        def count_hand_lands(hand: list[Card]) -> int:
-            running_count = 0
-            for card in hand:
-                for face_name, face_obj in card.faces.items():
-                    if 'land' in face_obj.type_line.lower():
-                        running_count += 1
-                        break
-            return running_count
-        n_lands = count_hand_lands(hand)
-        meta_data['n_lands'] = n_lands
-        return meta_data
-
-    def mulligan_decisions(self, mull_state):
-        decider = self.current_player
-        if decider.type == PlayerType.HUMAN:
-            decision = MulliganDecision.human_decision(decider.name, decider.hand)
-        else:
-            hand_state = self._get_mulligan_state(decider, mull_state)
-            decision = MulliganDecision.ai_decision(hand_state, self.ai_model)
-        temp_mull_dec = {'choice': decision}
-        temp_mull_dec['times']
-        return
+        """Summed feature vector of the hand (see core.features)"""
+        return sum_features(requesting_player.hand)
+
+    def _keep_hand(self, player, times):
+        # London mulligan: keep seven, put one card on the bottom per mulligan taken
+        for _ in range(min(times, len(player.hand))):
+            self.zones.move(next(reversed(player.hand)), 'library')
+
+    def _mulligan(self, player):
+        for card in list(player.hand):
+            self.zones.move(card, 'library')
+        self.shuffle_deck(player)
+        player.draw_card(self, amount=7)
+
     def record_game_result(self, winner):
-        """Update stats after game ends"""
-        self.historical.update_win_rates(
-            deck_archetype=self.current_player.deck.achetype,
-            played_first=(self.play_order[0] == self.current_player),
-            won=(winner == self.current_player),
-            opponent_archetype=self._get_opponent(self.current_player).deck.archetype,
-            format=self.game_format
-        )
+        """Update stats after game ends, for the matchup and for the deck in general (see _get_play_draw_state)"""
+        opponent = self._get_opponent(self.current_player)
+        for opponent_deck in (opponent.deck_name, None):
+            self.historical.update_win_rates(
+                deck_archetype=self.current_player.deck_name,
+                played_first=(self.first_player == self.current_player),
+                won=(winner == self.current_player),
+                opponent_archetype=opponent_deck,
+                format=self.game_format
+            )
 
     def _get_deck_archetype(self, player):
         """Returns limited into about opponent's deck"""
@@ -204,70 +505,34 @@ class Game:
         """Called whenever a card becomes visible to opponent"""
         self.seen_cards[observing_player].add(card.name)
 
-        self._update_suspected_archetype(observing_player, card, revealing_player)
+        self._update_suspected_archetype(observing_player, card)
 
-    def _update_suspected_archetype(self, observer, target):
+    def _update_suspected_archetype(self, observer, card):
         """Re-evaluate archetype guess after new card seen"""
-        seen = self.seen_cards[observer]
-        target_deck = target.deck
-
-        # Get all meta decks in current format
-        format_decks = self._load_decks_meta_info(self.game_format)
-
-        # Key-card matching
-        possible_decks = []
-        for deck_name, deck_data in format_decks.items():
-            key_matches = len(seen & set(deck_data["key_cards"]))
-            secondary_matches = len(seen & set(deck_data["secondary_cards"]))
-
-            if key_matches > 0:
-                possible_decks.append({
-                    "deck_name": deck_name,
-                    "confidence": key_matches * 0.6 + secondary_matches * 0.4,
-                    "archetype": deck_data["archetype"],
-                })
-
-        if possible_decks:
-            best_guess = max(possible_decks, key=lambda x: x["confidence"])
-            if best_guess["confidence"] > 0.5:
-                self.suspected_archetypes[observer] = best_guess["deck_name"]
-
-    def _load_decks_meta_info(self, game_format):
-        self._archetype_cache: Dict[str, dict] = {}
-        path = Path(f"data/decks/{game_format}/deck_archetypes.json")
-        try:
-            with open(path) as f:
-                self._archetype_cache[game_format] = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            self._archetype_cache[game_format] = {}
-        return self._archetype_cache[game_format]
+        with METRICS.timer('archetype_inference', self):
+            tracker = self._archetype_trackers.get(observer)
+            if tracker is None:
+                classifier = self.archetype_classifier or ArchetypeClassifier.for_format(self.game_format)
+                tracker = self._archetype_trackers[observer] = classifier.new_tracker()
+
+            tracker.reveal(card.name)
+            best_guess = tracker.best_guess()
+            if best_guess:
+                self.suspected_archetypes[observer] = best_guess
 
-    def _infer_opponent_archetype(self, requesting_player):
-        """Guess opponent's deck based on seen cards"""
-        opponent = self._get_opponent(requesting_player)
+    def _infer_opponent_deck(self, requesting_player):
+        """Guess opponent's deck name based on seen cards"""
+        suspected_deck = self.suspected_archetypes[requesting_player]
 
         # Check if we have a high confidence guess
-        if self.suspected_archetypes[opponent]:
-            # Maybe change this to deck name?
-            return self.suspected_archetypes[opponent]["archetype"]
+        if suspected_deck:
+            return suspected_deck
 
         return self._meta_frequency_guess(requesting_player)
 
     def _meta_frequency_guess(self, requesting_player):
-        """Fallback when no key cards seen"""
-        format_meta = self._load_decks_meta_info(self.game_format)
-        if not format_meta:
-            return "unknown"
-
-        # Get most popular deck
-        top_deck = sorted(
-            format_meta.items(),
-            key=lambda x: x[1]["meta_percentage"],
-            reverse=True
-        )[:1]
-
-        # Check to see if this line is running correctly when finished
-        return top_deck[0][1]["archetype"]
+        """Fallback when no key cards seen: the most played deck, or None to use the deck's general win rates"""
+        return ArchetypeClassifier.for_format(self.game_format).most_played
 
     def queue_event(
             self,
@@ -277,3 +542,12 @@ class Game:
     ):
         self.event_queue.append((event, player, meta_data))
 
+    def process_events(self, max_rounds: int = 100):
+        """Dispatch queued events to triggered abilities until no new events are queued"""
+        for _ in range(max_rounds):
+            if not self.event_queue:
+                return
+            # Last on the stack resolves first
+            for ability, event_data in reversed(self.events.drain(self)):
+                ability.execute(self, event_data)
+
@@ -0,0 +1,361 @@
+import re
+import sys
+from functools import lru_cache
+from itertools import product
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.player import MANA_COLORS
+
+N_COLORS = len(MANA_COLORS)
+# Masks are sets of MANA_COLORS as bits, so 2**N_COLORS of them
+N_MASKS = 1 << N_COLORS
+COLOR_BIT = {color: 1 << i for i, color in enumerate(MANA_COLORS)}
+ANY_MANA = N_MASKS - 1                                  # generic costs: any mana, colorless included
+ANY_COLOR = ANY_MANA & ~COLOR_BIT['C']                  # "one mana of any color"
+PHYREXIAN_LIFE = 2
+
+_SYMBOL = re.compile(r'\{([^}]*)\}')
+_ADD_MANA = re.compile(r'\{t\}: add ([^.]*)', re.IGNORECASE)
+BASIC_LAND_COLORS = {'plains': 'W', 'island': 'U', 'swamp': 'B', 'mountain': 'R', 'forest': 'G'}
+
+_POPCOUNT = tuple(bin(mask).count('1') for mask in range(N_MASKS))
+
+_card_costs: Dict[str, "ManaCost"] = {}
+_source_masks: Dict[str, int] = {}
+
+
+class ManaCost(NamedTuple):
+    """
+    A parsed mana cost
+
+    Symbols with a choice of payment ({2/W}, {W/P}) expand the cost into variants: one tuple of pip masks
+    (one per mana needed, each the set of colors that can pay it) and the life paid, for each combination of
+    choices. within[v, U] is the number of variant v's pips that only colors in mask U can pay.
+    """
+    text: str
+    mana_value: int
+    x: int                                      # number of {X} symbols, paid for separately (see max_x)
+    variants: Tuple[Tuple[Tuple[int, ...], int], ...]
+    fewest_pips: int                            # mana needed by the cheapest variant, a quick bound
+    within: np.ndarray                          # int16, (number of variants, N_MASKS), read-only
+    life: np.ndarray                            # int16, life paid by each variant
+
+
+class Payment(NamedTuple):
+    sources: Tuple[object, ...]                 # mana sources to tap, e.g. lands
+    pool: Tuple[int, ...]                       # mana spent from the pool, per MANA_COLORS
+    life: int
+
+
+class AvailableMana:
+    """
+    A player's mana pool plus their untapped mana sources, as units of one mana each
+
+    hitting[U] is the number of units that can pay for at least one color in mask U. By Hall's theorem a
+    cost variant can be paid exactly when within[U] <= hitting[U] for every mask U, which checks every cost
+    against the same vector. Units are kept in the order payments spend them: pool mana first, then sources
+    that make fewer colors, so dual lands are kept when they aren't needed.
+    """
+    __slots__ = ('units', 'key')
+
+    def __init__(self, pool: Sequence[int] = (0,) * N_COLORS, sources: Iterable[Tuple[object, int]] = ()):
+        # (source or None for pool mana, mask of colors it can make)
+        self.units: List[Tuple[object, int]] = [(None, 1 << i) for i, n in enumerate(pool) for _ in range(n)]
+        sources = [(source, mask) for source, mask in sources if mask]
+        sources.sort(key=_unit_order)
+        self.units += sources
+        self._count()
+
+    def _count(self):
+        counts: Dict[int, int] = {}
+        for _, mask in self.units:
+            counts[mask] = counts.get(mask, 0) + 1
+        # (mask, number of units) pairs: all the solver needs to know, so results are cached on it
+        self.key = tuple(sorted(counts.items()))
+
+    def spend(self, payment: "Payment"):
+        """Removes the pool mana and sources used by payment"""
+        pool = list(payment.pool)
+        tapped = set(map(id, payment.sources))
+        units = []
+        for source, mask in self.units:
+            if source is None:
+                color = mask.bit_length() - 1
+                if pool[color]:
+                    pool[color] -= 1
+                    continue
+            elif id(source) in tapped:
+                continue
+            units.append((source, mask))
+        self.units = units
+        self._count()
+
+    @property
+    def hitting(self) -> np.ndarray:
+        return _hitting(self.key)
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+
+def _subset_sums(counts: Sequence[int]) -> List[int]:
+    """sums[U] = sum of counts[m] over every mask m within U (a sum over subsets, one pass per color bit)"""
+    sums = list(counts)
+    for bit in range(N_COLORS):
+        step = 1 << bit
+        for mask in range(N_MASKS):
+            if mask & step:
+                sums[mask] += sums[mask ^ step]
+    return sums
+
+
+@lru_cache(maxsize=4096)
+def _hitting(unit_counts: Tuple[Tuple[int, int], ...]) -> np.ndarray:
+    counts = [0] * N_MASKS
+    for mask, n in unit_counts:
+        counts[mask] = n
+    within = _subset_sums(counts)
+    total = within[ANY_MANA]
+    hitting = np.array([total - within[ANY_MANA & ~mask] for mask in range(N_MASKS)], dtype=np.int16)
+    hitting.flags.writeable = False
+    return hitting
+
+
+def _symbol_options(symbol: str) -> Optional[Tuple[Tuple[Tuple[int, ...], int], ...]]:
+    """Ways to pay one symbol, each (pip masks, life), or None for X"""
+    symbol = symbol.upper()
+    if symbol in ('X', 'Y', 'Z'):
+        return None
+    if symbol.isdigit():
+        return (((ANY_MANA,) * int(symbol), 0),)
+    if symbol in COLOR_BIT:
+        return (((COLOR_BIT[symbol],), 0),)
+    if symbol == 'S':
+        # Snow mana isn't tracked; treat it as generic
+        return (((ANY_MANA,), 0),)
+
+    parts = symbol.split('/')
+    phyrexian = parts[-1] == 'P'
+    if phyrexian:
+        parts = parts[:-1]
+    options = []
+    colors = [part for part in parts if part in COLOR_BIT]
+    if colors:
+        mask = 0
+        for color in colors:
+            mask |= COLOR_BIT[color]
+        options.append(((mask,), 0))
+    for part in parts:
+        if part.isdigit():
+            options.append(((ANY_MANA,) * int(part), 0))
+    if phyrexian:
+        options.append(((), PHYREXIAN_LIFE))
+    if not options or len(colors) + sum(part.isdigit() for part in parts) != len(parts):
+        raise ValueError(f"Unknown mana symbol '{{{symbol}}}'")
+    return tuple(options)
+
+
+@lru_cache(maxsize=None)
+def parse_cost(text: str) -> ManaCost:
+    """Parses a Scryfall mana cost such as '{2}{W}{W}', '{W/U}', '{2/B}', '{G/P}' or '{X}{R}' (cached per string)"""
+    x = 0
+    fixed: List[int] = []
+    choices = []
+    mana_value = 0
+    for symbol in _SYMBOL.findall(text or ''):
+        options = _symbol_options(symbol)
+        if options is None:
+            x += 1
+            continue
+        mana_value += max(len(pips) for pips, _ in options)
+        if len(options) == 1:
+            fixed.extend(options[0][0])
+        else:
+            choices.append(options)
+
+    variants = []
+    for combination in product(*choices):
+        pips = tuple(fixed) + tuple(mask for option_pips, _ in combination for mask in option_pips)
+        variants.append((tuple(sorted(pips, key=_popcount)), sum(life for _, life in combination)))
+
+    within = np.array([_subset_sums(_mask_counts(pips)) for pips, _ in variants], dtype=np.int16)
+    life = np.array([life for _, life in variants], dtype=np.int16)
+    within.flags.writeable = False
+    life.flags.writeable = False
+    fewest_pips = min(len(pips) for pips, _ in variants)
+    return ManaCost(text or '', mana_value, x, tuple(variants), fewest_pips, within, life)
+
+
+def _mask_counts(pips: Iterable[int]) -> List[int]:
+    counts = [0] * N_MASKS
+    for mask in pips:
+        counts[mask] += 1
+    return counts
+
+
+def _popcount(mask: int) -> int:
+    return _POPCOUNT[mask]
+
+
+def _unit_order(unit: Tuple[object, int]) -> int:
+    return _POPCOUNT[unit[1]]
+
+
+def card_cost(printed) -> ManaCost:
+    """
+    The parsed cost of a card's front face, computed once per card name
+
+    A cost with symbols parse_cost doesn't know makes the card uncastable rather than failing the game.
+    """
+    cost = _card_costs.get(printed.name)
+    if cost is None:
+        text = next(iter(printed.faces.values())).mana_cost
+        try:
+            cost = parse_cost(text)
+        except ValueError:
+            cost = _uncastable(text)
+        _card_costs[printed.name] = cost
+    return cost
+
+
+def _uncastable(text: str) -> ManaCost:
+    """A cost with no way to pay it: no variants, and a fewest_pips no AvailableMana reaches"""
+    within = np.zeros((0, N_MASKS), dtype=np.int16)
+    life = np.zeros(0, dtype=np.int16)
+    within.flags.writeable = False
+    life.flags.writeable = False
+    return ManaCost(text or '', 0, 0, (), sys.maxsize, within, life)
+
+
+def source_mask(printed) -> int:
+    """Colors a land can tap for as a mask ({T}: Add ... in its rules text, or its basic land types); 0 if none"""
+    mask = _source_masks.get(printed.name)
+    if mask is None:
+        mask = 0
+        if printed.has_type('land'):
+            for face in printed.faces.values():
+                for produced in _ADD_MANA.findall(face.oracle or ''):
+                    if 'any color' in produced.lower():
+                        mask |= ANY_COLOR
+                    for symbol in _SYMBOL.findall(produced):
+                        mask |= COLOR_BIT.get(symbol.upper(), 0)
+                type_line = face.type_line.lower()
+                for land_type, color in BASIC_LAND_COLORS.items():
+                    if land_type in type_line:
+                        mask |= COLOR_BIT[color]
+        _source_masks[printed.name] = mask
+    return mask
+
+
+def mana_sources(permanents: Iterable) -> List[Tuple[object, int]]:
+    """(card, mask) for each untapped land among permanents that makes mana"""
+    return [(card, mask) for card in permanents
+            if not card.tapped and (mask := source_mask(card.printed))]
+
+
+@lru_cache(maxsize=65536)
+def _payable_variants(cost_text: str, unit_counts: Tuple[Tuple[int, int], ...]) -> Tuple[int, ...]:
+    cost = parse_cost(cost_text)
+    ok = (cost.within <= _hitting(unit_counts)).all(axis=1)
+    return tuple(int(v) for v in np.flatnonzero(ok))
+
+
+def can_pay(cost: ManaCost, mana: AvailableMana, life: int = 0) -> bool:
+    """Whether mana (and up to `life` life, for phyrexian symbols) pays cost with X = 0; cached"""
+    if cost.fewest_pips > len(mana):
+        return False
+    return any(cost.variants[v][1] <= life for v in _payable_variants(cost.text, mana.key))
+
+
+def max_x(cost: ManaCost, mana: AvailableMana, life: int = 0) -> Optional[int]:
+    """Largest X the cost can be paid with, or None if it can't be paid at all"""
+    if cost.fewest_pips > len(mana):
+        return None
+    best = None
+    for v in _payable_variants(cost.text, mana.key):
+        pips, life_paid = cost.variants[v]
+        if life_paid <= life:
+            spare = len(mana) - len(pips)
+            x = spare // cost.x if cost.x else 0
+            best = x if best is None else max(best, x)
+    return best
+
+
+def pay(cost: ManaCost, mana: AvailableMana, life: int = 0, x: int = 0) -> Optional[Payment]:
+    """
+    Which units pay cost, or None if it can't be paid
+
+    Units are spent in AvailableMana order. Among payable variants, the one paying the least life is used.
+    """
+    if cost.fewest_pips + x * cost.x > len(mana):
+        return None
+    payable = [v for v in _payable_variants(cost.text, mana.key) if cost.variants[v][1] <= life]
+    if not payable:
+        return None
+    if len(payable) > 1:
+        payable.sort(key=lambda v: cost.variants[v][1])
+    unit_masks = [mask for _, mask in mana.units]
+    for v in payable:
+        pips, life_paid = cost.variants[v]
+        matched = _match(pips + (ANY_MANA,) * (x * cost.x), unit_masks)
+        if matched is None:
+            continue
+        pool = [0] * N_COLORS
+        sources = []
+        for unit_index in matched:
+            source, mask = mana.units[unit_index]
+            if source is None:
+                pool[mask.bit_length() - 1] += 1
+            else:
+                sources.append(source)
+        return Payment(tuple(sources), tuple(pool), life_paid)
+    return None
+
+
+def _match(pips: Sequence[int], unit_masks: Sequence[int]) -> Optional[List[int]]:
+    """
+    Indexes of the units paying pips, or None if there's no complete matching
+
+    pips come most constrained first, so taking the first free unit for each usually works (always with
+    single-color units); otherwise the matching is found with augmenting paths.
+    """
+    used = [False] * len(unit_masks)
+    for pip in pips:
+        unit = next((i for i, mask in enumerate(unit_masks) if not used[i] and mask & pip), None)
+        if unit is None:
+            break
+        used[unit] = True
+    else:
+        return [i for i, in_use in enumerate(used) if in_use]
+
+    owner = [-1] * len(unit_masks)  # pip paid by each unit
+
+    def assign(pip, visited):
+        for unit, mask in enumerate(unit_masks):
+            if mask & pips[pip] and not visited[unit]:
+                visited[unit] = True
+                if owner[unit] < 0 or assign(owner[unit], visited):
+                    owner[unit] = pip
+                    return True
+        return False
+
+    for pip in range(len(pips)):
+        if not assign(pip, [False] * len(unit_masks)):
+            return None
+    return [unit for unit in range(len(unit_masks)) if owner[unit] >= 0]
+
+
+def castable(cards: Sequence, mana: AvailableMana, life: int = 0) -> np.ndarray:
+    """Boolean per card: can its cost (with X = 0) be paid, checked for all cards in one array comparison"""
+    if not cards:
+        return np.zeros(0, dtype=bool)
+    costs = [card_cost(card.printed) for card in cards]
+    within = np.concatenate([cost.within for cost in costs])
+    life_paid = np.concatenate([cost.life for cost in costs])
+    owners = np.repeat(np.arange(len(costs)), [len(cost.variants) for cost in costs])
+    ok = (within <= mana.hitting).all(axis=1) & (life_paid <= life)
+    result = np.zeros(len(costs), dtype=bool)
+    np.logical_or.at(result, owners, ok)
+    return result
@@ -0,0 +1,207 @@
+import math
+import random
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+DEFAULT_BUDGET_MS = 100
+EXPLORATION = math.sqrt(2)
+# Searched decisions remembered across calls, keyed by state
+ROOT_CACHE_SIZE = 4096
+
+# action -> (visits, total reward)
+ActionStats = Dict[str, Tuple[int, float]]
+
+# Per worker process: one Game per (format, deck names), restored from each snapshot it is sent
+_worker_games: dict = {}
+
+
+class Node:
+    """One decision of the searching player; reward is from that player's point of view (win 1, draw 0.5)"""
+    __slots__ = ('visits', 'actions')
+
+    def __init__(self, actions):
+        self.visits = 0
+        self.actions = {action: [0, 0.0] for action in actions}
+
+    def select(self, exploration: float) -> str:
+        """UCB1, trying every action once first"""
+        for action, (visits, _) in self.actions.items():
+            if not visits:
+                return action
+        log_visits = math.log(self.visits)
+        return max(self.actions, key=lambda action: _ucb(*self.actions[action], log_visits, exploration))
+
+    def update(self, action: str, reward: float):
+        self.visits += 1
+        stats = self.actions[action]
+        stats[0] += 1
+        stats[1] += reward
+
+
+def _ucb(visits: int, reward: float, log_parent_visits: float, exploration: float) -> float:
+    return reward / visits + exploration * math.sqrt(log_parent_visits / visits)
+
+
+def state_key(game) -> Hashable:
+    """
+    Transposition key for the searcher's information: the game's Zobrist hash, which leaves out the order of the
+    libraries that nobody can see
+    """
+    return game.state_hash
+
+
+def run_search(game, budget_s: float, seed: int, exploration: float = EXPLORATION,
+               max_turns: int = 60) -> Tuple[ActionStats, int]:
+    """
+    Single-threaded MCTS from the game's current decision point, for budget_s seconds (at least one rollout)
+
+    Every iteration restores the root, reshuffles both libraries (the searcher doesn't know their order),
+    walks the tree through the searching player's decisions with UCB1, answers other players' decisions with
+    the AI rules and plays the rest of the game out. Nodes are shared between paths reaching the same state.
+    The game is left as it was found, RNG state included.
+
+    Returns:
+        (stats of each root action, number of rollouts)
+
+    Raises ValueError if the game has no pending decision to search.
+    """
+    if game.decision_point is None:
+        raise ValueError("run_search needs a pending decision, but game.decision_point is None")
+    root = game.snapshot()
+    root_player = game.players[game.decision_point[1]]
+    rng = random.Random(seed)
+    table: Dict[Hashable, Node] = {}
+    root_node = None
+    rollouts = 0
+    deadline = time.perf_counter() + budget_s
+
+    while True:
+        game.restore(root)
+        game.rng.seed(rng.getrandbits(64))
+        for player in game.players:
+            game.shuffle_deck(player)
+
+        path: List[Tuple[Node, str]] = []
+        while game.decision_point is not None:
+            if game.players[game.decision_point[1]] is root_player:
+                key = state_key(game)
+                node = table.get(key)
+                if node is None:
+                    node = table[key] = Node(game.legal_actions())
+                action = node.select(exploration)
+                path.append((node, action))
+            else:
+                action = game.rule_decision()
+            game.apply_decision(action)
+        root_node = root_node or path[0][0]
+
+        winner = game.play_game(max_turns)
+        reward = 0.5 if winner is None else float(winner is root_player)
+        for node, action in path:
+            node.update(action, reward)
+        rollouts += 1
+        if time.perf_counter() >= deadline:
+            break
+
+    game.restore(root)
+    return {action: tuple(stats) for action, stats in root_node.actions.items()}, rollouts
+
+
+def _search_in_worker(snapshot, game_format: str, budget_s: float, seed: int, exploration: float,
+                      max_turns: int) -> Tuple[ActionStats, int]:
+    from core.game import Game
+
+    key = (game_format, snapshot.deck_names)
+    game = _worker_games.get(key)
+    if game is None:
+        game = _worker_games[key] = Game.from_snapshot(snapshot, game_format)
+    else:
+        game.restore(snapshot)
+    return run_search(game, budget_s, seed, exploration, max_turns)
+
+
+class MonteCarloTreeSearch:
+    """
+    Time-bounded MCTS for PlayerType.MCTS decisions
+
+    Root-parallel over a process pool: each worker searches its own tree from the same snapshot for the whole
+    budget and the root action statistics are summed, so more workers give more rollouts per decision at the
+    same latency. With one worker the search runs in this process. Decisions for a state already searched are
+    answered from a cache keyed by state_key.
+
+    A Game creates a single-worker search for its MCTS players on first use. For parallel rollouts, assign
+    game.search = MonteCarloTreeSearch(workers=n) before the game starts (as benchmarks/mcts.py does). The
+    simulator (core.simulate) only plays AI-rules games and never searches.
+    """
+    def __init__(self, budget_ms: float = DEFAULT_BUDGET_MS, workers: int = 1, exploration: float = EXPLORATION,
+                 max_turns: int = 60, seed: Optional[int] = None):
+        self.budget_ms = budget_ms
+        self.workers = max(1, workers)
+        self.exploration = exploration
+        self.max_turns = max_turns
+        # Own RNG so searching never shifts the game's random stream
+        self._rng = random.Random(seed)
+        self._pool: Optional["ProcessPoolExecutor"] = None  # started on the first multi-worker search
+        self._root_cache: "OrderedDict[Hashable, str]" = OrderedDict()
+        self.decisions = 0
+        self.rollouts = 0
+        self.cache_hits = 0
+
+    def decide(self, game) -> str:
+        key = state_key(game)
+        cached = self._root_cache.get(key)
+        if cached is not None:
+            self._root_cache.move_to_end(key)
+            self.cache_hits += 1
+            return cached
+
+        stats = self.search(game)
+        action = max(stats, key=lambda action: stats[action][0])
+        self._root_cache[key] = action
+        if len(self._root_cache) > ROOT_CACHE_SIZE:
+            self._root_cache.popitem(last=False)
+        return action
+
+    def search(self, game) -> ActionStats:
+        """Root action statistics summed over every worker's tree"""
+        budget_s = self.budget_ms / 1000
+        seeds = [self._rng.getrandbits(64) for _ in range(self.workers)]
+        if self.workers == 1:
+            results = [run_search(game, budget_s, seeds[0], self.exploration, self.max_turns)]
+        else:
+            if self._pool is None:
+                # Imported here: concurrent.futures.process is slow to import and most games search in-process
+                from concurrent.futures import ProcessPoolExecutor
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            n = self.workers
+            results = list(self._pool.map(_search_in_worker, [game.snapshot()] * n, [game.game_format] * n,
+                                          [budget_s] * n, seeds, [self.exploration] * n, [self.max_turns] * n))
+
+        merged = defaultdict(lambda: [0, 0.0])
+        for stats, rollouts in results:
+            self.rollouts += rollouts
+            for action, (visits, reward) in stats.items():
+                merged[action][0] += visits
+                merged[action][1] += reward
+        self.decisions += 1
+        return {action: tuple(stats) for action, stats in merged.items()}
+
+    def stats(self) -> dict:
+        return {
+            "decisions": self.decisions,
+            "rollouts": self.rollouts,
+            "rollouts_per_decision": self.rollouts / self.decisions if self.decisions else 0.0,
+            "cache_hits": self.cache_hits,
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,242 @@
+import json
+import signal
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+# Upper bounds (seconds) of the histogram buckets; a last, unbounded bucket catches the rest
+BUCKETS = (1e-6, 2.5e-6, 1e-5, 2.5e-5, 1e-4, 2.5e-4, 1e-3, 2.5e-3, 1e-2, 2.5e-2, 0.1, 0.25, 1.0)
+PROMETHEUS_PREFIX = 'mtg_'
+# Profiler samples taken outside any timed section
+UNTIMED = 'untimed'
+
+# (metric name, sorted (label, value) pairs)
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, game, labels: dict) -> MetricKey:
+    if game is not None:
+        labels['phase'] = game.turn_phase
+        labels['step'] = game.step
+    return name, tuple(sorted(labels.items()))
+
+
+class Histogram:
+    __slots__ = ('buckets', 'count', 'sum')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, buckets: List[int], count: int, total: float):
+        for i, n in enumerate(buckets):
+            self.buckets[i] += n
+        self.count += count
+        self.sum += total
+
+
+class Timer:
+    """Times a with block into a histogram and marks it as the active section for the SamplingProfiler"""
+    __slots__ = ('metrics', 'name', 'game', 'labels', 'start')
+
+    def __init__(self, metrics: "Metrics", name: str, game, labels: dict):
+        self.metrics = metrics
+        self.name = name
+        self.game = game
+        self.labels = labels
+
+    def __enter__(self):
+        self.metrics.active.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        self.metrics.active.pop()
+        self.metrics.observe(self.name, elapsed, self.game, **self.labels)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    Process-wide counters and timing histograms for the game loop, disabled by default
+
+    Metrics are labelled by Game.turn_phase and Game.step when a game is passed, plus any keyword labels.
+    While disabled, timer() returns a shared no-op context manager and count()/observe() return at once, so
+    hot paths only check `METRICS.enabled` before doing any work.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.counters: Dict[MetricKey, float] = {}
+        self.histograms: Dict[MetricKey, Histogram] = {}
+        # Names of the timers currently running, innermost last
+        self.active: List[str] = []
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.counters.clear()
+        self.histograms.clear()
+
+    def count(self, name: str, amount: float = 1, game=None, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, game, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, game=None, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, game, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    def timer(self, name: str, game=None, **labels):
+        """Context manager timing its block into the histogram `name`"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return Timer(self, name, game, labels)
+
+    def state(self) -> dict:
+        """Picklable copy of everything recorded, e.g. to send from a worker process to merge()"""
+        return {
+            'counters': dict(self.counters),
+            'histograms': {key: (list(h.buckets), h.count, h.sum) for key, h in self.histograms.items()},
+        }
+
+    def merge(self, state: dict):
+        for key, value in state['counters'].items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, (buckets, count, total) in state['histograms'].items():
+            self.histograms.setdefault(key, Histogram()).merge(buckets, count, total)
+
+    def to_json(self) -> dict:
+        return {
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                         for (name, labels), value in sorted(self.counters.items())],
+            'histograms': [{'name': name, 'labels': dict(labels), 'count': h.count, 'sum': h.sum,
+                            'buckets': dict(zip([*map(str, BUCKETS), '+Inf'], h.buckets))}
+                           for (name, labels), h in sorted(self.histograms.items())],
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format: counters as <name>_total, histograms in seconds"""
+        lines = []
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            metric = f'{PROMETHEUS_PREFIX}{name}_total'
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric}{_prometheus_labels(labels)} {value}')
+
+        for (name, labels), h in sorted(self.histograms.items()):
+            metric = f'{PROMETHEUS_PREFIX}{name}_seconds'
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f'# TYPE {metric} histogram')
+            cumulative = 0
+            for bound, n in zip([*map(repr, BUCKETS), '+Inf'], h.buckets):
+                cumulative += n
+                lines.append(f'{metric}_bucket{_prometheus_labels(labels, le=bound)} {cumulative}')
+            lines.append(f'{metric}_sum{_prometheus_labels(labels)} {h.sum!r}')
+            lines.append(f'{metric}_count{_prometheus_labels(labels)} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: Union[str, Path]):
+        """Writes Prometheus text if path ends in .prom, JSON otherwise"""
+        path = Path(path)
+        if path.suffix == '.prom':
+            path.write_text(self.to_prometheus(), encoding='utf-8')
+        else:
+            path.write_text(json.dumps(self.to_json(), indent=2), encoding='utf-8')
+
+
+def _prometheus_labels(labels, **extra) -> str:
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in pairs)
+    return '{' + ','.join(f'{label}="{value}"' for (label, _), value in zip(pairs, escaped)) + '}'
+
+
+METRICS = Metrics()
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: every interval seconds of CPU time, counts where the main thread is
+
+    Each sample is attributed to the innermost running Metrics timer (or UNTIMED) and to the turn phase and
+    step of the game found on the stack, and recorded as the `profile_samples` counter; multiply by interval
+    for an estimate of the time spent. Samples come from a SIGPROF timer rather than a thread, as a sampling
+    thread only gets the GIL when the game releases it and so would mostly see numpy calls. Unix only, and
+    must be started from the main thread.
+    """
+    def __init__(self, metrics: Metrics = METRICS, interval: float = 0.001):
+        self.metrics = metrics
+        self.interval = interval
+        self.samples = 0
+        self._previous_handler = None
+
+    def start(self):
+        if not hasattr(signal, 'setitimer'):
+            raise RuntimeError("SamplingProfiler needs signal.setitimer, which this platform doesn't have")
+        self.metrics.enable()
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        if self._previous_handler is not None:
+            signal.signal(signal.SIGPROF, self._previous_handler)
+            self._previous_handler = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _sample(self, signum, frame):
+        active = self.metrics.active
+        self.metrics.count('profile_samples', game=_game_on_stack(frame), section=active[-1] if active else UNTIMED)
+        self.samples += 1
+
+
+def _game_on_stack(frame):
+    """The innermost `self` or `game` local on the stack that has a turn phase, i.e. the Game being played"""
+    while frame is not None:
+        local_vars = frame.f_locals
+        for name in ('self', 'game'):
+            candidate = local_vars.get(name)
+            if hasattr(candidate, 'turn_phase') and hasattr(candidate, 'step'):
+                return candidate
+        frame = frame.f_back
+    return None
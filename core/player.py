@@ -1,12 +1,25 @@
+from array import array
 from enum import Enum, auto
 
+from core.metrics import METRICS
+from core.zones import Library, Zone
+
+# Mana pool slots, indexed by color letter
+MANA_COLORS = ('W', 'U', 'B', 'R', 'G', 'C')
+COLOR_INDEX = {color: i for i, color in enumerate(MANA_COLORS)}
+
 
 class PlayerType(Enum):
     HUMAN = auto()
     AI = auto()
+    MCTS = auto()  # searches with core.mcts instead of following the AI rules
 
 
 class Player:
+    __slots__ = ('name', 'type', 'life_total', 'life_lost_this_turn', 'life_gained_this_turn',
+                 'poison_counters', 'mana_pool', 'deck_archetype', 'deck_name', 'deck_features',
+                 'hand', 'graveyard', 'library')
+
     def __init__(self, name: str, playerType: PlayerType) -> None:
         self.name = name
         self.type = playerType
@@ -14,13 +27,23 @@ class Player:
         self.life_lost_this_turn = 0
         self.life_gained_this_turn = 0
         self.poison_counters = 0
-        self.mana_pool = {
-            'W': 0, 'U': 0, 'B': 0, 'R': 0, 'G': 0, 'C': 0
-        }
+        self.mana_pool = array('i', [0] * len(MANA_COLORS))
         self.deck_archetype = {}
-        self.hand = []
-        self.graveyard = []
-        self.library = []
+        self.deck_name = None
+        self.deck_features = None
+        self.hand = Zone()
+        self.graveyard = Zone()
+        self.library = Library()
+
+    def add_mana(self, color: str, amount: int = 1):
+        self.mana_pool[COLOR_INDEX[color]] += amount
+
+    def mana_of(self, color: str) -> int:
+        return self.mana_pool[COLOR_INDEX[color]]
+
+    def empty_mana_pool(self):
+        for i in range(len(self.mana_pool)):
+            self.mana_pool[i] = 0
 
     def draw_card(self, game, amount=1):
         """
@@ -31,14 +54,18 @@ class Player:
             list: Drawn cards (may be shorter than amount if library empties)
             or None if player loses during draw
         """
-        drawn_cards = []
-        for _ in range(amount):
-            if not self.library:
-                game.queue_event("player_loses", player=self, reason="empty_library")
-                return None
-
-            card = self.library.pop(0)
-            self.hand.append(card)
-            drawn_cards.append(card)
-            game.queue_event("card_drawn", player=self, meta_data={'reason': 'empty_library'})
-        return drawn_cards
+        with METRICS.timer('draw', game):
+            drawn_cards = []
+            for _ in range(amount):
+                card = game.zones.draw(self)
+                if card is None:
+                    if drawn_cards:
+                        game.queue_event("card_drawn", player=self, meta_data={'cards': drawn_cards})
+                    game.queue_event("player_loses", player=self, meta_data={'reason': 'empty_library'})
+                    return None
+                drawn_cards.append(card)
+            # One event per draw instruction rather than per card
+            game.queue_event("card_drawn", player=self, meta_data={'cards': drawn_cards})
+            if METRICS.enabled:
+                METRICS.count('cards_drawn', len(drawn_cards), game)
+            return drawn_cards
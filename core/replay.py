@@ -0,0 +1,196 @@
+import argparse
+import struct
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from core.game import Game
+from core.player import PlayerType
+
+MAGIC = b'MTGR'
+VERSION = 2
+NO_WINNER = 255
+
+# magic, version, seed, player types, winner index, turn count, final state hash, number of actions
+_HEADER = struct.Struct('<4sBQBBBHQH')
+_RECORD_LENGTH = struct.Struct('<I')
+# byte length of a UTF-8 format or deck name
+_STRING_LENGTH = struct.Struct('<H')
+
+
+class ReplayMismatch(Exception):
+    """A replayed game ended differently from its log, e.g. because the rules or a deck changed since"""
+
+
+class ActionLog:
+    """
+    Everything needed to re-run one game: its seed, the players' types and decks, and every decision taken
+
+    The log also keeps how the game ended (winner, turn count and Zobrist state hash) so a replay can check
+    it came out the same. Serialized as a small fixed header, then length-prefixed strings and one byte per
+    action, typically under 100 bytes a game.
+    """
+    __slots__ = ('seed', 'game_format', 'player_types', 'deck_names', 'actions', 'winner', 'turn_count',
+                 'state_hash')
+
+    def __init__(self, seed: int, game_format: str, player_types: Tuple[PlayerType, ...],
+                 deck_names: Tuple[str, ...], actions: Tuple[str, ...], winner: Optional[int],
+                 turn_count: int, state_hash: int):
+        self.seed = seed
+        self.game_format = game_format
+        self.player_types = player_types
+        self.deck_names = deck_names
+        self.actions = actions
+        self.winner = winner
+        self.turn_count = turn_count
+        self.state_hash = state_hash
+
+    @classmethod
+    def from_game(cls, game: Game, winner) -> "ActionLog":
+        """Log of a finished game; the game must have been created with a seed"""
+        if game.seed is None:
+            raise ValueError("Only games created with a seed can be logged")
+        return cls(
+            seed=game.seed,
+            game_format=game.game_format,
+            player_types=tuple(player.type for player in game.players),
+            deck_names=tuple(player.deck_name for player in game.players),
+            actions=tuple(game.action_log),
+            winner=None if winner is None else game.players.index(winner),
+            turn_count=game.turn_count,
+            state_hash=game.state_hash,
+        )
+
+    def to_bytes(self) -> bytes:
+        # Reducing an out-of-range seed would log a different game, since random.Random uses all of its bits
+        if not 0 <= self.seed < 1 << 64:
+            raise ValueError(f"Only games seeded with an unsigned 64-bit int can be logged, not {self.seed}")
+        player_types = 0
+        for i, player_type in enumerate(self.player_types):
+            player_types |= player_type.value << (4 * i)
+        header = _HEADER.pack(MAGIC, VERSION, self.seed, player_types,
+                              NO_WINNER if self.winner is None else self.winner,
+                              len(self.deck_names), self.turn_count, self.state_hash, len(self.actions))
+        strings = b''.join(_pack_string(text) for text in (self.game_format, *self.deck_names))
+        return header + strings + ''.join(self.actions).encode('ascii')
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ActionLog":
+        (magic, version, seed, player_types, winner, n_players, turn_count, state_hash,
+         n_actions) = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not an action log")
+        if version != VERSION:
+            raise ValueError(f"Unsupported action log version {version}")
+
+        offset = _HEADER.size
+        game_format, offset = _unpack_string(data, offset)
+        deck_names = []
+        for _ in range(n_players):
+            deck_name, offset = _unpack_string(data, offset)
+            deck_names.append(deck_name)
+        actions = tuple(data[offset:offset + n_actions].decode('ascii'))
+
+        return cls(
+            seed=seed,
+            game_format=game_format,
+            player_types=tuple(PlayerType((player_types >> (4 * i)) & 0xF) for i in range(n_players)),
+            deck_names=tuple(deck_names),
+            actions=actions,
+            winner=None if winner == NO_WINNER else winner,
+            turn_count=turn_count,
+            state_hash=state_hash,
+        )
+
+
+def _pack_string(text: str) -> bytes:
+    encoded = text.encode('utf-8')
+    if len(encoded) > 0xFFFF:
+        raise ValueError(f"'{text[:40]}...' is longer than {0xFFFF} UTF-8 bytes")
+    return _STRING_LENGTH.pack(len(encoded)) + encoded
+
+
+def _unpack_string(data: bytes, offset: int) -> Tuple[str, int]:
+    (length,) = _STRING_LENGTH.unpack_from(data, offset)
+    offset += _STRING_LENGTH.size
+    return data[offset:offset + length].decode('utf-8'), offset + length
+
+
+def write_logs(path, logs) -> None:
+    """Appends serialized ActionLogs (bytes) to a log file, each prefixed with its length"""
+    with open(path, 'ab') as f:
+        for log in logs:
+            f.write(_RECORD_LENGTH.pack(len(log)))
+            f.write(log)
+
+
+def read_logs(path) -> Iterator[ActionLog]:
+    data = Path(path).read_bytes()
+    offset = 0
+    while offset < len(data):
+        (length,) = _RECORD_LENGTH.unpack_from(data, offset)
+        offset += _RECORD_LENGTH.size
+        yield ActionLog.from_bytes(data[offset:offset + length])
+        offset += length
+
+
+def replay(log: ActionLog, max_turns: int = 60, verify: bool = True) -> Game:
+    """
+    Re-runs a logged game and returns it finished
+
+    The logged actions are applied directly, so no decision is evaluated: no win-rate lookups, features or
+    search. With verify, raises ReplayMismatch if the game doesn't end exactly as logged.
+    """
+    if PlayerType.HUMAN in log.player_types:
+        raise ValueError("Games with human players can't be replayed (their deck choice isn't logged)")
+
+    game = Game(*log.player_types, game_format=log.game_format, seed=log.seed)
+    game.begin_opening()
+    if verify and tuple(player.deck_name for player in game.players) != log.deck_names:
+        raise ReplayMismatch(f"Replay chose decks {[p.deck_name for p in game.players]}, log has {log.deck_names}")
+
+    for action in log.actions:
+        if game.decision_point is None:
+            raise ReplayMismatch("Log has more actions than the game has decisions")
+        try:
+            game.apply_decision(action)
+        except ValueError as e:
+            raise ReplayMismatch(f"Logged action doesn't fit the replayed game: {e}") from e
+    if game.decision_point is not None:
+        raise ReplayMismatch("Log ended before the opening decisions were done")
+
+    winner = game.play_game(max_turns)
+    if verify:
+        winner_index = None if winner is None else game.players.index(winner)
+        if (winner_index, game.turn_count, game.state_hash) != (log.winner, log.turn_count, log.state_hash):
+            raise ReplayMismatch(f"Replay ended with winner {winner_index} on turn {game.turn_count}, "
+                                 f"log has winner {log.winner} on turn {log.turn_count}")
+    return game
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-run games from an action log file")
+    parser.add_argument("path", help="log file written by `python -m core.simulate --log`")
+    parser.add_argument("--index", type=int, help="replay only the game at this position in the file")
+    args = parser.parse_args(argv)
+
+    logs: List[ActionLog] = list(read_logs(args.path))
+    if args.index is not None:
+        logs = [logs[args.index]]
+
+    mismatches = 0
+    start = time.perf_counter()
+    for i, log in enumerate(logs):
+        try:
+            replay(log)
+        except ReplayMismatch as e:
+            mismatches += 1
+            print(f"game {i} (seed {log.seed}): {e}")
+    elapsed = time.perf_counter() - start
+
+    print(f"Replayed {len(logs)} games in {elapsed:.2f}s "
+          f"({1000 * elapsed / max(1, len(logs)):.2f} ms/game), {mismatches} mismatched")
+
+
+if __name__ == '__main__':
+    main()
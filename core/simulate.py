@@ -0,0 +1,171 @@
+import argparse
+import hashlib
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from core.decisions import DecisionBroker, RuleModel, run_inline
+from core.game import Game
+from core.metrics import METRICS, SamplingProfiler
+from core.player import PlayerType
+from core.replay import ActionLog, write_logs
+from data.historical_repository import HistoricalRepository
+
+# (deck, opponent deck, played_first) -> [wins, games]
+ResultTally = Dict[Tuple[str, str, bool], list]
+
+
+def game_seed(master_seed: int, game_index: int) -> int:
+    """64-bit seed of one game's RNG stream, derived from the master seed and the game's index in the run"""
+    digest = hashlib.blake2b(f'{master_seed}:{game_index}'.encode('ascii'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def play_batch(n_games: int, seed: int, game_format: str = "sparky", batch_size: int = 0,
+               first_game: int = 0, record: bool = False) -> Tuple[ResultTally, int, List[bytes]]:
+    """
+    Plays games first_game .. first_game + n_games - 1 of the run with master seed `seed`, AI vs AI
+
+    Each game has its own RNG seeded with game_seed(seed, index), so results don't depend on how games are
+    split into batches. With a batch_size, up to that many games run at once through a DecisionBroker and
+    their AI decisions are answered in batches by a RuleModel; otherwise games run one after another,
+    deciding one call at a time.
+
+    Returns:
+        (tally of results from both players' perspective, number of drawn games,
+         serialized ActionLogs of every game if record is set)
+    """
+    tally: ResultTally = defaultdict(lambda: [0, 0])
+    draws = 0
+    logs = []
+
+    games = (_played(Game(player1_type=PlayerType.AI, player2_type=PlayerType.AI, game_format=game_format,
+                          seed=game_seed(seed, first_game + i)), record)
+             for i in range(n_games))
+    if batch_size:
+        outcomes = DecisionBroker(RuleModel(), batch_size).run(games)
+    else:
+        outcomes = (run_inline(game) for game in games)
+
+    for outcome, log in outcomes:
+        if log is not None:
+            logs.append(log)
+        if outcome is None:
+            draws += 1
+            continue
+        for key, won in outcome:
+            tally[key][0] += won
+            tally[key][1] += 1
+
+    return dict(tally), draws, logs
+
+
+def _played(game: Game, record: bool = False):
+    """
+    Plays a game as a generator (see Game.game_steps)
+
+    Returns:
+        (each player's (tally key, won) for the matchup and for the deck in general, or None on a draw; the
+         game's serialized ActionLog if record is set)
+    """
+    winner = yield from game.game_steps()
+    log = ActionLog.from_game(game, winner).to_bytes() if record else None
+    if winner is None:
+        return None, log
+    return [((player.deck_name, opponent_deck, player is game.first_player), player is winner)
+            for player in game.players for opponent_deck in (game._get_opponent(player).deck_name, None)], log
+
+
+def _measured_batch(profile: bool, *args):
+    """play_batch with metrics enabled in the worker; returns its result and the worker's recorded metrics"""
+    METRICS.reset()
+    METRICS.enable()
+    if profile:
+        with SamplingProfiler():
+            result = play_batch(*args)
+    else:
+        result = play_batch(*args)
+    return result, METRICS.state()
+
+
+def _split_games(n_games: int, n_batches: int) -> list[int]:
+    base, extra = divmod(n_games, n_batches)
+    return [base + (i < extra) for i in range(n_batches) if base + (i < extra)]
+
+
+def simulate(n_games: int, workers: int, seed: int, game_format: str = "sparky", batches_per_worker: int = 4,
+             decision_batch_size: int = 0, log_path=None, metrics: bool = False,
+             profile: bool = False) -> Tuple[ResultTally, int]:
+    """
+    Distributes n_games over a process pool and merges the per-batch tallies
+
+    Every game is seeded from (seed, game index), so results depend on the seed but not on the worker count or
+    decision batch size. With a log_path, every game's ActionLog is appended to that file (see core.replay).
+    With metrics (or profile, which also runs a SamplingProfiler in each worker), the workers' metrics are
+    merged into this process's METRICS.
+    """
+    batch_sizes = _split_games(n_games, max(1, workers * batches_per_worker))
+    first_games = [sum(batch_sizes[:i]) for i in range(len(batch_sizes))]
+    n_batches = len(batch_sizes)
+
+    merged: ResultTally = defaultdict(lambda: [0, 0])
+    total_draws = 0
+    batch_args = (batch_sizes, [seed] * n_batches, [game_format] * n_batches, [decision_batch_size] * n_batches,
+                  first_games, [log_path is not None] * n_batches)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if metrics or profile:
+            METRICS.enable()
+            outcomes = pool.map(_measured_batch, [profile] * n_batches, *batch_args)
+        else:
+            outcomes = ((result, None) for result in pool.map(play_batch, *batch_args))
+        for (tally, draws, logs), state in outcomes:
+            if state is not None:
+                METRICS.merge(state)
+            total_draws += draws
+            for key, (wins, games) in tally.items():
+                merged[key][0] += wins
+                merged[key][1] += games
+            if log_path is not None:
+                write_logs(log_path, logs)
+
+    return dict(merged), total_draws
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless AI-vs-AI games and record win rates")
+    parser.add_argument("--games", type=int, default=1000, help="number of games to play")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="master seed")
+    parser.add_argument("--format", default="sparky", help="game format")
+    parser.add_argument("--decision-batch-size", type=int, default=0,
+                        help="run this many games at once per worker and batch their AI decisions")
+    parser.add_argument("--log", help="append every game's action log to this file, for python -m core.replay")
+    parser.add_argument("--metrics", help="write game-loop metrics to this file (Prometheus text if it ends in "
+                                              ".prom, JSON otherwise)")
+    parser.add_argument("--profile", action="store_true",
+                        help="also sample where time goes, by metrics section and turn phase (needs --metrics)")
+    parser.add_argument("--no-save", action="store_true", help="don't merge results into the historical data")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    tally, draws = simulate(args.games, args.workers, args.seed, args.format,
+                           decision_batch_size=args.decision_batch_size, log_path=args.log,
+                           metrics=args.metrics is not None, profile=args.profile)
+    elapsed = time.perf_counter() - start
+
+    print(f"Played {args.games} games ({draws} drawn) on {args.workers} workers "
+          f"in {elapsed:.2f}s ({args.games / elapsed:.1f} games/sec)")
+
+    if not args.no_save:
+        repository = HistoricalRepository()
+        repository.merge_results(tally, format=args.format)
+        repository.compact(args.format)
+        print(f"Merged results into historical '{args.format}' data")
+    if args.metrics:
+        METRICS.write(args.metrics)
+
+
+if __name__ == '__main__':
+    main()
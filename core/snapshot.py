@@ -0,0 +1,256 @@
+from array import array
+from operator import attrgetter
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from core.archetypes import ArchetypeClassifier
+from core.zones import Library, Zone
+
+NO_CONTROLLER = 255
+# Stands for "not on the battlefield" where None is a possible controller
+_OFF_BATTLEFIELD = object()
+
+IdTuple = Tuple[int, ...]
+
+
+class PlayerSnapshot(NamedTuple):
+    life_total: int
+    life_lost_this_turn: int
+    life_gained_this_turn: int
+    poison_counters: int
+    mana_pool: Tuple[int, ...]
+    hand: IdTuple
+    library: IdTuple
+    graveyard: IdTuple
+
+
+class GameSnapshot(NamedTuple):
+    """
+    Every piece of mutable Game state, with cards stored by Card.id and players by their index in Game.players
+
+    Immutable and picklable, so one snapshot can be restored any number of times or shipped to another process.
+    Decks themselves are not copied: deck_names is enough to rebuild the same numbered cards (Game.from_snapshot).
+    """
+    deck_names: Tuple[str, ...]
+    players: Tuple[PlayerSnapshot, ...]
+    battlefield: IdTuple
+    stack: IdTuple
+    exile: IdTuple
+    tapped: bytes               # per card id
+    controllers: bytes          # per card id, NO_CONTROLLER if none
+    counters: Tuple[Tuple[int, Tuple[Tuple[str, int], ...]], ...]  # (card id, counters) for cards with any
+    turn_count: int
+    turn_phase: str
+    step: str
+    decision_point: Optional[Tuple[str, int, int]]
+    action_log: Tuple[str, ...]
+    current_player: int
+    active_player: int
+    first_player: int
+    losers: IdTuple
+    life_changes_this_turn: Tuple[Tuple[int, int], ...]
+    creatures_died_this_turn: IdTuple
+    spells_cast_this_turn: IdTuple
+    seen_cards: Tuple[frozenset, ...]
+    suspected_archetypes: Tuple[Optional[str], ...]
+    rng_state: tuple  # Game.rng
+
+
+_card_id = attrgetter('id')
+
+
+def _ids(cards) -> IdTuple:
+    return tuple(map(_card_id, cards))
+
+
+def take_snapshot(game) -> GameSnapshot:
+    players = game.players
+    index = {player: i for i, player in enumerate(players)}
+    cards = game.cards
+
+    controllers = bytearray([NO_CONTROLLER]) * len(cards)
+    tapped = bytearray(len(cards))
+    counters = []
+    for card in cards:
+        if card.controller is not None:
+            controllers[card.id] = index[card.controller]
+        if card.tapped:
+            tapped[card.id] = 1
+        if card.counters:
+            counters.append((card.id, tuple(sorted(card.counters.items()))))
+
+    snapshot = GameSnapshot(
+        deck_names=tuple(player.deck_name for player in players),
+        players=tuple(
+            PlayerSnapshot(player.life_total, player.life_lost_this_turn, player.life_gained_this_turn,
+                           player.poison_counters, tuple(player.mana_pool),
+                           _ids(player.hand), _ids(player.library), _ids(player.graveyard))
+            for player in players),
+        battlefield=_ids(game.battlefield),
+        stack=_ids(game.stack),
+        exile=_ids(game.exile),
+        tapped=bytes(tapped),
+        controllers=bytes(controllers),
+        counters=tuple(counters),
+        turn_count=game.turn_count,
+        turn_phase=game.turn_phase,
+        step=game.step,
+        decision_point=game.decision_point,
+        action_log=tuple(game.action_log),
+        current_player=index[game.current_player],
+        active_player=index[game.active_player],
+        first_player=index[game.first_player],
+        losers=tuple(index[player] for player in game.losers),
+        life_changes_this_turn=tuple((index[player], delta) for player, delta in game.life_changes_this_turn),
+        creatures_died_this_turn=_ids(game.creatures_died_this_turn),
+        spells_cast_this_turn=_ids(game.spells_cast_this_turn),
+        seen_cards=tuple(frozenset(game.seen_cards[player]) for player in players),
+        suspected_archetypes=tuple(game.suspected_archetypes[player] for player in players),
+        rng_state=game.rng.getstate(),
+    )
+    game.zones.changed_since(snapshot)
+    return snapshot
+
+
+def restore_snapshot(game, snapshot: GameSnapshot) -> None:
+    """
+    Puts game back into the state captured by snapshot
+
+    Only the cards and zones that can differ are rewritten: those the game's ZoneManager recorded as changed
+    since its base snapshot, plus those that differ between the base and snapshot when they aren't the same
+    one. Restoring the snapshot a game was last taken or restored at, the usual case in search, therefore
+    costs time in proportion to what changed since, not to the number of cards. Without a base (nothing
+    taken or restored yet) everything is rewritten.
+    """
+    players = game.players
+    cards = game.cards
+
+    for player, saved in zip(players, snapshot.players):
+        player.life_total = saved.life_total
+        player.life_lost_this_turn = saved.life_lost_this_turn
+        player.life_gained_this_turn = saved.life_gained_this_turn
+        player.poison_counters = saved.poison_counters
+        player.mana_pool = array('i', saved.mana_pool)
+
+    zones = game.zones
+    saved_zones = _zone_ids(snapshot, players)
+    base = zones.base
+    if base is None:
+        changed_cards = range(len(cards))
+        changed_zones = set(saved_zones)
+    else:
+        changed_cards = set(zones.changed_cards)
+        changed_zones = set(zones.changed_zones)
+        if base is not snapshot:
+            changed_cards.update(_differing_cards(base, snapshot))
+            base_zones = _zone_ids(base, players)
+            changed_zones.update(key for key, ids in saved_zones.items() if base_zones[key] != ids)
+
+    # Changed permanents leave the indexes while their old controller and tapped state are still in place
+    registered = {}  # card id -> controller, for changed cards that were on the battlefield
+    for card_id in changed_cards:
+        card = cards[card_id]
+        if card.zone == 'battlefield':
+            registered[card_id] = card.controller
+            zones.unindex(card)
+
+    for key in changed_zones:
+        name, player = key
+        ids = saved_zones[key]
+        zone = zones.zone(name, player)
+        if _ids(zone) != ids:
+            restored = _in_zone(cards, ids, name)
+            setattr(zones if player is None else player, name,
+                    Library(restored) if name == 'library' else Zone(restored))
+
+    controller_of = {**dict(enumerate(players)), NO_CONTROLLER: None}
+    counters_of = dict(snapshot.counters)
+    for card_id in changed_cards:
+        card = cards[card_id]
+        controller = controller_of[snapshot.controllers[card_id]]
+        if card.controller is not controller:
+            card.controller = controller
+        tapped = snapshot.tapped[card_id]
+        if card.tapped != tapped:
+            card.tapped = bool(tapped)
+        counters = dict(counters_of.get(card_id, ()))
+        if card.counters != counters:
+            card.counters = counters
+        if card.zone == 'battlefield':
+            zones.index_card(card)
+        _sync_registered_abilities(game, card, registered.get(card_id, _OFF_BATTLEFIELD))
+    zones.changed_since(snapshot)
+
+    game.turn_count = snapshot.turn_count
+    game.turn_phase = snapshot.turn_phase
+    game.step = snapshot.step
+    game.decision_point = snapshot.decision_point
+    game.action_log = list(snapshot.action_log)
+    game.current_player = players[snapshot.current_player]
+    game.active_player = players[snapshot.active_player]
+    game.first_player = players[snapshot.first_player]
+    game.losers = [players[i] for i in snapshot.losers]
+    game.life_changes_this_turn = [(players[i], delta) for i, delta in snapshot.life_changes_this_turn]
+    game.creatures_died_this_turn = [cards[i] for i in snapshot.creatures_died_this_turn]
+    game.spells_cast_this_turn = [cards[i] for i in snapshot.spells_cast_this_turn]
+    game.event_queue = []
+
+    for player, seen, suspected in zip(players, snapshot.seen_cards, snapshot.suspected_archetypes):
+        if game.seen_cards[player] != seen:
+            game.seen_cards[player] = set(seen)
+            _rebuild_tracker(game, player, seen)
+        game.suspected_archetypes[player] = suspected
+
+    game.rng.setstate(snapshot.rng_state)
+
+
+def _in_zone(cards, ids: IdTuple, zone: str) -> list:
+    moved = [cards[i] for i in ids]
+    for card in moved:
+        card.zone = zone
+    return moved
+
+
+def _zone_ids(snapshot: GameSnapshot, players) -> dict:
+    """Card ids in each zone of snapshot, keyed like ZoneManager.zone_key"""
+    zone_ids = {('battlefield', None): snapshot.battlefield, ('stack', None): snapshot.stack,
+                ('exile', None): snapshot.exile}
+    for player, saved in zip(players, snapshot.players):
+        zone_ids['hand', player] = saved.hand
+        zone_ids['library', player] = saved.library
+        zone_ids['graveyard', player] = saved.graveyard
+    return zone_ids
+
+
+def _differing_cards(a: GameSnapshot, b: GameSnapshot) -> set:
+    """Ids of cards whose controller, tapped state, counters or presence on the battlefield differ"""
+    ids = set(np.flatnonzero(np.frombuffer(a.controllers, np.uint8) != np.frombuffer(b.controllers, np.uint8))
+              .tolist())
+    ids.update(np.flatnonzero(np.frombuffer(a.tapped, np.uint8) != np.frombuffer(b.tapped, np.uint8)).tolist())
+    ids.update(card_id for card_id, _ in set(a.counters) ^ set(b.counters))
+    ids.update(set(a.battlefield) ^ set(b.battlefield))
+    return ids
+
+
+def _sync_registered_abilities(game, card, registered_controller) -> None:
+    """Re-registers a card's triggered abilities if it left, entered or changed controller on the battlefield"""
+    controller = card.controller if card.zone == 'battlefield' else _OFF_BATTLEFIELD
+    if controller is registered_controller:
+        return
+    if registered_controller is not _OFF_BATTLEFIELD:
+        for ability in card.abilities:
+            game.events.unregister(ability)
+    if controller is not _OFF_BATTLEFIELD:
+        for ability in card.abilities:
+            if 'battlefield' in ability.effect_config.get('zones', ('battlefield',)):
+                game.events.register(ability, controller)
+
+
+def _rebuild_tracker(game, observer, seen: frozenset) -> None:
+    game._archetype_trackers.pop(observer, None)
+    if seen:
+        classifier = game.archetype_classifier or ArchetypeClassifier.for_format(game.game_format)
+        tracker = game._archetype_trackers[observer] = classifier.new_tracker()
+        for name in seen:
+            tracker.reveal(name)
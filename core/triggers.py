@@ -4,15 +4,19 @@ from typing import Callable, Dict, Any
 class TriggerType(Enum):
     CREATURE_DIES = "CREATURE_DIES"
     CREAUTURE_ETB = "CREATURE_ETB"
+    DAMAGE_DEALT = "DAMAGE_DEALT"
+    ZONE_CHANGE = "ZONE_CHANGE"
 
 class TriggerScope(Enum):
     ANY_PLAYER = "ANY_PLAYER"
     OPPONENT_CONTROLLED = "OPPONENT_CONTROLLED"
     YOU_CONTROLLED = "YOU_CONTROLLED"
+    SOURCE = "SOURCE"  # only events whose 'source' is the ability's own card
 
 class EffectType(Enum):
     ADD_COUNTERS = "ADD_COUNTERS"
     DRAW_CARD = "DRAW_CARD"
+    DESTROY_TARGET = "DESTROY_TARGET"
 
 class TriggeredAbility:
     def __init__(
@@ -21,13 +25,16 @@ class TriggeredAbility:
     scope: TriggerScope,
     effect_type: EffectType,
     effect_config: Dict[str, Any],
-    condition: Callable[[Dict], bool] = None
+    condition: Callable[[Dict], bool] = None,
+    source=None
     ):
         self.trigger_type = trigger_type
         self.scope = scope
         self.effect_type = effect_type
         self.effect_config = effect_config
         self.condition = condition or (lambda _: True)
+        self.source = source
+        self.controller = None
 
     def execute(self, game, event_data: Dict):
         if self._should_trigger(event_data):
@@ -38,9 +45,11 @@ class TriggeredAbility:
         scope_ok = (
             (self.scope == TriggerScope.ANY_PLAYER) or
             (self.scope == TriggerScope.OPPONENT_CONTROLLED and
-             game.is_opponent(event_data['controller'])) or
+             event_data['controller'] is not self.controller) or
             (self.scope == TriggerScope.YOU_CONTROLLED and
-             not game.is_opponent(event_data['controller']))
+             event_data['controller'] is self.controller) or
+            (self.scope == TriggerScope.SOURCE and
+             event_data.get('source') is self.source)
         )
         return scope_ok and self.condition(event_data)
 
@@ -50,6 +59,8 @@ class TriggeredAbility:
             self._add_counters(game)
         elif self.effect_type == EffectType.DRAW_CARD:
             self._draw_card(game)
+        elif self.effect_type == EffectType.DESTROY_TARGET:
+            self._destroy_target(game, event_data)
 
     def _add_counters(self, game):
         target = self._resolve_target(self.effect_config['target'])
@@ -57,4 +68,12 @@ class TriggeredAbility:
             target,
             self.effect_config['counter_type'],
             self.effect_config.get('amount', 1),
-        )
\ No newline at end of file
+        )
+
+    def _draw_card(self, game):
+        self.controller.draw_card(game, amount=self.effect_config.get('amount', 1))
+
+    def _destroy_target(self, game, event_data: Dict):
+        target = event_data.get('target')
+        if target is not None and getattr(target, 'zone', None) == 'battlefield':
+            game.destroy(target)
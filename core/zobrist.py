@@ -0,0 +1,78 @@
+import hashlib
+from functools import lru_cache
+
+from core.Card import HashedCard
+
+# (card id, field, value) -> key; a plain dict is faster than zobrist_key's cache on the per-card hot path
+_card_keys = {}
+
+
+@lru_cache(maxsize=None)
+def zobrist_key(*parts) -> int:
+    """
+    64-bit random key for one feature of the game state, e.g. ('zone', card id, 'hand')
+
+    Derived from the parts themselves rather than drawn from an RNG, so keys (and hashes) are the same in every
+    process and don't depend on the order they were first asked for.
+    """
+    return int.from_bytes(hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class ZobristHash:
+    """
+    XOR of the Zobrist keys of every attached card's zone, controller, tapped state and counters
+
+    Cards report their own changes (see HashedCard), so moving or tapping a card updates the hash in O(1). Only zone
+    membership is hashed, not the order of cards within a zone. Nothing is tracked until the first call to
+    track, so games that never ask for a hash don't pay for one.
+    """
+    __slots__ = ('value', 'tracking', '_player_index')
+
+    def __init__(self, players):
+        self.value = 0
+        self.tracking = False
+        self._player_index = {player: i for i, player in enumerate(players)}
+
+    def track(self, cards) -> None:
+        """Starts keeping the hash of cards, and of any card attached later"""
+        self.tracking = True
+        for card in cards:
+            self.attach(card)
+
+    def attach(self, card) -> None:
+        """Starts tracking card, folding in its current state"""
+        card.hasher = self
+        card.__class__ = HashedCard
+        self.value ^= self.card_hash(card)
+
+    def recompute(self, cards) -> int:
+        """The hash of cards computed from scratch, to check the running value against"""
+        value = 0
+        for card in cards:
+            value ^= self.card_hash(card)
+        return value
+
+    def card_hash(self, card) -> int:
+        card_id = card.id
+        value = (self.key(card_id, 'zone', card.zone) ^ self.key(card_id, 'controller', card.controller)
+                 ^ self.key(card_id, 'tapped', card.tapped))
+        for counter, count in card.counters.items():
+            value ^= self.counter_key(card_id, counter, count)
+        return value
+
+    def update(self, card_id: int, field: str, old, new) -> None:
+        self.value ^= self.key(card_id, field, old) ^ self.key(card_id, field, new)
+
+    def key(self, card_id: int, field: str, value) -> int:
+        if field == 'controller':
+            value = self._player_index.get(value)
+        parts = (card_id, field, value)
+        key = _card_keys.get(parts)
+        if key is None:
+            key = _card_keys[parts] = zobrist_key(*parts)
+        return key
+
+    @staticmethod
+    def counter_key(card_id: int, counter: str, count: int) -> int:
+        """Key for a card having count counters of a type; having none leaves the hash unchanged"""
+        return zobrist_key(card_id, 'counters', counter, count) if count else 0
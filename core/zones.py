@@ -0,0 +1,334 @@
+import random
+from collections import deque
+from itertools import islice
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+from core.triggers import TriggerType
+
+# Every zone a card can be in (Card.zone), in a fixed order so zones can be stored as small integers
+ZONES = ('library', 'hand', 'battlefield', 'graveyard', 'stack', 'exile')
+# Zones shared by the players; the others are attributes of the Player that owns the card
+SHARED_ZONES = ('battlefield', 'stack', 'exile')
+# Card types the battlefield is indexed by (see ZoneManager.permanents)
+INDEXED_TYPES = ('artifact', 'creature', 'enchantment', 'land', 'planeswalker')
+ZONE_CHANGE = 'zone_change'
+
+# card name -> INDEXED_TYPES it has
+_card_types: Dict[str, FrozenSet[str]] = {}
+# card name -> battlefield indexes it is filed under: None (every permanent) and its INDEXED_TYPES
+_index_types: Dict[str, Tuple[Optional[str], ...]] = {}
+
+
+def card_types(printed) -> FrozenSet[str]:
+    """The INDEXED_TYPES a card has on any face, worked out once per card name"""
+    types = _card_types.get(printed.name)
+    if types is None:
+        types = _card_types[printed.name] = frozenset(t for t in INDEXED_TYPES if printed.has_type(t))
+    return types
+
+
+def _indexed_as(printed) -> Tuple[Optional[str], ...]:
+    types = _index_types.get(printed.name)
+    if types is None:
+        types = _index_types[printed.name] = (None, *sorted(card_types(printed)))
+    return types
+
+
+class Zone:
+    """
+    A zone whose order the rules don't care about (hand, graveyard, battlefield...), as an ordered set of cards
+
+    Backed by a dict, so adding, removing and membership tests are O(1) while iteration keeps the order cards
+    arrived in.
+    """
+    __slots__ = ('_cards',)
+
+    def __init__(self, cards: Iterable = ()):
+        self._cards = dict.fromkeys(cards)
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def __bool__(self) -> bool:
+        return bool(self._cards)
+
+    def __iter__(self):
+        return iter(self._cards)
+
+    def __reversed__(self):
+        return reversed(self._cards)
+
+    def __contains__(self, card) -> bool:
+        return card in self._cards
+
+    def __repr__(self) -> str:
+        return f"Zone({len(self._cards)} cards)"
+
+    def add(self, card):
+        self._cards[card] = None
+
+    def remove(self, card):
+        """Removes card; raises KeyError if it isn't here"""
+        del self._cards[card]
+
+    def discard(self, card):
+        self._cards.pop(card, None)
+
+    def extend(self, cards: Iterable):
+        self._cards.update(dict.fromkeys(cards))
+
+    def clear(self):
+        self._cards.clear()
+
+
+class Library:
+    """
+    A player's library, top card first
+
+    Backed by a deque so drawing from the top and putting cards on either end are O(1).
+    """
+    __slots__ = ('_cards',)
+
+    def __init__(self, cards: Iterable = ()):
+        self._cards = deque(cards)
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def __bool__(self) -> bool:
+        return bool(self._cards)
+
+    def __iter__(self):
+        return iter(self._cards)
+
+    def __contains__(self, card) -> bool:
+        return card in self._cards
+
+    def __repr__(self) -> str:
+        return f"Library({len(self._cards)} cards)"
+
+    def draw(self):
+        """Removes and returns the top card; raises IndexError if the library is empty"""
+        return self._cards.popleft()
+
+    def remove(self, card):
+        """
+        Removes card from anywhere in the library: O(1) from the top or bottom, a scan otherwise; raises ValueError
+        if it isn't here
+        """
+        if not self._cards:
+            raise ValueError(f"{card!r} is not in the library")
+        if self._cards[0] is card:
+            self._cards.popleft()
+        elif self._cards[-1] is card:
+            self._cards.pop()
+        else:
+            self._cards.remove(card)
+
+    def put_on_top(self, card):
+        self._cards.appendleft(card)
+
+    def put_on_bottom(self, card):
+        self._cards.append(card)
+
+    def extend_bottom(self, cards: Iterable):
+        self._cards.extend(cards)
+
+    def peek(self, n: int = 1) -> list:
+        """Returns the top n cards without removing them"""
+        return list(islice(self._cards, n))
+
+    def scry(self, n: int, arrange: Callable[[list], Tuple[list, list]]):
+        """
+        Scry n
+
+        Args:
+            arrange: called with the top n cards, returns (cards kept on top in order, cards put on the bottom)
+        """
+        seen = [self._cards.popleft() for _ in range(min(n, len(self._cards)))]
+        top, bottom = arrange(seen)
+        self._cards.extendleft(reversed(top))
+        self._cards.extend(bottom)
+
+    def shuffle(self, rng=random):
+        cards = list(self._cards)
+        rng.shuffle(cards)
+        self._cards.clear()
+        self._cards.extend(cards)
+
+
+class ZoneManager:
+    """
+    Where every card of a game is, plus indexes of the battlefield kept up to date as cards move and tap
+
+    Cards change zone only through move() (or draw()), which takes the card out of its current zone and puts
+    it into the new one in O(1) and sets Card.zone, Card.controller and Card.tapped. It also queues a
+    ZONE_CHANGE event on the game, but only once an ability listening for zone changes is registered: until
+    then nothing could trigger, so moves don't pay for the event.
+
+    Permanents are indexed by controller, card type and tapped state, so a query such as "untapped lands you
+    control" reads one prebuilt Zone instead of scanning the battlefield and re-checking type lines. Owners
+    are tracked by Card.id, as cards have no owner of their own.
+
+    Since the snapshot in `base` was taken or restored, the manager also records which cards had their
+    controller, tapped state or counters changed and which zones had cards added or removed, so restoring
+    only touches those (see core.snapshot).
+    """
+    def __init__(self, game):
+        self.game = game
+        self.battlefield = Zone()
+        self.stack = Zone()
+        self.exile = Zone()
+        self._owners: Dict[int, object] = {}  # card id -> owner
+        # (controller, card type or None for all) -> (permanents, untapped ones, tapped ones)
+        self._index: Dict[tuple, Tuple[Zone, Zone, Zone]] = {}
+        self.base = None
+        self.changed_cards: Set[int] = set()
+        self.changed_zones: Set[tuple] = set()  # zone_key()s
+
+    def zone_key(self, name: str, player=None) -> tuple:
+        """(zone name, owning player, or None for a shared zone)"""
+        return (name, None) if name in SHARED_ZONES else (name, player)
+
+    def changed_since(self, snapshot):
+        """Forgets recorded changes: the cards and zones now match snapshot, which becomes the base"""
+        self.base = snapshot
+        self.changed_cards.clear()
+        self.changed_zones.clear()
+
+    def register(self, cards: Iterable, owner):
+        """Records the owner of newly numbered cards, which start in their owner's library"""
+        for card in cards:
+            self._owners[card.id] = owner
+            card.zone = 'library'
+
+    def owner(self, card):
+        return self._owners[card.id]
+
+    def zone(self, name: str, player=None):
+        """The zone called name; hands, libraries and graveyards are player's"""
+        if name in SHARED_ZONES:
+            return getattr(self, name)
+        return getattr(player, name)
+
+    def move(self, card, to: str, controller=None, top: bool = False):
+        """
+        Moves card to zone `to`, queuing a ZONE_CHANGE event if anything listens for one
+
+        Cards entering the battlefield or stack are controlled by controller (their owner by default); other
+        zones are their owner's. Permanents leave the battlefield untapped. top puts a card moved to the
+        library on top instead of at the bottom.
+        """
+        owner = self._owners[card.id]
+        origin = card.zone
+        self.changed_cards.add(card.id)
+        self.changed_zones.add(self.zone_key(origin, owner))
+        self.changed_zones.add(self.zone_key(to, owner))
+        if origin == 'battlefield':
+            self.battlefield.remove(card)
+            self.unindex(card)
+            if card.tapped:
+                card.tapped = False
+        elif origin is not None:
+            self.zone(origin, owner).remove(card)
+
+        card.zone = to
+        if to in ('battlefield', 'stack'):
+            card.controller = controller if controller is not None else owner
+        elif card.controller is not None:
+            card.controller = None
+        if to == 'library':
+            if top:
+                owner.library.put_on_top(card)
+            else:
+                owner.library.put_on_bottom(card)
+        elif to == 'battlefield':
+            self.battlefield.add(card)
+            self.index_card(card)
+        else:
+            self.zone(to, owner).add(card)
+        if self.game.events.listening(TriggerType.ZONE_CHANGE):
+            self.game.queue_event(ZONE_CHANGE, card.controller or owner, {'card': card, 'from': origin, 'to': to})
+
+    def draw(self, player):
+        """Moves the top card of player's library to their hand; None if the library is empty"""
+        if not player.library:
+            return None
+        card = player.library.draw()
+        card.zone = 'hand'
+        self.changed_zones.add(('library', player))
+        self.changed_zones.add(('hand', player))
+        player.hand.add(card)
+        if self.game.events.listening(TriggerType.ZONE_CHANGE):
+            self.game.queue_event(ZONE_CHANGE, player, {'card': card, 'from': 'library', 'to': 'hand'})
+        return card
+
+    def permanents(self, controller, card_type: Optional[str] = None, tapped: Optional[bool] = None) -> Zone:
+        """
+        The permanents controller controls, optionally only those of one of INDEXED_TYPES and tapped or untapped
+
+        This is the live index: copy it before moving or tapping the cards in it. Its order depends on the
+        history of moves, taps and restores, so sort by Card.id wherever the order can affect the game.
+        """
+        index = self._index.get((controller, card_type))
+        if index is None:
+            return Zone()
+        return index[0] if tapped is None else index[1 + tapped]
+
+    def tap(self, card):
+        if not card.tapped:
+            card.tapped = True
+            self.changed_cards.add(card.id)
+            self._retap(card, 1, 2)
+
+    def untap(self, card):
+        if card.tapped:
+            card.tapped = False
+            self.changed_cards.add(card.id)
+            self._retap(card, 2, 1)
+
+    def untap_all(self, controller):
+        tapped = self.permanents(controller, tapped=True)
+        if not tapped:
+            return
+        for card in tapped:
+            card.tapped = False
+            self.changed_cards.add(card.id)
+        for (index_controller, _), (_, untapped, tapped) in self._index.items():
+            if index_controller is controller:
+                untapped.extend(tapped)
+                tapped.clear()
+
+    def reindex(self):
+        """Rebuilds the battlefield indexes, after the battlefield or its cards were written directly"""
+        self._index.clear()
+        for card in self.battlefield:
+            self.index_card(card)
+
+    def index_card(self, card):
+        """Files a battlefield card under its controller, types and tapped state"""
+        controller = card.controller
+        state = 2 if card.tapped else 1
+        for card_type in _indexed_as(card.printed):
+            index = self._index.get((controller, card_type))
+            if index is None:
+                index = self._index[controller, card_type] = (Zone(), Zone(), Zone())
+            index[0].add(card)
+            index[state].add(card)
+
+    def unindex(self, card):
+        """Takes a card out of the battlefield indexes, before its controller or tapped state is written directly"""
+        controller = card.controller
+        state = 2 if card.tapped else 1
+        for card_type in _indexed_as(card.printed):
+            index = self._index[controller, card_type]
+            index[0].remove(card)
+            index[state].remove(card)
+
+    def _retap(self, card, old: int, new: int):
+        """Moves card between the untapped (1) and tapped (2) indexes"""
+        controller = card.controller
+        for card_type in _indexed_as(card.printed):
+            index = self._index[controller, card_type]
+            index[old].remove(card)
+            index[new].add(card)
@@ -0,0 +1,284 @@
+import json
+import struct
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+from unittest.mock import patch
+
+from core.Card import PrintedCard
+from core.Deck import _library_deck, parse_decklist
+from data.bulk_data import ingest_bulk, iter_bulk_records
+from data.card_store import CardStore, build_card_store
+from data.columnar import ColumnarCards
+from data.deck_library import DeckLibrary, _libraries, _pack_string, build_deck_library, is_stale
+from data.historical_repository import HistoricalRepository
+from data.scyfall import CardResolver
+from data.win_rate_matrix import WinRateMatrix
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+BULK_SAMPLE = FIXTURES / 'scryfall_bulk_sample.json'
+
+
+class TestCardStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store_path = Path(self.tmp.name) / 'cards.sqlite'
+        build_card_store(BULK_SAMPLE, self.store_path)
+        self.store = CardStore(self.store_path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_streaming_reader_matches_file(self):
+        """Small chunks force records to span chunk boundaries"""
+        names = [record['name'] for record in iter_bulk_records(BULK_SAMPLE, chunk_size=64)]
+        self.assertEqual(len(names), 7)
+        self.assertEqual(names[0], 'Serra Angel')
+
+    def test_lookup_is_normalized_and_indexes_faces(self):
+        self.assertEqual(self.store.get('  serra   ANGEL ')['mana_cost'], '{3}{W}{W}')
+        self.assertEqual(self.store.get('Insectile Aberration')['layout'], 'transform')
+        self.assertIsNone(self.store.get('Black Lotus'))
+
+    def test_parse_decklist_uses_store_without_network(self):
+        with patch('data.scyfall.CardResolver._fetch', side_effect=AssertionError("network used")):
+            deck = parse_decklist("4 Serra Angel\n2 Shock\n\n10 Forest\n1 Delver of Secrets\n", store=self.store)
+
+        self.assertEqual(len(deck), 17)
+        self.assertIs(deck[0].printed, deck[3].printed)
+        self.assertEqual(len(deck[-1].faces), 2)
+
+    def test_parse_decklist_closes_what_it_opens(self):
+        default_path = Path(self.tmp.name) / 'default.sqlite'
+        with patch.object(CardStore.__init__, '__defaults__', (default_path,)), \
+                patch('data.card_store.CardStore.close', autospec=True) as store_close, \
+                patch('data.scyfall.CardResolver.close', autospec=True) as resolver_close, \
+                patch('data.scyfall.CardResolver.resolve_many', autospec=True,
+                      side_effect=lambda resolver, names: {name: self.store.get(name) for name in names}):
+            self.assertEqual(len(parse_decklist("4 Serra Angel\n")), 4)
+            with self.assertRaises(ValueError):
+                parse_decklist("1 Black Lotus\n")
+            parse_decklist("1 Shock\n", store=self.store)
+
+        self.assertEqual(store_close.call_count, 2)
+        self.assertEqual(resolver_close.call_count, 3)
+
+
+class TestColumnarIngest(unittest.TestCase):
+    def test_ingest_dedupes_by_oracle_id(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out_path = Path(tmp) / 'cards.col'
+            n_read, n_written = ingest_bulk(BULK_SAMPLE, out_path)
+            cards = ColumnarCards(out_path)
+
+            self.assertEqual((n_read, n_written), (7, 6))
+            self.assertEqual(cards.column('name').count('Serra Angel'), 1)
+            self.assertEqual(cards.find('Shock')['cmc'], 1.0)
+            self.assertEqual(len(cards.find('Delver of Secrets // Insectile Aberration')['card_faces']), 2)
+            battle = PrintedCard(cards.find('Invasion of Zendikar // Awakened Skyclave'))
+            cards.close()
+
+        self.assertEqual(battle.faces['Face1'].defense, '3')
+        self.assertIsNone(battle.faces['Face2'].defense)
+        self.assertEqual(PrintedCard(battle.to_dict()).faces['Face1'].defense, '3')
+        self.assertEqual(battle.faces['Face1'].defence, '3')
+
+
+class _FakeScryfall(BaseHTTPRequestHandler):
+    """Serves /cards/named from the bulk fixture; fails the first request for each name in flaky_names"""
+    cards = {}
+    flaky_names = set()
+    requests_seen = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        name = parse_qs(url.query)['exact'][0]
+        self.requests_seen.append(name)
+        if name in self.flaky_names:
+            self.flaky_names.discard(name)
+            self._reply(503, {'object': 'error'})
+        elif name in self.cards:
+            self._reply(200, self.cards[name])
+        else:
+            self._reply(404, {'object': 'error', 'code': 'not_found'})
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCardResolver(unittest.TestCase):
+    def setUp(self):
+        _FakeScryfall.cards = {record['name']: record for record in iter_bulk_records(BULK_SAMPLE)}
+        _FakeScryfall.flaky_names = {'Shock'}
+        _FakeScryfall.requests_seen = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _FakeScryfall)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CardStore(Path(self.tmp.name) / 'cards.sqlite')
+        self.resolver = CardResolver(store=self.store, base_url=f'http://127.0.0.1:{self.server.server_port}',
+                                     min_interval=0.0, backoff=0.0)
+
+    def tearDown(self):
+        self.resolver.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_resolves_unique_names_with_retry_and_write_through(self):
+        deck = parse_decklist("4 Serra Angel\n2 Shock\n10 Forest\n2 Serra Angel\n", resolver=self.resolver)
+
+        self.assertEqual(len(deck), 18)
+        # One request per distinct name plus one retry for the flaky one
+        self.assertEqual(sorted(_FakeScryfall.requests_seen), ['Forest', 'Serra Angel', 'Shock', 'Shock'])
+        self.assertEqual(self.store.get('shock')['mana_cost'], '{R}')
+
+        parse_decklist("1 Shock\n", resolver=self.resolver)
+        self.assertEqual(len(_FakeScryfall.requests_seen), 4)
+
+    def test_unknown_name_raises(self):
+        with self.assertRaises(ValueError):
+            parse_decklist("1 Not A Real Card\n", resolver=self.resolver)
+
+    def test_rate_limit_spans_resolve_calls(self):
+        self.resolver.limiter.min_interval = 0.05
+        start = time.monotonic()
+        self.resolver.resolve_many(['Serra Angel'])
+        self.resolver.resolve_many(['Forest'])
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+
+
+class TestDeckLibrary(unittest.TestCase):
+    def test_binary_decks_match_json_with_one_card_per_entry(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            deck_dir = Path(tmp)
+            (deck_dir / 'test').mkdir()
+            with open(BULK_SAMPLE, 'r', encoding='utf-8') as f:
+                by_name = {card['name']: card for card in json.load(f)}
+            dfc = 'Delver of Secrets // Insectile Aberration'
+            names = ['Serra Angel'] * 4 + [dfc] * 2 + ['Serra Angel']
+            deck_json = {'cards': [PrintedCard(by_name[name]).to_dict() for name in names]}
+            (deck_dir / 'test' / 'mixed.json').write_text(json.dumps(deck_json), encoding='utf-8')
+            self.assertTrue(is_stale('test', deck_dir))
+
+            self.assertEqual(build_deck_library('test', deck_dir), (1, 2))
+            self.assertFalse(is_stale('test', deck_dir))
+            library = DeckLibrary(deck_dir / 'test.decks')
+            deck = library.load('mixed')
+            library.close()
+
+        self.assertEqual(library.names, ('mixed',))
+        self.assertEqual([printed.name for printed in deck], names)
+        self.assertIs(deck[0], deck[-1])
+        self.assertEqual(len(deck[4].faces), 2)
+
+    def _write_decks(self, deck_dir, *deck_names):
+        (deck_dir / 'test').mkdir()
+        with open(BULK_SAMPLE, 'r', encoding='utf-8') as f:
+            card = json.load(f)[0]
+        for deck_name in deck_names:
+            deck_json = {'cards': [PrintedCard(card).to_dict()]}
+            (deck_dir / 'test' / f'{deck_name}.json').write_text(json.dumps(deck_json), encoding='utf-8')
+
+    def test_for_format_is_per_directory_and_never_builds(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second, \
+                patch.dict('data.deck_library._libraries', clear=True):
+            self._write_decks(Path(first), 'alpha')
+            self._write_decks(Path(second), 'beta')
+            with self.assertRaises(FileNotFoundError):
+                DeckLibrary.for_format('test', Path(first))
+            self.assertEqual(sorted(path.name for path in Path(first).iterdir()), ['test'])
+
+            build_deck_library('test', Path(first))
+            build_deck_library('test', Path(second))
+            self.assertEqual(DeckLibrary.for_format('test', Path(first)).names, ('alpha',))
+            self.assertEqual(DeckLibrary.for_format('test', Path(second)).names, ('beta',))
+            self.assertEqual(sorted(path.name for path in Path(second).iterdir()), ['test', 'test.decks'])
+            for library in _libraries.values():
+                library.close()
+
+    def test_torn_library_is_reported(self):
+        with tempfile.TemporaryDirectory() as tmp, patch.dict('data.deck_library._libraries', clear=True):
+            self._write_decks(Path(tmp), 'alpha')
+            build_deck_library('test', Path(tmp))
+            torn = Path(tmp) / 'test.decks'
+            torn.write_bytes(torn.read_bytes()[:20])
+            with self.assertRaises((struct.error, ValueError)):
+                DeckLibrary.for_format('test', Path(tmp))
+
+    def test_long_deck_names(self):
+        name = 'é' * 200
+        self.assertEqual(struct.unpack_from('<H', _pack_string(name))[0], 400)
+        with self.assertRaises(ValueError):
+            _pack_string('x' * 0x10000)
+
+    def test_unreadable_library_falls_back_to_json(self):
+        for error in (OSError, struct.error, ValueError):
+            with patch('core.Deck.DeckLibrary.for_format', side_effect=error):
+                self.assertIsNone(_library_deck('sparky_white', 'sparky'))
+
+
+class TestHistoricalRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_buffered_results_reach_log_and_compact(self):
+        with HistoricalRepository(self.data_dir, flush_every=3, flush_interval=3600) as repository:
+            repository.update_win_rates('red', played_first=True, won=True, opponent_archetype='blue')
+            repository.update_win_rates('red', played_first=True, won=False, opponent_archetype='blue')
+            self.assertFalse((self.data_dir / 'sparky.results.jsonl').exists())
+            repository.update_win_rates('red', played_first=False, won=True, opponent_archetype='blue')
+
+        # A second process's batch plus a torn line from a crashed writer
+        HistoricalRepository(self.data_dir).merge_results({('red', 'blue', True): (1, 1)})
+        with open(self.data_dir / 'sparky.results.jsonl', 'a') as f:
+            f.write('{"deck": "red", "oppo')
+
+        repository = HistoricalRepository(self.data_dir)
+        self.assertEqual(repository.get_win_rates('red', 'blue')['samples'], 4)
+        repository.compact()
+
+        self.assertFalse((self.data_dir / 'sparky.results.jsonl').exists())
+        with open(self.data_dir / 'sparky.json') as f:
+            self.assertEqual(json.load(f)['red']['vs_blue']['samples'], 4)
+
+
+class TestWinRateMatrix(unittest.TestCase):
+    def test_batch_updates_and_intervals(self):
+        matrix = WinRateMatrix(['red', 'blue'])
+        red, blue = matrix.index('red'), matrix.index('blue')
+        matrix.record_batch([red] * 10, [blue] * 10, [True] * 10, [1] * 8 + [0] * 2)
+        matrix.record('red', 'blue', played_first=False, wins=True)
+
+        rates = matrix.get_win_rates('red', 'blue')
+        self.assertEqual((rates['play_win_rate'], rates['play_samples'], rates['draw_samples']), (0.8, 10, 1))
+
+        lower, upper = matrix.wilson_interval()
+        self.assertAlmostEqual(lower[red, blue, 0], 0.4902, places=4)
+        self.assertAlmostEqual(upper[red, blue, 0], 0.9433, places=4)
+
+    def test_json_round_trip(self):
+        format_data = {'red': {'vs_blue': {'play_win_rate': 0.75, 'draw_win_rate': 0.25, 'samples': 8}}}
+        self.assertEqual(WinRateMatrix.from_format_data(format_data).to_format_data(), format_data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import argparse
+import json
+from pathlib import Path
+from typing import Iterator, Tuple, Union
+
+from data.columnar import ColumnarWriter
+
+_WHITESPACE = ' \t\n\r'
+
+# Scryfall fields that Card and Face read
+CARD_FIELDS = ('name', 'layout', 'cmc', 'colors', 'color_identity', 'mana_cost', 'type_line', 'oracle_text',
+               'power', 'toughness', 'loyalty', 'defense')
+FACE_FIELDS = ('name', 'mana_cost', 'type_line', 'oracle_text', 'colors', 'power', 'toughness', 'loyalty', 'defense')
+
+
+def project_card(card_data: dict) -> dict:
+    """Strips a Scryfall card object down to the fields Card/Face use"""
+    projected = {field: card_data[field] for field in CARD_FIELDS if field in card_data}
+    if 'card_faces' in card_data:
+        projected['card_faces'] = [
+            {field: face[field] for field in FACE_FIELDS if field in face}
+            for face in card_data['card_faces']
+        ]
+        for face in projected['card_faces']:
+            face.setdefault('mana_cost', '')
+            face.setdefault('oracle_text', '')
+    projected.setdefault('mana_cost', '')
+    projected.setdefault('oracle_text', '')
+    return projected
+
+
+def iter_bulk_records(path: Union[str, Path], chunk_size: int = 1 << 20) -> Iterator[dict]:
+    """
+    Yields each object of a Scryfall bulk-data file (one top-level JSON array) without loading the whole file
+
+    Only one chunk plus the record being decoded is held in memory at a time.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = f.read(chunk_size)
+        pos = _skip(buf, 0, _WHITESPACE)
+        while pos == len(buf):
+            buf = f.read(chunk_size)
+            if not buf:
+                return
+            pos = _skip(buf, 0, _WHITESPACE)
+        if buf[pos] != '[':
+            raise ValueError(f"Bulk data file '{path}' is not a JSON array")
+        pos += 1
+        eof = False
+
+        while True:
+            pos = _skip(buf, pos, _WHITESPACE + ',')
+            if pos < len(buf) and buf[pos] == ']':
+                return
+            try:
+                if pos == len(buf):
+                    raise json.JSONDecodeError("Need more data", buf, pos)
+                record, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError(f"Truncated or invalid bulk data file '{path}'")
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+            yield record
+            pos = end
+
+
+def oracle_key(card_data: dict) -> str:
+    """Oracle id identifying a card across printings (reversible cards keep it on their faces)"""
+    if 'oracle_id' in card_data:
+        return card_data['oracle_id']
+    for face in card_data.get('card_faces', ()):
+        if 'oracle_id' in face:
+            return face['oracle_id']
+    return card_data['name']
+
+
+def ingest_bulk(bulk_path: Union[str, Path], out_path: Union[str, Path],
+                english_only: bool = True) -> Tuple[int, int]:
+    """
+    Streams a Scryfall bulk-data file into a columnar card artifact
+
+    Records are projected down to the fields Card/Face use and deduplicated by oracle id, keeping the
+    first printing seen. Only the set of seen oracle ids grows with the input.
+
+    Returns:
+        (records read, cards written)
+    """
+    seen = set()
+    n_read = 0
+    with ColumnarWriter(out_path) as writer:
+        for record in iter_bulk_records(bulk_path):
+            n_read += 1
+            if english_only and record.get('lang', 'en') != 'en':
+                continue
+            key = oracle_key(record)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            row = project_card(record)
+            row['oracle_id'] = key
+            writer.append(row)
+        n_written = writer.n_rows
+    return n_read, n_written
+
+
+def _skip(buf: str, pos: int, chars: str) -> int:
+    while pos < len(buf) and buf[pos] in chars:
+        pos += 1
+    return pos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a columnar card file from a Scryfall bulk-data file")
+    parser.add_argument("bulk_file", help="Scryfall bulk-data JSON (e.g. all-cards-*.json)")
+    parser.add_argument("--out", default=str(Path(__file__).parent / 'cards.col'), help="output artifact")
+    parser.add_argument("--all-languages", action="store_true", help="keep non-English printings")
+    args = parser.parse_args(argv)
+
+    n_read, n_written = ingest_bulk(args.bulk_file, args.out, english_only=not args.all_languages)
+    print(f"Read {n_read} records, wrote {n_written} unique cards to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from data.bulk_data import iter_bulk_records, project_card
+
+DEFAULT_STORE_PATH = Path(__file__).parent / 'cards.sqlite'
+
+
+def normalize_name(name: str) -> str:
+    return ' '.join(name.split()).casefold()
+
+
+class CardStore:
+    """
+    Local card database keyed by normalized card name
+
+    Lookups never touch the network. Double-faced cards are also indexed under each face name.
+    """
+    def __init__(self, path: Union[str, Path] = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cards (name_key TEXT PRIMARY KEY, data TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._cache: Dict[str, dict] = {}
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def get(self, name: str) -> Optional[dict]:
+        key = normalize_name(name)
+        if key not in self._cache:
+            row = self._conn.execute("SELECT data FROM cards WHERE name_key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._cache[key] = json.loads(row[0])
+        return self._cache[key]
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, dict]:
+        """Returns {name: card data} for every name found in the store"""
+        return {name: data for name in names if (data := self.get(name)) is not None}
+
+    def put(self, card_data: dict) -> None:
+        self.put_many([card_data])
+
+    def put_many(self, cards: Iterable[dict], replace: bool = True) -> int:
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        rows = []
+        for card_data in cards:
+            projected = project_card(card_data)
+            encoded = json.dumps(projected, separators=(',', ':'))
+            for name in self._index_names(projected):
+                rows.append((normalize_name(name), encoded))
+                self._cache.pop(normalize_name(name), None)
+        with self._conn:
+            self._conn.executemany(f"{verb} INTO cards (name_key, data) VALUES (?, ?)", rows)
+        return len(rows)
+
+    @staticmethod
+    def _index_names(card_data: dict) -> list:
+        names = [card_data['name']]
+        names.extend(face['name'] for face in card_data.get('card_faces', ()) if face['name'] != card_data['name'])
+        return names
+
+    def close(self):
+        self._conn.close()
+
+
+def build_card_store(bulk_path: Union[str, Path],
+                     store_path: Union[str, Path] = DEFAULT_STORE_PATH,
+                     batch_size: int = 5000) -> int:
+    """
+    Streams a Scryfall bulk-data file into a CardStore
+
+    The first printing seen for each name wins, so later reprints don't overwrite it.
+    Returns the number of cards read.
+    """
+    store = CardStore(store_path)
+    n_cards = 0
+    batch = []
+    try:
+        for record in iter_bulk_records(bulk_path):
+            batch.append(record)
+            n_cards += 1
+            if len(batch) >= batch_size:
+                store.put_many(batch, replace=False)
+                batch = []
+        if batch:
+            store.put_many(batch, replace=False)
+    finally:
+        store.close()
+    return n_cards
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the local card store from a Scryfall bulk-data file")
+    parser.add_argument("bulk_file", help="Scryfall bulk-data JSON (e.g. oracle-cards-*.json)")
+    parser.add_argument("--out", default=str(DEFAULT_STORE_PATH), help="card store path")
+    args = parser.parse_args(argv)
+
+    n_cards = build_card_store(args.bulk_file, args.out)
+    print(f"Indexed {n_cards} cards into {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+MAGIC = b'MTGCOL1\n'
+
+# Column kinds:
+#   'str'  - utf-8 strings stored as one blob plus n+1 uint64 offsets
+#   'json' - same layout, each value JSON-encoded (nullable scalars, lists, nested faces)
+#   'f64'  - packed doubles
+CARD_SCHEMA = (
+    ('oracle_id', 'str'),
+    ('name', 'str'),
+    ('layout', 'str'),
+    ('cmc', 'f64'),
+    ('mana_cost', 'str'),
+    ('type_line', 'str'),
+    ('oracle_text', 'str'),
+    ('colors', 'json'),
+    ('color_identity', 'json'),
+    ('power', 'json'),
+    ('toughness', 'json'),
+    ('loyalty', 'json'),
+    ('defense', 'json'),
+    ('card_faces', 'json'),
+)
+
+
+class ColumnarWriter:
+    """
+    Appends rows to one spill file per column, then stitches them into a single artifact on close
+
+    Memory use is independent of the number of rows; the artifact is written to a temp file and renamed into place.
+    """
+    def __init__(self, path: Union[str, Path], schema=CARD_SCHEMA):
+        self.path = Path(path)
+        self.schema = schema
+        self.n_rows = 0
+        self._spill_dir = tempfile.TemporaryDirectory(dir=self.path.parent)
+        self._data = {name: open(Path(self._spill_dir.name) / f'{name}.data', 'wb') for name, _ in schema}
+        self._offsets = {name: open(Path(self._spill_dir.name) / f'{name}.offsets', 'wb')
+                         for name, kind in schema if kind != 'f64'}
+        self._positions = {name: 0 for name in self._offsets}
+        for f in self._offsets.values():
+            f.write(struct.pack('<Q', 0))
+
+    def append(self, row: dict):
+        for name, kind in self.schema:
+            value = row.get(name)
+            if kind == 'f64':
+                self._data[name].write(struct.pack('<d', float(value or 0.0)))
+                continue
+            if kind == 'json':
+                value = json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+            encoded = (value or '').encode('utf-8')
+            self._data[name].write(encoded)
+            self._positions[name] += len(encoded)
+            self._offsets[name].write(struct.pack('<Q', self._positions[name]))
+        self.n_rows += 1
+
+    def close(self):
+        for f in (*self._data.values(), *self._offsets.values()):
+            f.close()
+
+        columns = []
+        offset = 0
+        for name, kind in self.schema:
+            parts = [f'{name}.offsets', f'{name}.data'] if kind != 'f64' else [f'{name}.data']
+            sizes = [os.path.getsize(Path(self._spill_dir.name) / part) for part in parts]
+            columns.append({'name': name, 'kind': kind, 'offset': offset, 'sizes': sizes})
+            offset += sum(sizes)
+        header = json.dumps({'n_rows': self.n_rows, 'columns': columns}).encode('utf-8')
+
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'wb') as out:
+            out.write(MAGIC)
+            out.write(struct.pack('<I', len(header)))
+            out.write(header)
+            for name, kind in self.schema:
+                parts = [f'{name}.offsets', f'{name}.data'] if kind != 'f64' else [f'{name}.data']
+                for part in parts:
+                    with open(Path(self._spill_dir.name) / part, 'rb') as f:
+                        while chunk := f.read(1 << 20):
+                            out.write(chunk)
+        os.replace(tmp_path, self.path)
+        self._spill_dir.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for f in (*self._data.values(), *self._offsets.values()):
+                f.close()
+            self._spill_dir.cleanup()
+
+
+class ColumnarCards:
+    """Read-only, memory-mapped view of an artifact written by ColumnarWriter"""
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"'{path}' is not a columnar card file")
+        (header_len,) = struct.unpack_from('<I', self._mm, len(MAGIC))
+        body_start = len(MAGIC) + 4 + header_len
+        header = json.loads(self._mm[len(MAGIC) + 4:body_start])
+
+        self.n_rows = header['n_rows']
+        self._columns = {}
+        for column in header['columns']:
+            start = body_start + column['offset']
+            if column['kind'] == 'f64':
+                self._columns[column['name']] = (column['kind'], start, None)
+            else:
+                self._columns[column['name']] = (column['kind'], start, start + column['sizes'][0])
+        self._name_index: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    @property
+    def column_names(self):
+        return list(self._columns)
+
+    def value(self, column: str, i: int):
+        kind, start, data_start = self._columns[column]
+        if kind == 'f64':
+            return struct.unpack_from('<d', self._mm, start + 8 * i)[0]
+        begin, end = struct.unpack_from('<QQ', self._mm, start + 8 * i)
+        text = self._mm[data_start + begin:data_start + end].decode('utf-8')
+        return json.loads(text) if kind == 'json' else text
+
+    def column(self, column: str) -> list:
+        kind, start, data_start = self._columns[column]
+        if kind == 'f64':
+            values = array('d')
+            values.frombytes(self._mm[start:start + 8 * self.n_rows])
+            return values.tolist()
+        return [self.value(column, i) for i in range(self.n_rows)]
+
+    def row(self, i: int) -> dict:
+        """Card data for row i, in the shape Card accepts"""
+        row = {name: self.value(name, i) for name in self._columns}
+        if row.get('card_faces') is None:
+            row.pop('card_faces', None)
+        return row
+
+    def find(self, name: str) -> Optional[dict]:
+        if self._name_index is None:
+            self._name_index = {card_name: i for i, card_name in enumerate(self.column('name'))}
+        i = self._name_index.get(name)
+        return None if i is None else self.row(i)
+
+    def __iter__(self) -> Iterable[dict]:
+        return (self.row(i) for i in range(self.n_rows))
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
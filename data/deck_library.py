@@ -0,0 +1,207 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from core.Card import CARD_REGISTRY, PrintedCard
+
+DECK_DIR = Path(__file__).parent / 'decks'
+# Files in a format directory that are not decks
+NON_DECK_FILES = frozenset(('deck_archetypes',))
+
+MAGIC = b'MTGD'
+VERSION = 1
+
+# magic, version, number of unique cards, number of decks, offset of the deck table
+_HEADER = struct.Struct('<4sBHHI')
+# offset and length of one card's JSON in the card table
+_CARD_ENTRY = struct.Struct('<II')
+# number of (card index, count) runs in a deck
+_DECK_ENTRY = struct.Struct('<H')
+_RUN = struct.Struct('<HB')
+# byte length of a UTF-8 deck name
+_NAME_LENGTH = struct.Struct('<H')
+
+# resolved library path -> open DeckLibrary
+_libraries: Dict[Path, "DeckLibrary"] = {}
+
+
+def library_path(game_format: str, deck_dir: Path = DECK_DIR) -> Path:
+    return deck_dir / f'{game_format}.decks'
+
+
+def deck_files(game_format: str, deck_dir: Path = DECK_DIR) -> List[Path]:
+    return sorted(path for path in (deck_dir / game_format).glob('*.json') if path.stem not in NON_DECK_FILES)
+
+
+def build_deck_library(game_format: str, deck_dir: Path = DECK_DIR, out: Optional[Path] = None) -> Tuple[int, int]:
+    """
+    Converts every JSON deck of a format into one binary deck file
+
+    The file holds each unique card once, as compact JSON in a shared card table, and each deck as runs of
+    (card index, count) in deck order. Cards are embedded rather than referenced by name so the file works
+    without a populated card store. Returns (number of decks, number of unique cards).
+    """
+    out = Path(out) if out is not None else library_path(game_format, deck_dir)
+    card_index: Dict[str, int] = {}
+    blobs: List[bytes] = []
+    decks: List[Tuple[str, List[Tuple[int, int]]]] = []
+
+    for path in deck_files(game_format, deck_dir):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if 'cards' not in data:
+            raise ValueError(f"Invalid deck format in '{path}': missing 'cards' key")
+
+        runs: List[Tuple[int, int]] = []
+        for card_data in data['cards']:
+            name = card_data['name']
+            if name not in card_index:
+                card_index[name] = len(blobs)
+                blob = PrintedCard(card_data).to_dict()
+                blobs.append(json.dumps(blob, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+            index = card_index[name]
+            if runs and runs[-1][0] == index and runs[-1][1] < 255:
+                runs[-1] = (index, runs[-1][1] + 1)
+            else:
+                runs.append((index, 1))
+        decks.append((path.stem, runs))
+
+    card_table_start = _HEADER.size
+    offset = card_table_start + _CARD_ENTRY.size * len(blobs)
+    card_table = bytearray()
+    for blob in blobs:
+        card_table += _CARD_ENTRY.pack(offset, len(blob))
+        offset += len(blob)
+
+    deck_table = bytearray()
+    for name, runs in decks:
+        deck_table += _pack_string(name) + _DECK_ENTRY.pack(len(runs))
+        for run in runs:
+            deck_table += _RUN.pack(*run)
+
+    # Per-process temp name so concurrent builders never write into each other's file
+    tmp_path = out.with_name(f'{out.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(blobs), len(decks), offset))
+        f.write(card_table)
+        for blob in blobs:
+            f.write(blob)
+        f.write(deck_table)
+    os.replace(tmp_path, out)
+    return len(decks), len(blobs)
+
+
+def _pack_string(text: str) -> bytes:
+    encoded = text.encode('utf-8')
+    if len(encoded) > 0xFFFF:
+        raise ValueError(f"Deck name '{text[:40]}...' is longer than {0xFFFF} UTF-8 bytes")
+    return _NAME_LENGTH.pack(len(encoded)) + encoded
+
+
+class DeckLibrary:
+    """
+    Read-only, memory-mapped view of a binary deck file written by build_deck_library
+
+    Only the deck table is read on open. A card's JSON is decoded (and interned in CARD_REGISTRY) the first
+    time a deck containing it is loaded, and each deck's list of PrintedCards is kept, so every later load
+    of it is a list lookup.
+    """
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_cards, n_decks, decks_offset = _HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            raise ValueError(f"'{path}' is not a deck library file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported deck library version {version}")
+
+        self._cards: List[Optional[PrintedCard]] = [None] * n_cards
+        self._runs: Dict[str, Tuple[Tuple[int, int], ...]] = {}
+        offset = decks_offset
+        for _ in range(n_decks):
+            (length,) = _NAME_LENGTH.unpack_from(self._mm, offset)
+            offset += _NAME_LENGTH.size
+            name = self._mm[offset:offset + length].decode('utf-8')
+            offset += length
+            (n_runs,) = _DECK_ENTRY.unpack_from(self._mm, offset)
+            offset += _DECK_ENTRY.size
+            self._runs[name] = tuple(_RUN.iter_unpack(self._mm[offset:offset + _RUN.size * n_runs]))
+            offset += _RUN.size * n_runs
+        self._decks: Dict[str, List[PrintedCard]] = {}
+
+    @classmethod
+    def for_format(cls, game_format: str, deck_dir: Path = DECK_DIR) -> "DeckLibrary":
+        """
+        The library of a format in deck_dir, opened once per process
+
+        Opening never writes: the file is built explicitly, with build_deck_library or
+        `python -m data.deck_library`. Raises FileNotFoundError if it is missing or older than one of the JSON
+        decks, and ValueError or struct.error if it is torn or from another version.
+        """
+        path = library_path(game_format, deck_dir).resolve()
+        library = _libraries.get(path)
+        if library is None:
+            if is_stale(game_format, deck_dir):
+                raise FileNotFoundError(f"No up-to-date deck library at '{path}'; "
+                                        f"build it with python -m data.deck_library --format {game_format}")
+            library = _libraries[path] = cls(path)
+        return library
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return tuple(self._runs)
+
+    def __contains__(self, deck_name: str) -> bool:
+        return deck_name in self._runs
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+    def load(self, deck_name: str) -> List[PrintedCard]:
+        """The deck's shared PrintedCards in deck order (treat as read-only)"""
+        deck = self._decks.get(deck_name)
+        if deck is None:
+            if deck_name not in self._runs:
+                raise KeyError(f"No deck '{deck_name}' in '{self.path}'")
+            deck = self._decks[deck_name] = [self._card(index)
+                                             for index, count in self._runs[deck_name] for _ in range(count)]
+        return deck
+
+    def _card(self, index: int) -> PrintedCard:
+        printed = self._cards[index]
+        if printed is None:
+            offset, length = _CARD_ENTRY.unpack_from(self._mm, _HEADER.size + _CARD_ENTRY.size * index)
+            printed = self._cards[index] = CARD_REGISTRY.intern(json.loads(self._mm[offset:offset + length]))
+        return printed
+
+    def close(self):
+        self._mm.close()
+
+
+def is_stale(game_format: str, deck_dir: Path = DECK_DIR) -> bool:
+    """True if the format's binary deck file is missing or older than one of its JSON decks"""
+    path = library_path(game_format, deck_dir)
+    if not path.exists():
+        return True
+    built = path.stat().st_mtime
+    return any(json_path.stat().st_mtime > built for json_path in deck_files(game_format, deck_dir))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a format's JSON decks into one binary deck file")
+    parser.add_argument("--format", default="sparky")
+    parser.add_argument("--out", help="output path (default data/decks/<format>.decks)")
+    args = parser.parse_args(argv)
+
+    n_decks, n_cards = build_deck_library(args.format, out=args.out)
+    out = args.out or library_path(args.format)
+    print(f"Wrote {n_decks} decks ({n_cards} unique cards) to {out}")
+
+
+if __name__ == '__main__':
+    main()
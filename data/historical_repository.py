@@ -1,13 +1,50 @@
 import json
+import time
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 import os
 
+from core.metrics import METRICS
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are still whole-line writes, compaction is unguarded
+    fcntl = None
+
+DEFAULT_DATA_DIR = Path(__file__).parent / 'historical'
+
+# (deck_archetype, opponent_archetype, played_first) -> [wins, games]
+ResultTally = Dict[Tuple[str, Optional[str], bool], list]
+
+
 class HistoricalRepository:
-    def __init__(self, data_dir: str = "data/historical"):
+    """
+    Win-rate store backed by an aggregate <format>.json plus an append-only <format>.results.jsonl log
+
+    Results are buffered in memory and appended to the log every flush_every results or flush_interval
+    seconds, whichever comes first. compact() folds the log into the aggregate file with an atomic rename.
+    Several processes can append to the same log; appends and compaction are serialized with a lock file.
+    """
+    def __init__(self,
+                 data_dir: str = DEFAULT_DATA_DIR,
+                 flush_every: int = 1000,
+                 flush_interval: float = 5.0,
+                 compact_bytes: int = 1 << 20):
         self.data_dir = Path(data_dir)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.compact_bytes = compact_bytes
         self._cache: Dict[str, dict] = {}
 
+        # format -> tally of results not yet in the log
+        self._pending: Dict[str, ResultTally] = {}
+        self._n_pending = 0
+        self._last_flush = time.monotonic()
+        # Flush whatever is still buffered when the repository is collected or the interpreter exits
+        self._finalizer = weakref.finalize(self, _append_to_logs, self.data_dir, self._pending)
+
     def _load_format_data(self, format: str) -> dict:
 
         if format not in self._cache:
@@ -17,6 +54,9 @@ class HistoricalRepository:
                     self._cache[format] = json.load(f)
             except (FileNotFoundError, json.JSONDecodeError):
                 self._cache[format] = {}
+            for key, wins, games in _read_log(_log_path(self.data_dir, format)):
+                stats = self._get_matchup_stats(self._cache[format], *key[:2])
+                self._apply_results(stats, key[2], wins, games)
         return self._cache[format]
 
     def get_win_rates(
@@ -33,17 +73,19 @@ class HistoricalRepository:
                 "confidence" float (0-1 based on sample size)
             }
             or None is no data exists
+
+        Results still buffered in this repository are not included until the next flush.
         """
         format_data = self._load_format_data(format)
         archetype_data = format_data.get(deck_archetype, {})
 
-        #Try specific matchup first
+        #Try specific matchup first; entries without samples are placeholders, not data
         if opponent_archetype:
             matchup_key = f"vs_{opponent_archetype.lower().replace(' ', '_')}"
-            if matchup_key in archetype_data:
+            if archetype_data.get(matchup_key, {}).get("samples"):
                 return self._add_confidence(archetype_data[matchup_key])
 
-        if "vs_general" in archetype_data:
+        if archetype_data.get("vs_general", {}).get("samples"):
             return self._add_confidence(archetype_data["vs_general"])
 
         return None
@@ -61,16 +103,110 @@ class HistoricalRepository:
             opponent_archetype: Optional[str] = None,
             format: str = "sparky"
             ) -> None:
-        """Update historical data with new game result"""
-        format_data = self._load_format_data(format)
+        """Record a new game result (buffered, see flush())"""
+        self._add_pending(format, (deck_archetype, opponent_archetype, played_first), int(won), 1)
+        self._n_pending += 1
+        if METRICS.enabled:
+            METRICS.count('win_rate_updates')
+        if self._n_pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def merge_results(
+            self,
+            results: Dict[Tuple[str, Optional[str], bool], Tuple[int, int]],
+            format: str = "sparky"
+            ) -> None:
+        """
+        Append a batch of aggregated game results to the log right away
+
+        Safe to call from several processes at once.
+
+        Args:
+            results: {(deck_archetype, opponent_archetype, played_first): (wins, games)}
+        """
+        for key, (wins, games) in results.items():
+            self._add_pending(format, key, wins, games)
+        self.flush()
+
+    def _add_pending(self, format: str, key: tuple, wins: int, games: int) -> None:
+        tally = self._pending.setdefault(format, {}).setdefault(key, [0, 0])
+        tally[0] += wins
+        tally[1] += games
+
+    def flush(self) -> None:
+        """Append buffered results to the result logs, then compact any log past compact_bytes"""
+        for format, tally in self._pending.items():
+            if format in self._cache:
+                for (deck_archetype, opponent_archetype, played_first), (wins, games) in tally.items():
+                    stats = self._get_matchup_stats(self._cache[format], deck_archetype, opponent_archetype)
+                    self._apply_results(stats, played_first, wins, games)
+        formats = list(self._pending)
+        with METRICS.timer('win_rate_flush'):
+            _append_to_logs(self.data_dir, self._pending)
+        self._n_pending = 0
+        self._last_flush = time.monotonic()
+
+        for format in formats:
+            log_path = _log_path(self.data_dir, format)
+            if log_path.exists() and log_path.stat().st_size >= self.compact_bytes:
+                self.compact(format)
+
+    def compact(self, format: str = "sparky") -> None:
+        """Fold the result log into <format>.json (written to a temp file and renamed) and truncate the log"""
+        path = self.data_dir / f"{format}.json"
+        log_path = _log_path(self.data_dir, format)
+        with METRICS.timer('win_rate_compact'), _locked(self.data_dir, format):
+            try:
+                with open(path) as f:
+                    format_data = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                format_data = {}
+            for (deck_archetype, opponent_archetype, played_first), wins, games in _read_log(log_path):
+                stats = self._get_matchup_stats(format_data, deck_archetype, opponent_archetype)
+                self._apply_results(stats, played_first, wins, games)
+
+            self._save_format_data(format, format_data)
+            if log_path.exists():
+                log_path.unlink()
+        self._cache[format] = format_data
+
+    def win_rate_matrix(self, format: str = "sparky"):
+        """
+        WinRateMatrix built from <format>.json plus the result log
+
+        Log entries keep play and draw games apart, so they are imported exactly; see
+        WinRateMatrix.from_format_data for how the aggregate file is split.
+        """
+        from data.win_rate_matrix import WinRateMatrix
+
+        try:
+            with open(self.data_dir / f"{format}.json") as f:
+                matrix = WinRateMatrix.from_format_data(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            matrix = WinRateMatrix()
+        for (deck_archetype, opponent_archetype, played_first), wins, games in _read_log(_log_path(self.data_dir, format)):
+            matrix.record(deck_archetype, opponent_archetype, played_first, wins, games)
+        return matrix
+
+    def close(self) -> None:
+        self.flush()
+        self._finalizer.detach()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _get_matchup_stats(format_data: dict, deck_archetype: str, opponent_archetype: Optional[str]) -> dict:
         # Get or initialize archetype entry
         if deck_archetype not in format_data:
             format_data[deck_archetype] = {}
 
         # Determine matchup key
         matchup_key = (
-            f"vs{opponent_archetype.lower().replace(' ', '_')}"
+            f"vs_{opponent_archetype.lower().replace(' ', '_')}"
             if opponent_archetype
             else "vs_general"
         )
@@ -83,22 +219,85 @@ class HistoricalRepository:
                 "samples": 0
             }
 
-        stats = format_data[deck_archetype][matchup_key]
+        return format_data[deck_archetype][matchup_key]
+
+    @staticmethod
+    def _apply_results(stats: dict, played_first: bool, wins: int, games: int) -> None:
+        if games <= 0:
+            return
 
         # Update stats
         if played_first:
-            new_play = (stats["play_win_rate"] * stats["samples"] + won) / (stats["samples"] + 1)
+            new_play = (stats["play_win_rate"] * stats["samples"] + wins) / (stats["samples"] + games)
             stats["play_win_rate"] = round(new_play, 4)
         else:
-            new_draw = (stats["draw_win_rate"] * stats["samples"] + won) / (stats["samples"] + 1)
+            new_draw = (stats["draw_win_rate"] * stats["samples"] + wins) / (stats["samples"] + games)
             stats["draw_win_rate"] = round(new_draw, 4)
 
-        stats["samples"] += 1
-
-        self._save_format_data(format, format_data)
+        stats["samples"] += games
 
     def _save_format_data(self, format: str, data: dict) -> None:
-        """Persist data to JSON file"""
+        """Persist data to JSON file atomically"""
         path = self.data_dir / f"{format}.json"
-        with open(path, "w") as f:
-            json.dump(data, f, indent=2)
\ No newline at end of file
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+
+def _log_path(data_dir: Path, format: str) -> Path:
+    return data_dir / f"{format}.results.jsonl"
+
+
+@contextmanager
+def _locked(data_dir: Path, format: str):
+    """Exclusive lock shared by every process writing this format's log or aggregate file"""
+    with open(data_dir / f"{format}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _append_to_logs(data_dir: Path, pending: Dict[str, ResultTally]) -> None:
+    """Append each format's pending tally as one write and clear it"""
+    for format, tally in list(pending.items()):
+        if not tally:
+            continue
+        lines = "".join(
+            json.dumps({"deck": deck, "opponent": opponent, "played_first": played_first,
+                        "wins": wins, "games": games}) + "\n"
+            for (deck, opponent, played_first), (wins, games) in tally.items()
+        )
+        with _locked(data_dir, format):
+            with open(_log_path(data_dir, format), "ab+") as f:
+                # Start on a fresh line if a crashed writer left a torn one
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        lines = "\n" + lines
+                f.write(lines.encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+    pending.clear()
+
+
+def _read_log(log_path: Path):
+    """Yields ((deck, opponent, played_first), wins, games) for each complete line in the log"""
+    try:
+        f = open(log_path)
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crashed writer
+                continue
+            yield (entry["deck"], entry["opponent"], entry["played_first"]), entry["wins"], entry["games"]
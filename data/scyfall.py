@@ -1,8 +1,139 @@
-import requests, copy
-import pandas as pd
+import asyncio
+import time
+from typing import Dict, Iterable, Optional
 
-def fetch_card(name:str):
-    card_search = requests.get(f"https://api.scryfall.com/cards/search?q=!\"{name}\"").json()
-    return card_search['data'][0]
+# requests is imported where it is used: it is slow to import and only needed when Scryfall is queried
 
-print(fetch_card('Altar of Bhaal'))
\ No newline at end of file
+SCRYFALL_API = "https://api.scryfall.com"
+# Scryfall asks clients to keep 50-100 ms between requests
+REQUEST_INTERVAL = 0.1
+TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Spaces request starts at least min_interval seconds apart, across every event loop it is used from"""
+    def __init__(self, min_interval: float = REQUEST_INTERVAL):
+        self.min_interval = min_interval
+        self._next_start = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    async def wait(self):
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            # An asyncio.Lock belongs to one loop, and resolve_many runs a new loop per call
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_start > now:
+                await asyncio.sleep(self._next_start - now)
+                now = self._next_start
+            self._next_start = now + self.min_interval
+
+
+class CardResolver:
+    """
+    Resolves card names to Scryfall card data, local store first
+
+    Names missing from the store are fetched concurrently over one pooled session, with rate limiting and
+    retries on transient failures, and written back to the store. Concurrent lookups of the same name share
+    a single request. One rate limiter spans every resolve on this resolver, so back-to-back calls stay
+    within it too.
+    """
+    def __init__(self,
+                 store=None,
+                 base_url: str = SCRYFALL_API,
+                 concurrency: int = 8,
+                 min_interval: float = REQUEST_INTERVAL,
+                 retries: int = 3,
+                 backoff: float = 0.5,
+                 timeout: float = 10.0):
+        self.store = store
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(min_interval)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'MtgFromScratch/0.1', 'Accept': 'application/json'})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.requests_made = 0
+
+    def resolve_many(self, names: Iterable[str]) -> Dict[str, Optional[dict]]:
+        """Blocking wrapper around resolve()"""
+        return asyncio.run(self.resolve(names))
+
+    async def resolve(self, names: Iterable[str]) -> Dict[str, Optional[dict]]:
+        """
+        Returns:
+            {name: card data, or None if Scryfall doesn't know the name} for each distinct name
+        """
+        unique_names = list(dict.fromkeys(names))
+        results = {}
+        missing = []
+        for name in unique_names:
+            card_data = self.store.get(name) if self.store is not None else None
+            if card_data is None:
+                missing.append(name)
+            else:
+                results[name] = card_data
+
+        if missing:
+            semaphore = asyncio.Semaphore(self.concurrency)
+            fetched = await asyncio.gather(*(self._coalesced_fetch(name, semaphore) for name in missing))
+            found = []
+            for name, card_data in zip(missing, fetched):
+                results[name] = card_data
+                if card_data is not None:
+                    found.append(card_data)
+            if found and self.store is not None:
+                self.store.put_many(found)
+
+        return {name: results[name] for name in unique_names}
+
+    async def _coalesced_fetch(self, name, semaphore):
+        task = self._inflight.get(name)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(name, semaphore))
+            self._inflight[name] = task
+            task.add_done_callback(lambda _: self._inflight.pop(name, None))
+        return await task
+
+    async def _fetch(self, name, semaphore) -> Optional[dict]:
+        import requests
+
+        async with semaphore:
+            for attempt in range(self.retries + 1):
+                await self.limiter.wait()
+                try:
+                    response = await asyncio.to_thread(
+                        self.session.get, f"{self.base_url}/cards/named",
+                        params={'exact': name}, timeout=self.timeout)
+                    self.requests_made += 1
+                except requests.RequestException:
+                    if attempt == self.retries:
+                        raise
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+                    continue
+
+                if response.status_code == 404:
+                    return None
+                if response.status_code in TRANSIENT_STATUS and attempt < self.retries:
+                    retry_after = response.headers.get('Retry-After')
+                    delay = float(retry_after) if retry_after and retry_after.isdigit() else self.backoff * 2 ** attempt
+                    await asyncio.sleep(delay)
+                    continue
+                response.raise_for_status()
+                return response.json()
+
+    def close(self):
+        self.session.close()
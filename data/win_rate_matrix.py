@@ -0,0 +1,183 @@
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+
+PLAY, DRAW = 0, 1
+# Opponent slot for results recorded without a known opponent (the JSON "vs_general" entry)
+GENERAL = "general"
+
+
+class WinRateMatrix:
+    """
+    Matchup matrix of wins and games indexed [archetype, opponent, play/draw]
+
+    Archetypes get a stable integer index on first sight; the opponent axis uses the same index, plus a
+    slot for GENERAL. Storage grows by doubling so adding archetypes stays amortized O(1).
+    """
+    def __init__(self, archetypes: Iterable[str] = (), capacity: int = 8):
+        self.archetypes: list = []
+        self._index: Dict[str, int] = {}
+        self.wins = np.zeros((capacity, capacity, 2), dtype=np.int64)
+        self.games = np.zeros((capacity, capacity, 2), dtype=np.int64)
+        self.index(GENERAL)
+        for archetype in archetypes:
+            self.index(archetype)
+
+    def __len__(self) -> int:
+        return len(self.archetypes)
+
+    def index(self, archetype: str) -> int:
+        """Integer index of archetype, assigning the next free one if it's new"""
+        i = self._index.get(archetype)
+        if i is None:
+            i = self._index[archetype] = len(self.archetypes)
+            self.archetypes.append(archetype)
+            if i >= self.wins.shape[0]:
+                self._grow(2 * self.wins.shape[0])
+        return i
+
+    def _grow(self, capacity: int):
+        for name in ('wins', 'games'):
+            old = getattr(self, name)
+            new = np.zeros((capacity, capacity, 2), dtype=np.int64)
+            new[:old.shape[0], :old.shape[1]] = old
+            setattr(self, name, new)
+
+    @staticmethod
+    def _opponent_key(opponent: Optional[str]) -> str:
+        # Same normalization HistoricalRepository applies to its "vs_<opponent>" keys
+        return opponent.lower().replace(' ', '_') if opponent else GENERAL
+
+    def record(self, archetype: str, opponent: Optional[str], played_first: bool, wins, games: int = 1):
+        """Add games to one cell; wins may be a bool when recording a single game"""
+        i, j = self.index(archetype), self.index(self._opponent_key(opponent))
+        k = PLAY if played_first else DRAW
+        self.wins[i, j, k] += int(wins)
+        self.games[i, j, k] += games
+
+    def record_batch(self, archetype_idx, opponent_idx, played_first, wins, games=None):
+        """
+        Vectorized update from parallel arrays of integer indexes (see index())
+
+        wins may be 0/1 outcomes or per-row win counts, in which case games gives the per-row game counts.
+        """
+        archetype_idx = np.asarray(archetype_idx, dtype=np.intp)
+        opponent_idx = np.asarray(opponent_idx, dtype=np.intp)
+        side = np.where(np.asarray(played_first, dtype=bool), PLAY, DRAW)
+        wins = np.asarray(wins, dtype=np.int64)
+        games = np.ones_like(wins) if games is None else np.asarray(games, dtype=np.int64)
+        np.add.at(self.wins, (archetype_idx, opponent_idx, side), wins)
+        np.add.at(self.games, (archetype_idx, opponent_idx, side), games)
+
+    def _view(self):
+        n = len(self.archetypes)
+        return self.wins[:n, :n], self.games[:n, :n]
+
+    def win_rates(self) -> np.ndarray:
+        """Win rate for every cell, NaN where no games were played"""
+        wins, games = self._view()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(games > 0, wins / games, np.nan)
+
+    def wilson_interval(self, z: float = 1.96):
+        """(lower, upper) Wilson score bounds for every cell at once; (0, 1) where no games were played"""
+        wins, games = self._view()
+        n = np.maximum(games, 1)
+        p = wins / n
+        denominator = 1 + z ** 2 / n
+        center = (p + z ** 2 / (2 * n)) / denominator
+        margin = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominator
+        empty = games == 0
+        return np.where(empty, 0.0, center - margin), np.where(empty, 1.0, center + margin)
+
+    def bayesian_interval(self, prior=(1.0, 1.0), z: float = 1.96):
+        """
+        Beta(prior) posterior mean and a normal-approximation credible interval for every cell
+
+        Returns:
+            (mean, lower, upper)
+        """
+        wins, games = self._view()
+        alpha = wins + prior[0]
+        beta = games - wins + prior[1]
+        total = alpha + beta
+        mean = alpha / total
+        sd = np.sqrt(alpha * beta / (total ** 2 * (total + 1)))
+        return mean, np.clip(mean - z * sd, 0.0, 1.0), np.clip(mean + z * sd, 0.0, 1.0)
+
+    def get_win_rates(self, archetype: str, opponent: Optional[str] = None) -> Optional[dict]:
+        """
+        Same shape as HistoricalRepository.get_win_rates, with separate play/draw sample counts
+
+        Falls back to the archetype's results against every opponent when the matchup has no games.
+        """
+        i = self._index.get(archetype)
+        if i is None:
+            return None
+        j = self._index.get(self._opponent_key(opponent)) if opponent else None
+        if j is not None and self.games[i, j].sum() > 0:
+            wins, games = self.wins[i, j], self.games[i, j]
+        else:
+            wins, games = self.wins[i].sum(axis=0), self.games[i].sum(axis=0)
+            if games.sum() == 0:
+                return None
+
+        samples = int(games.sum())
+        return {
+            "play_win_rate": float(wins[PLAY] / games[PLAY]) if games[PLAY] else 0.5,
+            "draw_win_rate": float(wins[DRAW] / games[DRAW]) if games[DRAW] else 0.5,
+            "play_samples": int(games[PLAY]),
+            "draw_samples": int(games[DRAW]),
+            "samples": samples,
+            "confidence": min(1.0, samples / 1000),
+        }
+
+    @classmethod
+    def from_format_data(cls, format_data: dict) -> "WinRateMatrix":
+        """
+        Import the historical JSON format ({archetype: {"vs_<opponent>": {...}}})
+
+        That format only keeps one sample count per matchup, so samples are split evenly between play and draw.
+        """
+        matrix = cls(format_data)
+        for archetype, matchups in format_data.items():
+            for matchup_key, stats in matchups.items():
+                opponent = matchup_key[len("vs_"):] if matchup_key.startswith("vs_") else matchup_key
+                play_games = stats["samples"] // 2
+                draw_games = stats["samples"] - play_games
+                matrix.record(archetype, opponent, True, round(stats["play_win_rate"] * play_games), play_games)
+                matrix.record(archetype, opponent, False, round(stats["draw_win_rate"] * draw_games), draw_games)
+        return matrix
+
+    def to_format_data(self) -> dict:
+        """Export to the historical JSON format"""
+        format_data = {}
+        wins, games = self._view()
+        for i, archetype in enumerate(self.archetypes):
+            if archetype == GENERAL:
+                continue
+            matchups = {}
+            for j, opponent in enumerate(self.archetypes):
+                cell_games = games[i, j]
+                if cell_games.sum() == 0:
+                    continue
+                cell_wins = wins[i, j]
+                matchups[f"vs_{opponent}"] = {
+                    "play_win_rate": round(float(cell_wins[PLAY] / cell_games[PLAY]), 4) if cell_games[PLAY] else 0.5,
+                    "draw_win_rate": round(float(cell_wins[DRAW] / cell_games[DRAW]), 4) if cell_games[DRAW] else 0.5,
+                    "samples": int(cell_games.sum()),
+                }
+            if matchups:
+                format_data[archetype] = matchups
+        return format_data
+
+    @classmethod
+    def from_json(cls, path: Union[str, Path]) -> "WinRateMatrix":
+        with open(path) as f:
+            return cls.from_format_data(json.load(f))
+
+    def to_json(self, path: Union[str, Path]):
+        with open(path, "w") as f:
+            json.dump(self.to_format_data(), f, indent=2)
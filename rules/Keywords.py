@@ -0,0 +1,126 @@
+import json
+import re
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from core.triggers import EffectType, TriggeredAbility, TriggerScope, TriggerType
+
+KEYWORDS_PATH = Path(__file__).parent.parent / 'Jsons' / 'Keywords.json'
+
+# Predicates a condition string may name, applied to one object from the event data
+PREDICATES: Dict[str, Callable[[object], bool]] = {
+    'is_creature': lambda obj: hasattr(obj, 'has_type') and obj.has_type('creature'),
+    'is_land': lambda obj: hasattr(obj, 'has_type') and obj.has_type('land'),
+    'is_player': lambda obj: hasattr(obj, 'life_total'),
+    'is_tapped': lambda obj: getattr(obj, 'tapped', False),
+}
+
+_REMINDER_TEXT = re.compile(r'\([^)]*\)')
+
+_keywords: Optional[Dict[str, "Keyword"]] = None
+_card_keywords: Dict[str, Tuple["Keyword", ...]] = {}
+
+
+class KeywordTrigger:
+    """One compiled trigger of a keyword: event type, condition callable and effect"""
+    __slots__ = ('trigger_type', 'condition', 'effect_type')
+
+    def __init__(self, trigger_type: TriggerType, condition: Callable[[dict], bool], effect_type: EffectType):
+        self.trigger_type = trigger_type
+        self.condition = condition
+        self.effect_type = effect_type
+
+
+class Keyword:
+    __slots__ = ('name', 'description', 'type', 'zones', 'triggers')
+
+    def __init__(self, name: str, data: dict):
+        self.name = name
+        self.description = data.get('description', '')
+        self.type = data.get('type')
+        self.zones = frozenset(data.get('zone', ()))
+        self.triggers = tuple(
+            KeywordTrigger(
+                TriggerType[trigger['event'].upper()],
+                compile_condition(trigger.get('condition')),
+                EffectType[trigger['effect'].upper()],
+            )
+            for trigger in data.get('triggers', ())
+        )
+
+    def abilities(self, card) -> list:
+        """Fresh SOURCE-scoped TriggeredAbilities for one card, so only events whose source is that card reach them"""
+        return [
+            TriggeredAbility(
+                trigger.trigger_type,
+                TriggerScope.SOURCE,
+                trigger.effect_type,
+                {'keyword': self.name, 'zones': self.zones},
+                condition=trigger.condition,
+                source=card,
+            )
+            for trigger in self.triggers
+        ]
+
+
+def compile_condition(expression: Optional[str]) -> Callable[[dict], bool]:
+    """
+    Compiles a condition string such as "target.is_creature" or "not source.is_tapped and target.is_creature"
+
+    Each clause is '[not ]<event data key>.<predicate>'; clauses are joined with 'and'.
+    """
+    if not expression:
+        return lambda _: True
+
+    clauses = []
+    for clause in expression.split(' and '):
+        clause = clause.strip()
+        negate = clause.startswith('not ')
+        if negate:
+            clause = clause[len('not '):].strip()
+        subject, _, predicate_name = clause.partition('.')
+        if predicate_name not in PREDICATES:
+            raise ValueError(f"Unknown predicate '{predicate_name}' in keyword condition '{expression}'")
+        clauses.append((subject, PREDICATES[predicate_name], negate))
+
+    if len(clauses) == 1:
+        subject, predicate, negate = clauses[0]
+        if negate:
+            return lambda event_data: not predicate(event_data.get(subject))
+        return lambda event_data: predicate(event_data.get(subject))
+
+    clauses = tuple(clauses)
+    return lambda event_data: all(
+        predicate(event_data.get(subject)) != negate for subject, predicate, negate in clauses
+    )
+
+
+def load_keywords(path=KEYWORDS_PATH) -> Dict[str, Keyword]:
+    """Keyword definitions compiled from Keywords.json, once per process"""
+    global _keywords
+    if _keywords is None:
+        with open(path, 'r', encoding='utf-8') as f:
+            _keywords = {name.lower(): Keyword(name, data) for name, data in json.load(f).items()}
+    return _keywords
+
+
+def card_keywords(printed) -> Tuple[Keyword, ...]:
+    """Keywords a card has, found by scanning its oracle text once per unique card"""
+    found = _card_keywords.get(printed.name)
+    if found is None:
+        keywords = load_keywords()
+        names = []
+        for face in printed.faces.values():
+            for line in (face.oracle or '').split('\n'):
+                for part in re.split(r'[,;]', _REMINDER_TEXT.sub('', line)):
+                    name = part.strip().lower()
+                    if name in keywords and name not in names:
+                        names.append(name)
+        found = _card_keywords[printed.name] = tuple(keywords[name] for name in names)
+    return found
+
+
+def attach_keyword_abilities(card) -> None:
+    """Adds the card's keyword TriggeredAbilities to card.abilities"""
+    for keyword in card_keywords(card.printed):
+        card.abilities.extend(keyword.abilities(card))